@@ -0,0 +1,186 @@
+"""Read-only JSON/CSV API over the numbers the dashboard shows.
+
+Routes (all GET, under ``/api/v1``)::
+
+    /meta                                        data version, years, zones, drug types
+    /series?zone=&drug=&years=&granularity=&window=   deaths and rates over time
+    /zones?drug=&years=                          deaths and rates by health zone
+    /drugs?zone=&years=                          deaths, rates and shares by drug type
+    /trends?years=                               fitted recent trends, fastest rising first
+
+``years`` is ``FIRST-LAST`` (default: every year). Responses are compact JSON
+(``{"version", "query", "columns", "data"}``) or CSV with ``format=csv`` or
+``Accept: text/csv``. The ETag is derived from the data version and the
+request, so repeats get ``304 Not Modified`` and a new data release changes
+every ETag; ``API_MAX_AGE`` sets the Cache-Control max-age for proxies.
+"""
+import hashlib
+import json
+import os
+
+import flask
+
+from compression import matching_etag
+from dashboard_data import get_data
+from figure_payload import FLOAT_DECIMALS
+from time_series import GRANULARITIES, ROLLING_WINDOWS
+
+# Seconds clients and proxies may reuse a response without revalidating
+API_MAX_AGE = int(os.environ.get('API_MAX_AGE', 300))
+
+# Zones compared by the zone comparison chart and the map
+COMPARED_ZONES = ['Central', 'Eastern', 'Northern', 'Western']
+
+api = flask.Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+class QueryError(ValueError):
+    """Invalid query parameter; answered with 400 Bad Request."""
+
+
+def year_range_arg(data):
+    value = flask.request.args.get('years')
+    if not value:
+        return [min(data.years), max(data.years)]
+    first, _, last = value.partition('-')
+    try:
+        year_range = [int(first), int(last or first)]
+    except ValueError:
+        raise QueryError(f"years must be FIRST-LAST, got {value!r}")
+    if year_range[0] > year_range[1]:
+        raise QueryError(f"years must be FIRST-LAST with FIRST <= LAST, got {value!r}")
+    return year_range
+
+
+def choice_arg(name, choices, default):
+    value = flask.request.args.get(name, default)
+    if value not in choices:
+        raise QueryError(f"{name} must be one of {list(choices)}, got {value!r}")
+    return value
+
+
+def response_format():
+    fmt = flask.request.args.get('format')
+    if fmt is None:
+        best = flask.request.accept_mimetypes.best_match(['application/json', 'text/csv'])
+        fmt = 'csv' if best == 'text/csv' else 'json'
+    if fmt not in ('json', 'csv'):
+        raise QueryError(f"format must be 'json' or 'csv', got {fmt!r}")
+    return fmt
+
+
+def cache_headers(response, etag):
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = API_MAX_AGE
+    response.vary.add('Accept')
+    return response
+
+
+def cached_endpoint(query):
+    """Route body for ``query(data)``, which returns ``(query info, frame)``
+    (a ``None`` frame sends the info alone, as JSON).
+
+    The ETag only depends on the data version and the request, so a
+    revalidation (of the plain or a compressed response) is answered with 304
+    before anything is queried.
+    """
+    def endpoint():
+        data = get_data()
+        try:
+            fmt = response_format()
+        except QueryError as e:
+            return flask.jsonify(error=str(e)), 400
+
+        request_key = f"{data.version}|{flask.request.path}|{sorted(flask.request.args.items(multi=True))}|{fmt}"
+        etag = hashlib.sha1(request_key.encode()).hexdigest()[:20]
+        # Compressed responses carry the tag with their encoding appended
+        matched = matching_etag(etag, flask.request.if_none_match)
+        if matched is not None:
+            response = cache_headers(flask.Response(status=304), matched)
+            response.vary.add('Accept-Encoding')
+            return response
+
+        if data.df.empty:
+            return flask.jsonify(error="No data loaded"), 503
+        try:
+            info, frame = query(data)
+        except QueryError as e:
+            return flask.jsonify(error=str(e)), 400
+
+        if frame is None:
+            # Metadata only, always JSON
+            response = flask.Response(json.dumps(dict({'version': data.version}, **info), separators=(',', ':')),
+                                      mimetype='application/json')
+            response.headers['X-Data-Version'] = data.version
+            return cache_headers(response, etag)
+        if FLOAT_DECIMALS is not None:
+            frame = frame.round(FLOAT_DECIMALS)
+        if fmt == 'csv':
+            response = flask.Response(frame.to_csv(index=False), mimetype='text/csv')
+        else:
+            payload = json.loads(frame.to_json(orient='split', index=False))
+            body = dict({'version': data.version, 'query': info}, **payload)
+            response = flask.Response(json.dumps(body, separators=(',', ':')), mimetype='application/json')
+        response.headers['X-Data-Version'] = data.version
+        return cache_headers(response, etag)
+
+    endpoint.__name__ = query.__name__
+    return endpoint
+
+
+def meta(data):
+    return {
+        'years': [int(year) for year in data.years],
+        'zones': list(data.health_zones),
+        'drugs': list(data.drug_types),
+        'granularities': ['year'] + list(GRANULARITIES),
+        'windows': list(ROLLING_WINDOWS)
+    }, None
+
+
+def series(data):
+    # Same rows as update_time_series
+    year_range = year_range_arg(data)
+    zone = choice_arg('zone', data.health_zones, 'Nova Scotia')
+    drug = choice_arg('drug', data.drug_types, 'All')
+    granularity = choice_arg('granularity', ['year'] + list(GRANULARITIES), 'year')
+    window = int(choice_arg('window', ['0'] + [str(window) for window in ROLLING_WINDOWS], '0'))
+
+    if granularity == 'year':
+        frame = data.query_engine.aggregate(year_range, zone, drug, 'Year')
+    else:
+        # Quarterly and monthly rows are only published province-wide
+        zone = zone if zone in data.time_series.zones(granularity) else 'Nova Scotia'
+        frame = data.time_series.query(granularity, zone, drug, year_range, window)
+    info = {'years': year_range, 'zone': zone, 'drug': drug, 'granularity': granularity, 'window': window}
+    return info, frame
+
+
+def zones(data):
+    # Same rows as update_zone_comparison and update_map
+    year_range = year_range_arg(data)
+    drug = choice_arg('drug', data.drug_types, 'All')
+    frame = data.query_engine.aggregate(year_range, COMPARED_ZONES, drug, 'Health Zone of Residence')
+    return {'years': year_range, 'drug': drug}, frame
+
+
+def drugs(data):
+    # Same rows as update_drug_distribution, without its top 15 cut
+    year_range = year_range_arg(data)
+    zone = choice_arg('zone', data.health_zones, 'Nova Scotia')
+    frame = data.query_engine.aggregate(year_range, zone, 'All', 'Drug Type')
+    # Query results are shared with the dashboard; add columns to a copy
+    frame = frame.sort_values('Frequency', ascending=False).reset_index(drop=True)
+    frame['Percent'] = frame['Frequency'].astype(float) / max(int(frame['Frequency'].sum()), 1) * 100
+    return {'years': year_range, 'zone': zone}, frame
+
+
+def trends(data):
+    # Same rows as update_trend_ranking, without its top rows cut
+    year_range = year_range_arg(data)
+    return {'years': year_range}, data.trends.ranking(year_range)
+
+
+for query in [meta, series, zones, drugs, trends]:
+    api.add_url_rule(f'/{query.__name__}', view_func=cached_endpoint(query))
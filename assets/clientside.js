@@ -0,0 +1,317 @@
+// Clientside versions of update_key_stats and update_time_series.
+// They read the columnar payload from the 'clientside-data' store, so moving the
+// year slider or changing a dropdown costs no server round trip.
+(function () {
+    var TYPED_ARRAYS = {
+        int16: Int16Array,
+        int32: Int32Array,
+        uint8: Uint8Array,
+        uint16: Uint16Array,
+        float32: Float32Array,
+        float64: Float64Array
+    };
+
+    var decoded = new WeakMap();
+    var decodedSeries = new WeakMap();
+
+    function decodeColumn(column) {
+        var binary = atob(column.data);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPED_ARRAYS[column.dtype](bytes.buffer);
+    }
+
+    function getColumns(payload) {
+        // Decode the base64 columns once per payload, not on every slider tick
+        if (!decoded.has(payload)) {
+            var columns = {};
+            Object.keys(payload.columns).forEach(function (name) {
+                columns[name] = decodeColumn(payload.columns[name]);
+            });
+            if (payload.population) {
+                columns.population = decodeColumn(payload.population.values);
+            }
+            if (payload.trends) {
+                columns.trends = decodeColumn(payload.trends.codes);
+            }
+            decoded.set(payload, columns);
+        }
+        return decoded.get(payload);
+    }
+
+    function getSeries(series) {
+        if (!decodedSeries.has(series)) {
+            decodedSeries.set(series, {
+                years: decodeColumn(series.years),
+                population: decodeColumn(series.population),
+                deaths: decodeColumn(series.deaths)
+            });
+        }
+        return decodedSeries.get(series);
+    }
+
+    // Deaths (or moving totals) and annualized rates per period, as in
+    // TimeSeriesIndex.query; windows that are incomplete or have gaps are skipped
+    function roundTo(value, decimals) {
+        // As figure_payload.trim_floats rounds the server's figures (null keeps full precision)
+        if (decimals === null || decimals === undefined) {
+            return value;
+        }
+        var scale = Math.pow(10, decimals);
+        return Math.round(value * scale) / scale;
+    }
+
+    function formatFixed(value, digits) {
+        // As Python's '%.1f' formats the card: exact decimal ties round to even (toFixed
+        // rounds them up); a tie is "5" then only zeros in the value's exact expansion
+        var expansion = Math.abs(value).toFixed(20);
+        var point = expansion.indexOf('.');
+        if (/^50*$/.test(expansion.slice(point + 1 + digits))) {
+            var kept = expansion.slice(0, digits ? point + 1 + digits : point);
+            if (Number(kept.charAt(kept.length - 1)) % 2 === 0) {
+                return (value < 0 ? '-' : '') + kept;
+            }
+        }
+        return value.toFixed(digits);
+    }
+
+    function subYearRows(series, drug, yearRange, windowMonths, decimals) {
+        var arrays = getSeries(series);
+        var row = series.drugs.indexOf(drug);
+        var rows = {labels: [], deaths: [], rates: []};
+        if (row === -1) {
+            return rows;
+        }
+
+        var periodCount = series.labels.length;
+        var months = windowMonths && windowMonths % series.months_per_period === 0
+            ? windowMonths : series.months_per_period;
+        var periods = months / series.months_per_period;
+
+        for (var i = periods - 1; i < periodCount; i++) {
+            var year = arrays.years[i];
+            if (year < yearRange[0] || year > yearRange[1]) {
+                continue;
+            }
+            var total = 0;
+            for (var j = i - periods + 1; j <= i; j++) {
+                total += arrays.deaths[row * periodCount + j];
+            }
+            if (isNaN(total)) {
+                continue;
+            }
+            rows.labels.push(series.labels[i]);
+            rows.deaths.push(total);
+            rows.rates.push(roundTo(total * (12 / months) / arrays.population[i] * 100000, decimals));
+        }
+        return rows;
+    }
+
+    function subYearFigure(payload, yearRange, zone, drug, granularity, windowMonths) {
+        // Quarterly and monthly rows are only published province-wide
+        var byZone = payload.time_series[granularity] || {};
+        var seriesZone = byZone[zone] ? zone : 'Nova Scotia';
+        if (!byZone[seriesZone]) {
+            return {data: [], layout: {}};
+        }
+
+        var rows = subYearRows(byZone[seriesZone], drug, yearRange, windowMonths, payload.float_decimals);
+        if (rows.labels.length === 0) {
+            return {data: [], layout: {}};
+        }
+
+        var period = granularity === 'quarter' ? 'Quarter' : 'Month';
+        var title = drug + ' Deaths by ' + period + ' - ' + seriesZone;
+        if (windowMonths) {
+            title += ' (' + windowMonths + '-month moving total)';
+        }
+
+        return {
+            data: [{
+                type: 'scatter',
+                x: rows.labels,
+                y: rows.deaths,
+                customdata: rows.rates,
+                mode: 'lines+markers',
+                name: windowMonths ? windowMonths + '-month total' : 'Deaths',
+                line: {color: payload.zone_colors[seriesZone] || '#1f77b4', width: 3},
+                marker: {size: 6},
+                hovertemplate: '%{y:,.0f} deaths<br>%{customdata:.1f} per 100k (annualized)<extra></extra>'
+            }],
+            layout: {
+                title: {text: title},
+                xaxis: {title: {text: period}},
+                yaxis: {title: {text: 'Number of Deaths'}},
+                hovermode: 'x unified',
+                template: payload.template
+            }
+        };
+    }
+
+    // Yearly Frequency sums and Rate values for one zone and drug selection
+    function filterRows(payload, yearRange, zone, drug) {
+        var columns = getColumns(payload);
+        var zoneCode = payload.zones.indexOf(zone);
+        var drugCode = drug === 'All' ? -1 : payload.drugs.indexOf(drug);
+        var yearly = {};
+        var rates = [];
+
+        for (var i = 0; i < columns.year.length; i++) {
+            var year = columns.year[i];
+            if (columns.zone[i] !== zoneCode || year < yearRange[0] || year > yearRange[1]) {
+                continue;
+            }
+            if (drugCode !== -1 && columns.drug[i] !== drugCode) {
+                continue;
+            }
+            yearly[year] = (yearly[year] || 0) + columns.frequency[i];
+            rates.push(columns.rate[i]);
+        }
+
+        var years = Object.keys(yearly).map(Number).sort(function (a, b) { return a - b; });
+        return {
+            years: years,
+            deaths: years.map(function (year) { return yearly[year]; }),
+            rates: rates
+        };
+    }
+
+    // Deaths per 100k person-years, as QueryEngine.rate: Σdeaths / Σpopulation over the range
+    function populationRate(payload, yearRange, zone, totalDeaths) {
+        var population = payload.population;
+        var zoneCode = population.zones.indexOf(zone);
+        if (zoneCode === -1) {
+            return NaN;
+        }
+        var values = getColumns(payload).population;
+        var first = Math.max(yearRange[0] - population.first_year, 0);
+        var last = Math.min(yearRange[1] - population.first_year, population.years - 1);
+        var personYears = 0;
+        for (var i = first; i <= last; i++) {
+            personYears += values[zoneCode * population.years + i];
+        }
+        return personYears > 0 ? totalDeaths / personYears * 100000 : NaN;
+    }
+
+    function sumYears(rows, fromYear, toYear) {
+        var total = 0;
+        rows.years.forEach(function (year, i) {
+            if (year >= fromYear && year < toYear) {
+                total += rows.deaths[i];
+            }
+        });
+        return total;
+    }
+
+    // Recent Trend card text fitted at load (TrendIndex): the last recent_years
+    // years of the range, up to its last year with data
+    function recentTrend(payload, yearRange, zone, drug, lastYear) {
+        var trends = payload.trends;
+        var zoneCode = payload.zones.indexOf(zone);
+        var drugCode = drug === 'All' ? 0 : payload.drugs.indexOf(drug) + 1;
+        var end = lastYear - trends.first_year;
+        var start = Math.max(yearRange[0] - trends.first_year, end - trends.recent_years + 1);
+        if (zoneCode === -1 || drugCode === -1 || end < 0 || end >= trends.years) {
+            return 'N/A';
+        }
+        var series = zoneCode * (payload.drugs.length + 1) + drugCode;
+        var code = getColumns(payload).trends[(series * trends.years + end) * trends.recent_years + end - start];
+        return trends.labels[code];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            formatFixed: formatFixed,
+
+            updateKeyStats: function (yearRange, zone, drug, payload) {
+                var title = drug + ' Statistics - ' + zone + ' (' + yearRange[0] + '-' + yearRange[1] + ')';
+                if (!payload) {
+                    return ['No data', 'No data', 'No data', 'No data', title];
+                }
+
+                var rows = filterRows(payload, yearRange, zone, drug);
+                if (rows.years.length === 0) {
+                    // No deaths: a rate of 0 over the range's person-years, undefined without any
+                    var emptyRate = payload.population ? populationRate(payload, yearRange, zone, 0) : 0;
+                    return ['0', isNaN(emptyRate) ? 'N/A' : '0.0', 'N/A', 'N/A', title];
+                }
+
+                var totalDeaths = rows.deaths.reduce(function (a, b) { return a + b; }, 0);
+                var avgRate;
+                if (payload.population) {
+                    avgRate = populationRate(payload, yearRange, zone, totalDeaths);
+                } else {
+                    var validRates = rows.rates.filter(function (rate) { return !isNaN(rate); });
+                    avgRate = validRates.reduce(function (a, b) { return a + b; }, 0) / validRates.length;
+                }
+
+                // First year with the highest death count
+                var peakIndex = 0;
+                rows.deaths.forEach(function (deaths, i) {
+                    if (deaths > rows.deaths[peakIndex]) {
+                        peakIndex = i;
+                    }
+                });
+
+                var lastYear = rows.years[rows.years.length - 1];
+                var trend;
+                if (payload.trends) {
+                    trend = recentTrend(payload, yearRange, zone, drug, lastYear);
+                } else {
+                    // Last 3 years vs previous 3 years
+                    var recentYears = sumYears(rows, lastYear - 2, Infinity);
+                    var earlierYears = sumYears(rows, lastYear - 5, lastYear - 2);
+                    if (earlierYears > 0) {
+                        trend = recentYears > earlierYears ? '↑ Increasing' : '↓ Decreasing';
+                    } else {
+                        trend = '→ Stable';
+                    }
+                }
+
+                return [
+                    totalDeaths.toLocaleString('en-US', {maximumFractionDigits: 0}),
+                    isNaN(avgRate) ? 'N/A' : formatFixed(avgRate, 1),
+                    String(rows.years[peakIndex]),
+                    trend,
+                    title
+                ];
+            },
+
+            updateTimeSeries: function (yearRange, zone, drug, granularity, windowMonths, payload) {
+                if (!payload) {
+                    return {data: [], layout: {}};
+                }
+
+                if (granularity && granularity !== 'year') {
+                    return subYearFigure(payload, yearRange, zone, drug, granularity, windowMonths);
+                }
+
+                var rows = filterRows(payload, yearRange, zone, drug);
+                if (rows.years.length === 0) {
+                    return {data: [], layout: {}};
+                }
+
+                return {
+                    data: [{
+                        type: 'scatter',
+                        x: rows.years,
+                        y: rows.deaths,
+                        mode: 'lines+markers',
+                        name: 'Deaths',
+                        line: {color: payload.zone_colors[zone] || '#1f77b4', width: 3},
+                        marker: {size: 8}
+                    }],
+                    layout: {
+                        title: {text: drug + ' Deaths Over Time - ' + zone},
+                        xaxis: {title: {text: 'Year'}},
+                        yaxis: {title: {text: 'Number of Deaths'}},
+                        hovermode: 'x unified',
+                        template: payload.template
+                    }
+                };
+            }
+        }
+    });
+})();
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, ROOT)
+
+import dashboard_data  # noqa: E402
+from query_engine import EXCLUDED_DRUG_CATEGORIES  # noqa: E402
+
+# Row multipliers for the synthetic datasets, e.g. BENCHMARK_SCALES=10,100,1000
+SCALES = [int(scale) for scale in os.environ.get('BENCHMARK_SCALES', '1,10,100').split(',')]
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks are slow; run them with RUN_BENCHMARKS=1 or --benchmark-only
+    if os.environ.get('RUN_BENCHMARKS') == '1' or config.getoption('benchmark_only', False):
+        return
+    skip = pytest.mark.skip(reason='set RUN_BENCHMARKS=1 or pass --benchmark-only')
+    for item in items:
+        if str(item.path).startswith(BENCHMARK_DIR):
+            item.add_marker(skip)
+
+
+def write_scaled_csv(path, scale):
+    """Copy of the fatalities CSV with about ``scale`` times the rows.
+
+    Copy 0 is the real data; every further copy repeats its individual drug
+    types under new names (``Cocaine #2``, ...) in the same zones and years, so
+    "All" drug totals, the drug table and the map sum ``scale`` times as many
+    cells. Aggregated categories are not copied, as they would no longer be
+    recognized as aggregates.
+    """
+    source = pd.read_csv(os.path.join(ROOT, dashboard_data.CSV_PATH), encoding='utf-8-sig')
+    drug_column = 'Drug Type'
+    individual = source[~source[drug_column].isin(EXCLUDED_DRUG_CATEGORIES)]
+
+    source.to_csv(path, index=False, encoding='utf-8-sig')
+    for copy in range(1, scale):
+        chunk = individual.copy()
+        chunk[drug_column] = chunk[drug_column] + f' #{copy + 1}'
+        chunk.to_csv(path, mode='a', header=False, index=False)
+
+
+@pytest.fixture(scope='session')
+def scaled_csv(tmp_path_factory):
+    paths = {}
+
+    def get(scale):
+        if scale not in paths:
+            path = tmp_path_factory.mktemp('data') / f'fatalities_x{scale}.csv'
+            write_scaled_csv(path, scale)
+            paths[scale] = str(path)
+        return paths[scale]
+
+    return get
+
+
+@pytest.fixture(scope='session')
+def geojson_path():
+    return os.path.join(ROOT, dashboard_data.GEOJSON_PATH)
+
+
+@pytest.fixture(params=SCALES, ids=lambda scale: f'x{scale}')
+def scaled_data(request, scaled_csv, geojson_path):
+    """Install a dataset of the requested scale as the dashboard's data."""
+    data = dashboard_data.load_dashboard_data(scaled_csv(request.param), geojson_path, cache_dir='')
+    previous = dashboard_data._data
+    dashboard_data._data = data
+    yield data
+    dashboard_data._data = previous
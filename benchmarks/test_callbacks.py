@@ -0,0 +1,107 @@
+import json
+import tracemalloc
+
+import plotly
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import dashboard  # noqa: E402
+
+YEAR_RANGES = [[2009, 2025], [2016, 2020], [2024, 2025]]
+ZONES = ['Nova Scotia', 'Central']
+DRUGS = ['All', 'Cocaine']
+# Charted circumstance dimension -> (manner it is published for, a filter on it);
+# only the charted dimension's filter applies
+CIRCUMSTANCE_SELECTIONS = {'Place of event': ('All manners', ['Personal residence']),
+                           'Opioids Stimulants Other': ('Accident', ['Opioids and stimulants'])}
+
+# Callback name -> (function, argument grid)
+CALLBACKS = {
+    'update_key_stats': [(year_range, zone, drug) for year_range in YEAR_RANGES for zone in ZONES for drug in DRUGS],
+    'update_time_series': [(year_range, zone, drug, granularity, window)
+                           for year_range in YEAR_RANGES for zone in ZONES for drug in DRUGS
+                           for granularity, window in [('year', 0), ('quarter', 0), ('month', 12)]],
+    'update_zone_comparison': [(year_range, drug) for year_range in YEAR_RANGES for drug in DRUGS],
+    'update_drug_distribution': [(year_range, zone) for year_range in YEAR_RANGES for zone in ZONES],
+    'update_sex_death': [(year_range, drug) for year_range in YEAR_RANGES for drug in DRUGS],
+    'update_trend_ranking': [(year_range,) for year_range in YEAR_RANGES],
+    'update_map': [(year_range, drug) for year_range in YEAR_RANGES for drug in DRUGS],
+    'update_circumstances': [(year_range, zone, dimension, manner) + tuple(
+                                 values if filter_dimension == dimension else []
+                                 for filter_dimension in dashboard.CIRCUMSTANCE_FILTERS)
+                             for year_range in YEAR_RANGES for zone in ZONES
+                             for dimension, (manner, selection) in CIRCUMSTANCE_SELECTIONS.items()
+                             for values in [[], selection]],
+}
+
+
+def uncached(name):
+    # Bypass the figure cache so every round renders the figure
+    func = getattr(dashboard, name)
+    return getattr(func, '__wrapped__', func)
+
+
+def run_grid(func, grid, data):
+    data.query_engine.cache.clear()
+    return [func(*args) for args in grid]
+
+
+def payload_bytes(results):
+    return sum(len(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder)) for result in results)
+
+
+@pytest.mark.parametrize('name', list(CALLBACKS))
+def test_callback_grid(benchmark, scaled_data, name):
+    # Every callback over the year range / zone / drug grid, with cold query caches
+    func, grid = uncached(name), CALLBACKS[name]
+
+    results = benchmark.pedantic(run_grid, args=(func, grid, scaled_data), rounds=5, iterations=1)
+
+    tracemalloc.start()
+    run_grid(func, grid, scaled_data)
+    benchmark.extra_info['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    benchmark.extra_info['calls'] = len(grid)
+    benchmark.extra_info['json_bytes'] = payload_bytes(results)
+
+
+@pytest.mark.parametrize('name', ['update_time_series', 'update_map'])
+def test_figure_serialization(benchmark, scaled_data, name):
+    # JSON encoding cost and size of a rendered figure
+    figure = uncached(name)(*CALLBACKS[name][0])
+
+    serialized = benchmark(figure.to_json)
+    benchmark.extra_info['json_bytes'] = len(serialized)
+
+
+def minimized_sizes(func, grid, trim):
+    import plotly.graph_objects as go
+
+    from figure_payload import payload_sizes, trim_floats
+
+    totals = {}
+    for args in grid:
+        result = func(*args)
+        if trim and isinstance(result, go.Figure):
+            result = trim_floats(result)
+        for encoding, size in payload_sizes(result).items():
+            totals[encoding] = totals.get(encoding, 0) + size
+    return totals
+
+
+@pytest.mark.parametrize('name', list(CALLBACKS))
+def test_callback_payload_minimization(benchmark, scaled_data, name):
+    # Response bytes before (plotly_white inlined, full-precision floats) and
+    # after the slim template and float trimming, raw and compressed
+    from figure_payload import unminimized
+
+    func, grid = uncached(name), CALLBACKS[name]
+    with unminimized():
+        before = minimized_sizes(func, grid, trim=False)
+    after = benchmark.pedantic(minimized_sizes, args=(func, grid, True), rounds=1, iterations=1)
+
+    for encoding in after:
+        benchmark.extra_info[f'before_{encoding}_bytes'] = before[encoding]
+        benchmark.extra_info[f'after_{encoding}_bytes'] = after[encoding]
+    assert after['json'] <= before['json']
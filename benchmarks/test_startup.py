@@ -0,0 +1,93 @@
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+import dashboard_data  # noqa: E402
+from data_loader import ingest_fatalities, load_fatalities  # noqa: E402
+from conftest import SCALES  # noqa: E402
+from data_cube import DataCube  # noqa: E402
+
+
+def test_scaled_data_grows_inside_the_real_zones(scaled_csv):
+    # Larger scales must give callbacks more cells to read, not just more rows to parse
+    counts = {}
+    for scale in sorted(set(SCALES) | {1}):
+        df = load_fatalities(scaled_csv(scale))
+        counts[scale] = len(df), len(DataCube(df))
+        assert set(df['Health Zone of Residence'].unique()) == set(
+            load_fatalities(scaled_csv(1))['Health Zone of Residence'].unique())
+    for scale in SCALES:
+        if scale > 1:
+            assert counts[scale][0] > 0.75 * scale * counts[1][0]
+            assert counts[scale][1] > 0.75 * scale * counts[1][1]
+
+
+def load_with_peak_memory(csv_path, geojson_path, cache_dir):
+    tracemalloc.start()
+    try:
+        data = dashboard_data.load_dashboard_data(csv_path, geojson_path, cache_dir=cache_dir)
+        return data, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('scale', SCALES, ids=lambda scale: f'x{scale}')
+def test_cold_startup(benchmark, scaled_csv, geojson_path, scale):
+    # CSV parse, GeoJSON simplification, cube and query engine, without the disk cache
+    csv_path = scaled_csv(scale)
+    data, peak = benchmark.pedantic(
+        load_with_peak_memory, args=(csv_path, geojson_path, ''), rounds=3, iterations=1
+    )
+    benchmark.extra_info['rows'] = len(data.df)
+    benchmark.extra_info['peak_memory_bytes'] = peak
+
+
+@pytest.mark.parametrize('scale', SCALES, ids=lambda scale: f'x{scale}')
+def test_warm_cache_startup(benchmark, scaled_csv, geojson_path, tmp_path, scale):
+    # Same load once the binary cache artifacts exist
+    csv_path = scaled_csv(scale)
+    dashboard_data.load_dashboard_data(csv_path, geojson_path, cache_dir=str(tmp_path))
+    data, peak = benchmark.pedantic(
+        load_with_peak_memory, args=(csv_path, geojson_path, str(tmp_path)), rounds=3, iterations=1
+    )
+    benchmark.extra_info['rows'] = len(data.df)
+    benchmark.extra_info['peak_memory_bytes'] = peak
+
+
+def parse_with_peak_memory(parse, csv_path):
+    tracemalloc.start()
+    try:
+        df = parse(csv_path)
+        return df, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize('scale', SCALES, ids=lambda scale: f'x{scale}')
+@pytest.mark.parametrize('mode', ['read', 'stream'])
+def test_csv_ingest(benchmark, scaled_csv, scale, mode):
+    # Whole-file read vs chunked streaming into the cube totals
+    parse = load_fatalities if mode == 'read' else lambda path: ingest_fatalities(path, chunksize=50000)
+    df, peak = benchmark.pedantic(parse_with_peak_memory, args=(parse, scaled_csv(scale)), rounds=3, iterations=1)
+    benchmark.extra_info['rows'] = len(df)
+    benchmark.extra_info['peak_memory_bytes'] = peak
+
+
+@pytest.mark.parametrize('points', [100000, 1000000], ids=lambda points: f'{points // 1000}k')
+def test_zone_assignment(benchmark, geojson_path, points):
+    # Point-in-zone assignment of random points over the province's bounding box
+    import json
+
+    import numpy as np
+    from spatial_index import ZoneIndex
+
+    with open(geojson_path, 'r') as f:
+        index = ZoneIndex(json.load(f))
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(-66.5, -59.5, points), rng.uniform(43.3, 47.1, points)
+    benchmark.pedantic(index.assign, args=(lon, lat), rounds=3, iterations=1)
+    # No timings with --benchmark-disable
+    if benchmark.stats is not None:
+        benchmark.extra_info['points_per_minute'] = points / benchmark.stats.stats.mean * 60
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def _pack(mask):
+    # Row mask -> bitset of 64-bit words (bit i of the set is row i)
+    words = (len(mask) + 63) // 64
+    padded = np.zeros(words * 64, dtype=bool)
+    padded[:len(mask)] = mask
+    return np.packbits(padded, bitorder='little').view(np.uint64)
+
+
+class BitmapIndex:
+    """Inverted index over low-cardinality columns: one bitset per value.
+
+    A selection maps each column to the values it may take (``None`` or an
+    empty list for any value); matching rows are the AND over columns of the
+    OR of the selected values' bitsets. Every step is a word-wise operation on
+    ``len(df) / 64`` integers, so adding a filter dimension costs one more AND
+    instead of another comparison over every row.
+    """
+
+    def __init__(self, df, columns):
+        import pandas as pd
+
+        self.df = df
+        self.rows = len(df)
+        self.words = (self.rows + 63) // 64
+        # column -> {value: bitset}
+        self.bitsets = {}
+        # column -> bitset of rows with any (non-missing) value
+        self.present = {}
+
+        for column in columns:
+            if column not in df.columns:
+                continue
+            codes, values = pd.factorize(df[column], sort=True)
+            # Group row positions by value code in one sort instead of one pass per value
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            bitsets = {}
+            for i, value in enumerate(values):
+                mask = np.zeros(self.rows, dtype=bool)
+                mask[order[bounds[i]:bounds[i + 1]]] = True
+                bitsets[value.item() if isinstance(value, np.generic) else value] = _pack(mask)
+            self.bitsets[column] = bitsets
+            self.present[column] = _pack(codes >= 0)
+
+    def values(self, column):
+        return list(self.bitsets.get(column, {}))
+
+    def bitset(self, column, values):
+        # Rows whose ``column`` is any of ``values``
+        bits = np.zeros(self.words, dtype=np.uint64)
+        for value in values:
+            value_bits = self.bitsets.get(column, {}).get(value)
+            if value_bits is not None:
+                bits |= value_bits
+        return bits
+
+    def select(self, selections, require=()):
+        """Bitset of the rows matching every selection that restricts its column,
+        and having a value in every column of ``require``."""
+        bits = _pack(np.ones(self.rows, dtype=bool))
+        for column in require:
+            bits &= self.present.get(column, np.zeros(self.words, dtype=np.uint64))
+        for column, values in selections.items():
+            if values:
+                bits &= self.bitset(column, values)
+        return bits
+
+    def positions(self, bits):
+        # Row positions set in ``bits``
+        return np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder='little', count=self.rows))
+
+    def count(self, bits):
+        return len(self.positions(bits))
+
+    def take(self, bits, columns=None):
+        rows = self.df.iloc[self.positions(bits)]
+        return rows if columns is None else rows[columns]
@@ -0,0 +1,102 @@
+import base64
+
+import numpy as np
+
+import figure_payload
+
+
+def encode_array(values, dtype):
+    # Little-endian typed array bytes, base64 encoded for JSON transport
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': np.dtype(dtype).name, 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def encode_time_series(time_series):
+    # Raw (drug x period) death matrices and populations; the browser derives
+    # the moving totals itself
+    from time_series import GRANULARITIES
+
+    encoded = {}
+    for (granularity, zone), series in time_series.series.items():
+        encoded.setdefault(granularity, {})[zone] = {
+            'months_per_period': GRANULARITIES[granularity],
+            'labels': series['labels'],
+            'drugs': series['drugs'],
+            'years': encode_array(series['years'], 'int16'),
+            'population': encode_array(series['population'], 'float32'),
+            'deaths': encode_array(series['deaths'].ravel(), 'float32')
+        }
+    return encoded
+
+
+def encode_population(population):
+    # Population per (zone, year), row-major over the index's zones, for rates as
+    # Σdeaths / Σpopulation
+    return {
+        'zones': list(population.zone_codes),
+        'first_year': population.first_year,
+        'years': population.population.shape[1],
+        'values': encode_array(population.population.ravel(), 'float64')
+    }
+
+
+def encode_trends(trends, zones, drugs):
+    # Recent Trend card text of every (zone, drug, window end, window length), as
+    # codes into a list of the distinct texts; "All" is drug 0
+    windows = [trends.window_labels(zone, drug) for zone in zones for drug in ['All'] + list(drugs)]
+    labels, codes = np.unique(np.concatenate([window.ravel() for window in windows]).astype(str),
+                              return_inverse=True)
+    return {
+        'first_year': trends.first_year,
+        'years': trends.year_count,
+        'recent_years': trends.recent_years,
+        'labels': labels.tolist(),
+        'codes': encode_array(codes, 'uint8' if len(labels) <= 256 else 'uint16')
+    }
+
+
+def build_clientside_payload(cube, zones, drugs, zone_colors, time_series=None, population=None,
+                             trends=None):
+    """Compact columnar copy of the yearly totals used by the clientside callbacks.
+
+    Years, frequencies and rates are shipped as base64 typed arrays; zones and
+    drugs are dictionary-encoded as small integer codes into ``zones``/``drugs``.
+    Only individual drug types are included, so "All" is simply every drug code.
+    Quarterly and monthly series from ``time_series`` and the yearly zone
+    populations from ``population`` (a PopulationIndex) are added when given, as
+    are the Recent Trend card texts of ``trends`` (a TrendIndex).
+    """
+    years, frequencies, rates, zone_codes, drug_codes = [], [], [], [], []
+
+    for zone_code, zone in enumerate(zones):
+        for drug_code, drug in enumerate(drugs):
+            cell = cube.cells.get((zone, drug, 'Total', 'All manners', 'All'))
+            if cell is None:
+                continue
+            years.append(cell['Year'].to_numpy())
+            frequencies.append(cell['Frequency'].to_numpy())
+            rates.append(cell['Rate'].to_numpy())
+            zone_codes.append(np.full(len(cell), zone_code))
+            drug_codes.append(np.full(len(cell), drug_code))
+
+    def column(parts, dtype):
+        return encode_array(np.concatenate(parts) if parts else np.empty(0), dtype)
+
+    return {
+        'zones': list(zones),
+        'drugs': list(drugs),
+        'zone_colors': zone_colors,
+        'template': figure_payload.register_template().to_plotly_json(),
+        # Rates are rounded as the server rounds its figures (see figure_payload.trim_floats)
+        'float_decimals': figure_payload.FLOAT_DECIMALS,
+        'columns': {
+            'year': column(years, 'int16'),
+            'frequency': column(frequencies, 'int32'),
+            'rate': column(rates, 'float32'),
+            'zone': column(zone_codes, 'uint8'),
+            'drug': column(drug_codes, 'uint8')
+        },
+        'time_series': encode_time_series(time_series) if time_series is not None else {},
+        'population': encode_population(population) if population is not None else None,
+        'trends': encode_trends(trends, zones, drugs) if trends is not None else None
+    }
@@ -0,0 +1,120 @@
+import gzip
+
+import flask
+
+from query_engine import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text responses worth compressing (callback JSON, the page, Dash's JS bundles)
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/html',
+    'text/css',
+    'text/plain'
+}
+
+
+# Encodings a compressed response's ETag is suffixed with ("<tag>-gzip")
+ETAG_ENCODINGS = ('br', 'gzip')
+
+
+def encoded_etag(tag, encoding):
+    return f'{tag}-{encoding}'
+
+
+def matching_etag(tag, if_none_match):
+    """The form of ``tag`` (plain or per encoding) listed in ``if_none_match``, or None."""
+    for candidate in [tag] + [encoded_etag(tag, encoding) for encoding in ETAG_ENCODINGS]:
+        if if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def choose_encoding(accept_encoding, available):
+    """Best of ``available`` (in order of preference) that ``accept_encoding`` allows."""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in available:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def not_modified(response):
+    # 304 with the validators and caching headers of the full response
+    result = flask.Response(status=304)
+    for header in ('ETag', 'Cache-Control', 'Expires', 'Vary', 'Last-Modified'):
+        if header in response.headers:
+            result.headers[header] = response.headers[header]
+    return result
+
+
+class ResponseCompression:
+    """Compresses responses with brotli (if installed) or gzip, per Accept-Encoding.
+
+    Responses under ``min_size`` bytes, streamed files and non-text types are
+    sent as they are. Static bundles (with an ETag or a long max-age) are
+    compressed once per encoding and reused from a small LRU. The uncompressed size is left
+    in ``flask.g.response_uncompressed_bytes`` for the metrics hook.
+    """
+
+    def __init__(self, min_size=500, gzip_level=6, brotli_quality=5, cache_size=64):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = (['br'] if brotli is not None else []) + ['gzip']
+        self.cache = LRUCache(maxsize=cache_size)
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def process(self, response):
+        if (response.direct_passthrough or response.is_streamed or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(flask.request.headers.get('Accept-Encoding', ''), self.encodings)
+        data = response.get_data()
+        flask.g.response_uncompressed_bytes = len(data)
+        if encoding is None or len(data) < self.min_size:
+            return response
+
+        # Static bundles (ETag or long max-age) are compressed once per encoding
+        tag, weak = response.get_etag()
+        reusable = tag is not None or bool(response.cache_control.max_age)
+        key = (flask.request.full_path, tag, encoding)
+        compressed = self.cache.get(key) if reusable else None
+        if compressed is None:
+            compressed = self.compress(data, encoding)
+            if reusable:
+                self.cache.put(key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if tag is not None:
+            # Each encoding is a different representation, so it gets its own ETag. The
+            # view only knows the plain tag, so revalidations of this one are answered here
+            response.set_etag(encoded_etag(tag, encoding), weak)
+            if flask.request.if_none_match.contains_weak(encoded_etag(tag, encoding)):
+                return not_modified(response)
+        return response
+
+    def register(self, server):
+        server.after_request(self.process)
@@ -1,79 +1,80 @@
 import dash
-from dash import dcc, html, Input, Output
-import plotly.express as px
+from dash import dcc, html, dash_table, Input, Output, State, ClientsideFunction, Patch
 import plotly.graph_objects as go
-import pandas as pd
 # import geopandas as gpd
 # import folium
 # from folium import plugins
-import json
+import functools
+import os
+import flask
 import dash_bootstrap_components as dbc
-from datetime import datetime
 import numpy as np
+import data_refresh
+from api import api
+from dashboard_data import get_data, peek_data
+from compression import ResponseCompression
+from figure_cache import FigureCache
+from figure_payload import TEMPLATE_NAME, register_template, trim_floats
+from metrics import CallbackMetrics
+from tile_cache import basemap_layout, tiles
+from time_series import ROLLING_WINDOWS
 
-# Initialize the Dash app with Bootstrap theme
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-app.title = "Nova Scotia Substance-Related Fatalities Dashboard"
-
-# Load CSV data
-try:
-    df = pd.read_csv('Numbers_and_rates_of_substance-related_fatalities_in_Nova_Scotia.csv', encoding='utf-8-sig')
-    print("CSV loaded successfully")
-    print(f"Columns: {df.columns.tolist()}")
-    print(f"Shape: {df.shape}")
-except Exception as e:
-    print(f"Error loading CSV: {e}")
-    df = pd.DataFrame()
-
-# Load GeoJSON data
-try:
-    with open('Nova Scotia Health Authority Management Zones.geojson', 'r') as f:
-        geojson_data = json.load(f)
-    # gdf = gpd.read_file('Nova Scotia Health Authority Management Zones.geojson')
-    print("GeoJSON loaded successfully")
-    print(f"GeoJSON features: {len(geojson_data['features'])}")
-except Exception as e:
-    print(f"Error loading GeoJSON: {e}")
-    geojson_data = None
-    # gdf = gpd.GeoDataFrame()
-
-# Data preprocessing
-if not df.empty:
-    # Clean column names
-    df.columns = df.columns.str.strip()
-    
-    # Handle the rate column with special characters
-    rate_col = 'Rate per 100,000 population (annualized for quarterly data)'
-    if rate_col in df.columns:
-        df['Rate'] = pd.to_numeric(df[rate_col], errors='coerce')
-    
-    # Convert Year to numeric
-    df['Year'] = pd.to_numeric(df['Year'], errors='coerce')
-    df['Frequency'] = pd.to_numeric(df['Frequency'], errors='coerce')
-    
-    # Filter out rows with missing essential data
-    df = df.dropna(subset=['Year', 'Health Zone of Residence'])
-    
-    # Get unique values for filters
-    health_zones = sorted([zone for zone in df['Health Zone of Residence'].unique() 
-                          if zone in ['Central', 'Eastern', 'Northern', 'Western', 'Nova Scotia']])
-    
-    # Get drug types and exclude aggregated categories
-    excluded_drug_categories = [
-        'Opioid - total',
-        'Total - all substances', 
-        'Nonpharmaceutical drug (any)'
-    ]
-    all_drug_types = df['Drug Type'].unique()
-    individual_drug_types = sorted([drug for drug in all_drug_types if drug not in excluded_drug_categories])
-    
-    # Add "All" option at the beginning
-    drug_types = ['All'] + individual_drug_types
-    years = sorted(df['Year'].unique())
-    
-    print(f"Health Zones: {health_zones}")
-    print(f"Years range: {min(years)} - {max(years)}")
-    print(f"Drug Types: {len(drug_types)}")
+# Data is loaded on first use (see dashboard_data.get_data and warmup), so importing
+# this module stays cheap; pandas and plotly.express are only imported when needed
+
+# Run key statistics and the time series in the browser from a preloaded payload
+CLIENTSIDE_CALLBACKS = os.environ.get('DASHBOARD_CLIENTSIDE', '0') == '1'
+
+# Send the map geometry once with the layout and only patch values on updates
+MAP_PATCH_UPDATES = os.environ.get('DASHBOARD_MAP_PATCH', '0') == '1'
+
+# Map basemap: 'osm' (openstreetmap.org tiles), 'local' (pre-seeded tiles served by
+# this app, see tile_cache.py) or 'blank' (zone polygons only, no tile requests)
+MAP_BASEMAP = os.environ.get('DASHBOARD_BASEMAP', 'osm')
+
+# Figures name a slim template registered once with plotly.io instead of plotly_white,
+# and their float arrays are rounded to FIGURE_FLOAT_DECIMALS places when cached
+register_template()
+
+# Run the slow views (map, circumstance drill-down) as background callbacks in a
+# separate process, cancelled when the year slider moves again
+BACKGROUND_CALLBACKS = os.environ.get('DASHBOARD_BACKGROUND', '0') == '1'
+BACKGROUND_CACHE_DIR = os.environ.get('DASHBOARD_BACKGROUND_DIR') or os.path.join('.cache', 'background')
+
+# Serialized figures keyed by filter state (FIGURE_CACHE_DIR shares them across workers)
+figure_cache = FigureCache.from_env()
+figure_cache.transform = trim_floats
+
+# Poll the CSV every DATA_WATCH_INTERVAL seconds and swap in new releases (0 disables);
+# open pages check for a new data version just as often
+DATA_WATCH_INTERVAL = float(os.environ.get('DATA_WATCH_INTERVAL', 0))
+
+# Figures are cached per data version; a refresh carries the unaffected ones over
+figure_cache.version = lambda: get_data().version
+
+def carry_over_figures(refresh):
+    # Every cached view takes the year range as its first argument
+    figure_cache.carry_over(refresh.old_version, refresh.new_version, lambda key: refresh.is_stale(key[1]))
+
+data_refresh.refresh_listeners.append(carry_over_figures)
+
+# Per-callback latency, phase, payload and cache metrics served at /metrics
+# (METRICS_PROFILE_PERCENT runs that share of callback calls under cProfile)
+METRICS_ENABLED = os.environ.get('DASHBOARD_METRICS', '1') == '1'
+
+# JSON/CSV query API for other tools, with ETags tied to the data version
+API_ENABLED = os.environ.get('DASHBOARD_API', '1') == '1'
+
+# gzip (or brotli, if installed) compression of callback responses, the page and Dash's bundles
+COMPRESSION_ENABLED = os.environ.get('DASHBOARD_COMPRESSION', '1') == '1'
+
+# Rows in the fastest-rising series ranking
+TREND_RANKING_SIZE = int(os.environ.get('TREND_RANKING_SIZE', 15))
+
+callback_metrics = CallbackMetrics.from_env()
+callback_metrics.caches['figure'] = figure_cache.info
+# Reported once the data is loaded; scraping never loads it
+callback_metrics.caches['query'] = lambda: peek_data().query_engine.cache_info() if peek_data() else None
 
 # Define colors for health zones
 zone_colors = {
@@ -84,281 +85,466 @@ zone_colors = {
     'Nova Scotia': '#9467bd'
 }
 
-# App layout
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col([
-            html.H1("Nova Scotia Substance-Related Fatalities Dashboard", 
-                   className="text-center mb-4",
-                   style={'color': '#2c3e50', 'margin-top': '20px'}),
-            html.P("Interactive visualization of substance-related fatalities in Nova Scotia health zones (2009-2025)",
-                  className="text-center text-muted mb-4")
-        ])
-    ]),
-    
-    # Main layout with sidebar
-    dbc.Row([
-        # Left sidebar - Control Panel
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Control Panel", style={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}),
-                dbc.CardBody([
-                    html.Label("Year Range:", className="font-weight-bold mb-2"),
-                    dcc.RangeSlider(
-                        id='year-slider',
-                        min=min(years) if years else 2009,
-                        max=max(years) if years else 2025,
-                        value=[min(years) if years else 2009, max(years) if years else 2025],
-                        marks={year: str(year) for year in range(min(years) if years else 2009, 
-                                                               max(years) + 1 if years else 2026, 3)},
-                        step=1,
-                        vertical=False
-                    ),
-                    html.Hr(),
+# Circumstances of death (row-level dimensions answered by the bitmap index) and
+# the sidebar dropdown filtering each of them
+CIRCUMSTANCE_FILTERS = {
+    'Living Situation': 'living-situation-filter',
+    'Place of event': 'place-of-event-filter',
+    'Others present/aware': 'others-present-filter',
+    'Opioids Stimulants Other': 'opioids-stimulants-filter'
+}
+
+def zone_map_values(zone_data):
+    # Choropleth locations, z values and hover text for the four health zones
+    zone_name_mapping = {
+        'Central': 'Central',
+        'Eastern': 'Eastern', 
+        'Northern': 'Northern',
+        'Western': 'Western'
+    }
+    
+    zone_data = zone_data[zone_data['Health Zone of Residence'].isin(list(zone_name_mapping))]
+    zone_names = zone_data['Health Zone of Residence'].astype(str)
+    
+    # Build the hover labels column-wise rather than row by row
+    hover_text = (
+        "<b>" + zone_names + "</b><br>Total Deaths: " + zone_data['Frequency'].astype(str)
+        + "<br>Rate per 100k: " + np.char.mod('%.1f', zone_data['Rate'].to_numpy(dtype=float))
+    )
+    
+    return (
+        zone_names.map(zone_name_mapping).tolist(),
+        zone_data['Rate'].tolist(),
+        hover_text.tolist()
+    )
+
+def virtualized_table(table_id, frame, columns, height='330px'):
+    """DataTable that renders only the visible rows, for tables of any length.
+
+    ``columns`` maps frame columns to DataTable column definitions (name, type,
+    format); rows are passed as records without a per-row Python loop.
+    """
+    return dash_table.DataTable(
+        id=table_id,
+        columns=[dict(id=column_id, **column) for column_id, column in columns.items()],
+        data=frame[list(columns)].to_dict('records'),
+        virtualization=True,
+        fixed_rows={'headers': True},
+        page_action='none',
+        sort_action='native',
+        style_table={'height': height, 'overflowY': 'auto'},
+        style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'},
+        style_cell={'textAlign': 'center', 'fontSize': '0.9rem', 'minWidth': '60px'},
+        style_cell_conditional=[{'if': {'column_id': 'Drug Type'}, 'textAlign': 'left', 'width': '45%'}],
+        style_data_conditional=[{'if': {'row_index': 'odd'}, 'backgroundColor': '#f8f9fa'}]
+    )
+
+# Placeholder for views without data, on the same slim template as the charts
+def empty_figure():
+    return go.Figure(layout={'template': TEMPLATE_NAME})
+
+def build_map_figure(geojson_data, locations, z_values, hover_text, title):
+    # Create choropleth figure
+    fig = go.Figure(go.Choroplethmapbox(
+        geojson=geojson_data,
+        locations=locations,
+        z=z_values,
+        colorscale='YlOrRd',
+        hovertemplate='%{hovertext}<extra></extra>',
+        hovertext=hover_text,
+        marker_opacity=0.7,
+        marker_line_width=1,
+        featureidkey="properties.name"
+    ))
+    
+    fig.update_layout(
+        **basemap_layout(MAP_BASEMAP),
+        mapbox=dict(
+            center=go.layout.mapbox.Center(lat=45.0, lon=-63.0),
+            zoom=6
+        ),
+        margin={"r":0,"t":0,"l":0,"b":0},
+        title=title,
+        title_x=0.5,
+        template=TEMPLATE_NAME
+    )
+    
+    return fig
+
+def map_title(selected_drug, year_range):
+    return f'{selected_drug} Rate per 100k Population ({year_range[0]}-{year_range[1]})'
+
+@functools.lru_cache(maxsize=1)
+def initial_map_figure(data):
+    # In patch mode the layout carries the full map (geometry included) for the default filters
+    if not MAP_PATCH_UPDATES or data.df.empty or data.geojson_data is None:
+        return {'data': [], 'layout': {}}
+    
+    year_range = [min(data.years), max(data.years)]
+    default_zone_data = data.query_engine.aggregate(
+        year_range, ['Central', 'Eastern', 'Northern', 'Western'], 'All', 'Health Zone of Residence'
+    )
+    return build_map_figure(
+        data.geojson_data, *zone_map_values(default_zone_data), map_title('All', year_range)
+    )
+
+def year_marks(years):
+    return {year: str(year) for year in range(min(years), max(years) + 1, 3)}
+
+# App layout (a function, so Dash builds it per page load and data loads on first use)
+def build_layout():
+    # Dash also calls this once at startup, outside any request, to validate the
+    # callback ids; that pass only needs the components, so it skips the data
+    if flask.has_request_context():
+        data = get_data()
+        years, health_zones, drug_types = data.years, data.health_zones, data.drug_types
+        circumstance_values = data.circumstance_values
+        data_version = data.version
+        map_figure = initial_map_figure(data)
+        clientside_data = data.clientside_payload(zone_colors) if CLIENTSIDE_CALLBACKS else None
+    else:
+        years, health_zones, drug_types = [], [], ['All']
+        circumstance_values = {dimension: [] for dimension in CIRCUMSTANCE_FILTERS}
+        map_figure = {'data': [], 'layout': {}}
+        clientside_data = None
+        data_version = None
+    
+    return dbc.Container([
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.H1("Nova Scotia Substance-Related Fatalities Dashboard", 
+                       className="text-center mb-4",
+                       style={'color': '#2c3e50', 'margin-top': '20px'}),
+                html.P("Interactive visualization of substance-related fatalities in Nova Scotia health zones (2009-2025)",
+                      className="text-center text-muted mb-4")
+            ])
+        ]),
+    
+        # Main layout with sidebar
+        dbc.Row([
+            # Left sidebar - Control Panel
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Control Panel", style={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}),
+                    dbc.CardBody([
+                        html.Label("Year Range:", className="font-weight-bold mb-2"),
+                        dcc.RangeSlider(
+                            id='year-slider',
+                            min=min(years) if years else 2009,
+                            max=max(years) if years else 2025,
+                            value=[min(years) if years else 2009, max(years) if years else 2025],
+                            marks=year_marks(years) if years else {year: str(year) for year in range(2009, 2026, 3)},
+                            step=1,
+                            vertical=False
+                        ),
+                        html.Hr(),
                     
-                    html.Label("Health Zone:", className="font-weight-bold mb-2"),
-                    dcc.Dropdown(
-                        id='zone-dropdown',
-                        options=[{'label': zone, 'value': zone} for zone in health_zones],
-                        value='Nova Scotia',
-                        clearable=False,
-                        className="mb-3"
-                    ),
+                        html.Label("Health Zone:", className="font-weight-bold mb-2"),
+                        dcc.Dropdown(
+                            id='zone-dropdown',
+                            options=[{'label': zone, 'value': zone} for zone in health_zones],
+                            value='Nova Scotia',
+                            clearable=False,
+                            className="mb-3"
+                        ),
                     
-                    html.Label("Drug Type:", className="font-weight-bold mb-2"),
-                    dcc.Dropdown(
-                        id='drug-dropdown',
-                        options=[{'label': drug, 'value': drug} for drug in drug_types],
-                        value='All',
-                        clearable=False,
-                        className="mb-3"
-                    )
-                ], style={'padding': '20px'})
-            ], style={'position': 'sticky', 'top': '20px'})
-        ], width=3, className="mb-4"),
+                        html.Label("Drug Type:", className="font-weight-bold mb-2"),
+                        dcc.Dropdown(
+                            id='drug-dropdown',
+                            options=[{'label': drug, 'value': drug} for drug in drug_types],
+                            value='All',
+                            clearable=False,
+                            className="mb-3"
+                        ),
+                        html.Hr(),
+                    
+                        html.Label("Time Granularity:", className="font-weight-bold mb-2"),
+                        dcc.RadioItems(
+                            id='granularity-radio',
+                            options=[{'label': label, 'value': value} for label, value in
+                                     [('Year', 'year'), ('Quarter', 'quarter'), ('Month', 'month')]],
+                            value='year',
+                            inline=True,
+                            inputStyle={'margin-right': '5px', 'margin-left': '10px'},
+                            className="mb-3"
+                        ),
+                    
+                        html.Label("Rolling Window (quarter/month):", className="font-weight-bold mb-2"),
+                        dcc.RadioItems(
+                            id='rolling-window-radio',
+                            options=[{'label': 'Off', 'value': 0}] +
+                                    [{'label': f'{window} mo', 'value': window} for window in ROLLING_WINDOWS],
+                            value=0,
+                            inline=True,
+                            inputStyle={'margin-right': '5px', 'margin-left': '10px'}
+                        ),
+                        html.Hr(),
+                    
+                        html.Label("Circumstance Filters:", className="font-weight-bold mb-2"),
+                        *[html.Div([
+                            html.Small(dimension, className="text-muted"),
+                            dcc.Dropdown(
+                                id=filter_id,
+                                options=[{'label': value, 'value': value} for value in circumstance_values[dimension]],
+                                value=[],
+                                multi=True,
+                                placeholder="Any",
+                                disabled=dimension != 'Place of event'
+                            )
+                        ], className="mb-2") for dimension, filter_id in CIRCUMSTANCE_FILTERS.items()]
+                    ], style={'padding': '20px'})
+                ], style={'position': 'sticky', 'top': '20px'})
+            ], width=3, className="mb-4"),
         
-        # Right content area
-        dbc.Col([
-    
-    # Key Statistics Title
-    dbc.Row([
-        dbc.Col([
-            html.H3(id="key-stats-title", className="text-center mb-3", 
-                   style={'color': '#2c3e50', 'fontWeight': 'bold'})
-        ], width=12)
-    ], className="mb-3"),
-    
-    # Key Statistics Cards
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="total-deaths", className="text-primary"),
-                    html.P("Total Deaths", className="mb-0")
+            # Right content area
+            dbc.Col([
+    
+        # Key Statistics Title
+        dbc.Row([
+            dbc.Col([
+                html.H3(id="key-stats-title", className="text-center mb-3", 
+                       style={'color': '#2c3e50', 'fontWeight': 'bold'})
+            ], width=12)
+        ], className="mb-3"),
+    
+        # Key Statistics Cards
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="total-deaths", className="text-primary"),
+                        html.P("Total Deaths", className="mb-0")
+                    ])
                 ])
-            ])
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="avg-rate", className="text-success"),
-                    html.P("Average Rate per 100k", className="mb-0")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="avg-rate", className="text-success"),
+                        html.P("Average Rate per 100k", className="mb-0")
+                    ])
                 ])
-            ])
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="peak-year", className="text-warning"),
-                    html.P("Peak Year", className="mb-0")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="peak-year", className="text-warning"),
+                        html.P("Peak Year", className="mb-0")
+                    ])
                 ])
-            ])
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="trend-direction", className="text-info"),
-                    html.P("Recent Trend", className="mb-0")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="trend-direction", className="text-info"),
+                        html.P("Recent Trend", className="mb-0")
+                    ])
                 ])
-            ])
-        ], width=3),
-    ], className="mb-4"),
-    
-    # Main Charts Row 1
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Time Series - Deaths by Year"),
-                dbc.CardBody([
-                    dcc.Graph(id='time-series-chart', style={'height': '400px'})
+            ], width=3),
+        ], className="mb-4"),
+    
+        # Main Charts Row 1
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Time Series - Deaths by Year"),
+                    dbc.CardBody([
+                        dcc.Graph(id='time-series-chart', style={'height': '400px'})
+                    ])
                 ])
-            ])
-        ], width=6),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Health Zone Comparison"),
-                dbc.CardBody([
-                    dcc.Graph(id='zone-comparison-chart', style={'height': '400px'})
+            ], width=6),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Health Zone Comparison"),
+                    dbc.CardBody([
+                        dcc.Graph(id='zone-comparison-chart', style={'height': '400px'})
+                    ])
                 ])
-            ])
-        ], width=6),
-    ], className="mb-4"),
-    
-    # Main Charts Row 2
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Drug Type Distribution"),
-                dbc.CardBody([
-                    html.Div(id='drug-distribution-table', style={'height': '400px', 'overflow-y': 'auto'})
+            ], width=6),
+        ], className="mb-4"),
+    
+        # Main Charts Row 2
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Drug Type Distribution"),
+                    dbc.CardBody([
+                        html.Div(id='drug-distribution-table', style={'height': '400px', 'overflow-y': 'auto'})
+                    ])
+                ])
+            ], width=6),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Sex of Death Analysis"),
+                    dbc.CardBody([
+                        dcc.Graph(id='sex-death-chart', style={'height': '400px'})
+                    ])
+                ])
+            ], width=6),
+        ], className="mb-4"),
+    
+        # Fastest-rising series (trend fits of every zone, drug and sex)
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Fastest-Rising Series"),
+                    dbc.CardBody([
+                        html.Div(id='trend-ranking-table', style={'height': '400px', 'overflow-y': 'auto'})
+                    ])
                 ])
             ])
-        ], width=6),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Sex of Death Analysis"),
-                dbc.CardBody([
-                    dcc.Graph(id='sex-death-chart', style={'height': '400px'})
+        ], className="mb-4"),
+    
+        # Circumstances of Death
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Circumstances of Death"),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='circumstance-dimension-dropdown',
+                                    options=[{'label': dimension, 'value': dimension} for dimension in CIRCUMSTANCE_FILTERS],
+                                    value='Place of event',
+                                    clearable=False
+                                )
+                            ], width=6),
+                            dbc.Col([
+                                dcc.RadioItems(
+                                    id='circumstance-manner-radio',
+                                    options=[{'label': manner, 'value': manner} for manner in
+                                             ['All manners', 'Accident', 'Suicide']],
+                                    value='All manners',
+                                    inline=True,
+                                    inputStyle={'margin-right': '5px', 'margin-left': '10px'}
+                                )
+                            ], width=6)
+                        ], className="mb-2"),
+                        dcc.Graph(id='circumstances-chart', style={'height': '400px'})
+                    ])
                 ])
             ])
-        ], width=6),
-    ], className="mb-4"),
-    
-    # Geographic Visualization
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader(id="map-header", children="Geographic Distribution - Choropleth Map"),
-                dbc.CardBody([
-                    dcc.Graph(id='map', style={'height': '700px'})
+        ], className="mb-4"),
+    
+        # Geographic Visualization
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader(id="map-header", children="Geographic Distribution - Choropleth Map"),
+                    dbc.CardBody([
+                        dcc.Graph(id='map', figure=map_figure, style={'height': '700px'})
+                    ])
                 ])
             ])
-        ])
-    ], className="mb-4"),
-        ], width=9)  # Close right content column
-    ])  # Close main row
+        ], className="mb-4"),
+            ], width=9)  # Close right content column
+        ]),  # Close main row
     
-], fluid=True)
+        # Columnar data for the clientside callbacks, shipped once with the page
+        dcc.Store(
+            id='clientside-data',
+            data=clientside_data
+        ),
+    
+        # Data version this page was built from, checked for newer releases
+        dcc.Store(id='data-version', data=data_version),
+        dcc.Interval(
+            id='data-refresh-interval',
+            interval=max(DATA_WATCH_INTERVAL, 1) * 1000,
+            disabled=DATA_WATCH_INTERVAL <= 0
+        )
+    
+    ], fluid=True)
 
 # Callback for updating key statistics
-@app.callback(
-    [Output('total-deaths', 'children'),
-     Output('avg-rate', 'children'),
-     Output('peak-year', 'children'),
-     Output('trend-direction', 'children'),
-     Output('key-stats-title', 'children')],
-    [Input('year-slider', 'value'),
-     Input('zone-dropdown', 'value'),
-     Input('drug-dropdown', 'value')]
-)
 def update_key_stats(year_range, selected_zone, selected_drug):
     # Create dynamic title
     title = f"{selected_drug} Statistics - {selected_zone} ({year_range[0]}-{year_range[1]})"
     
-    if df.empty:
+    data = get_data()
+    if data.df.empty:
         return "No data", "No data", "No data", "No data", title
     
     # Filter data - handle "All" drug type
-    if selected_drug == 'All':
-        # For "All", exclude aggregated categories to avoid double counting
-        excluded_drug_categories = [
-            'Opioid - total',
-            'Total - all substances', 
-            'Nonpharmaceutical drug (any)'
-        ]
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'] == selected_zone) &
-            (~df['Drug Type'].isin(excluded_drug_categories)) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
-    else:
-        # For specific drug types
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'] == selected_zone) &
-            (df['Drug Type'] == selected_drug) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
+    filtered_df = data.query_engine.filter(year_range, selected_zone, selected_drug)
     
     if filtered_df.empty:
-        return "0", "0.0", "N/A", "N/A", title
+        # No deaths: a rate of 0 over the range's person-years, undefined without any
+        rate = data.query_engine.rate(year_range, selected_zone, selected_drug)
+        return "0", "0.0" if rate is None or rate == rate else "N/A", "N/A", "N/A", title
     
     total_deaths = filtered_df['Frequency'].sum()
-    avg_rate = filtered_df['Rate'].mean()
+    # Deaths per 100k person-years over the range (O(1) from the population prefix sums)
+    avg_rate = data.query_engine.rate(year_range, selected_zone, selected_drug)
+    if avg_rate is None:
+        avg_rate = filtered_df['Rate'].mean()
     
-    # Find peak year
-    yearly_deaths = filtered_df.groupby('Year')['Frequency'].sum()
+    # Find peak year (the yearly aggregate is shared with the time series chart)
+    yearly_data = data.query_engine.aggregate(year_range, selected_zone, selected_drug, 'Year')
+    yearly_deaths = yearly_data.set_index('Year')['Frequency']
     peak_year = yearly_deaths.idxmax() if not yearly_deaths.empty else "N/A"
     
-    # Calculate trend (last 3 years vs previous 3 years)
-    recent_years = filtered_df[filtered_df['Year'] >= max(filtered_df['Year']) - 2]['Frequency'].sum()
-    earlier_years = filtered_df[
-        (filtered_df['Year'] >= max(filtered_df['Year']) - 5) & 
-        (filtered_df['Year'] < max(filtered_df['Year']) - 2)
-    ]['Frequency'].sum()
+    # Recent trend, fitted for every series and window at load (see trends.py)
+    trend = data.trends.label(year_range, selected_zone, selected_drug)
     
-    if earlier_years > 0:
-        trend = "↑ Increasing" if recent_years > earlier_years else "↓ Decreasing"
-    else:
-        trend = "→ Stable"
+    avg_rate = f"{avg_rate:.1f}" if avg_rate == avg_rate else "N/A"
     
-    return f"{total_deaths:,.0f}", f"{avg_rate:.1f}", str(int(peak_year)) if peak_year != "N/A" else "N/A", trend, title
+    return f"{total_deaths:,.0f}", avg_rate, str(int(peak_year)) if peak_year != "N/A" else "N/A", trend, title
+
+def sub_year_time_series(data, year_range, selected_zone, selected_drug, granularity, window):
+    # Quarterly and monthly rows are only published province-wide
+    zone = selected_zone if selected_zone in data.time_series.zones(granularity) else 'Nova Scotia'
+    series = data.time_series.query(granularity, zone, selected_drug, year_range, window)
+    
+    if series.empty:
+        return empty_figure()
+    
+    period = 'Quarter' if granularity == 'quarter' else 'Month'
+    title = f"{selected_drug} Deaths by {period} - {zone}"
+    if window:
+        title += f" ({window}-month moving total)"
+    
+    fig = go.Figure()
+    
+    # Deaths per period (or moving total) with the annualized rate in the hover
+    fig.add_trace(go.Scatter(
+        x=series['Period'],
+        y=series['Frequency'],
+        customdata=series['Rate'],
+        mode='lines+markers',
+        name=f'{window}-month total' if window else 'Deaths',
+        line=dict(color=zone_colors.get(zone, '#1f77b4'), width=3),
+        marker=dict(size=6),
+        hovertemplate='%{y:,.0f} deaths<br>%{customdata:.1f} per 100k (annualized)<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title=period,
+        yaxis_title="Number of Deaths",
+        hovermode='x unified',
+        template=TEMPLATE_NAME
+    )
+    
+    return fig
 
 # Callback for time series chart
-@app.callback(
-    Output('time-series-chart', 'figure'),
-    [Input('year-slider', 'value'),
-     Input('zone-dropdown', 'value'),
-     Input('drug-dropdown', 'value')]
-)
-def update_time_series(year_range, selected_zone, selected_drug):
-    if df.empty:
-        return go.Figure()
-    
-    # Filter data for time series - handle "All" drug type
-    if selected_drug == 'All':
-        # For "All", exclude aggregated categories to avoid double counting
-        excluded_drug_categories = [
-            'Opioid - total',
-            'Total - all substances', 
-            'Nonpharmaceutical drug (any)'
-        ]
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'] == selected_zone) &
-            (~df['Drug Type'].isin(excluded_drug_categories)) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
-    else:
-        # For specific drug types
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'] == selected_zone) &
-            (df['Drug Type'] == selected_drug) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
+@figure_cache.cached('time_series')
+def update_time_series(year_range, selected_zone, selected_drug, granularity='year', window=0):
+    data = get_data()
+    if data.df.empty:
+        return empty_figure()
     
-    if filtered_df.empty:
-        return go.Figure()
+    if granularity != 'year':
+        return sub_year_time_series(data, year_range, selected_zone, selected_drug, granularity, window)
+    
+    # Filter and aggregate data for time series - handle "All" drug type
+    yearly_data = data.query_engine.aggregate(year_range, selected_zone, selected_drug, 'Year')
     
-    yearly_data = filtered_df.groupby('Year').agg({
-        'Frequency': 'sum',
-        'Rate': 'mean'
-    }).reset_index()
+    if yearly_data.empty:
+        return empty_figure()
     
     fig = go.Figure()
     
@@ -377,337 +563,278 @@ def update_time_series(year_range, selected_zone, selected_drug):
         xaxis_title="Year",
         yaxis_title="Number of Deaths",
         hovermode='x unified',
-        template='plotly_white'
+        template=TEMPLATE_NAME
     )
     
     return fig
 
 # Callback for zone comparison chart
-@app.callback(
-    Output('zone-comparison-chart', 'figure'),
-    [Input('year-slider', 'value'),
-     Input('drug-dropdown', 'value')]
-)
+@figure_cache.cached('zone_comparison')
 def update_zone_comparison(year_range, selected_drug):
-    if df.empty:
-        return go.Figure()
+    data = get_data()
+    if data.df.empty:
+        return empty_figure()
     
     # Filter data for zone comparison - handle "All" drug type
     zones = ['Central', 'Eastern', 'Northern', 'Western']
     
-    if selected_drug == 'All':
-        # For "All", exclude aggregated categories to avoid double counting
-        excluded_drug_categories = [
-            'Opioid - total',
-            'Total - all substances', 
-            'Nonpharmaceutical drug (any)'
-        ]
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'].isin(zones)) &
-            (~df['Drug Type'].isin(excluded_drug_categories)) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
-    else:
-        # For specific drug types
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'].isin(zones)) &
-            (df['Drug Type'] == selected_drug) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
+    zone_data = data.query_engine.aggregate(year_range, zones, selected_drug, 'Health Zone of Residence')
     
-    if filtered_df.empty:
-        return go.Figure()
-    
-    zone_data = filtered_df.groupby('Health Zone of Residence').agg({
-        'Frequency': 'sum',
-        'Rate': 'mean'
-    }).reset_index()
+    if zone_data.empty:
+        return empty_figure()
     
     fig = go.Figure()
     
     fig.add_trace(go.Bar(
         x=zone_data['Health Zone of Residence'],
         y=zone_data['Frequency'],
+        customdata=zone_data['Rate'],
         name='Total Deaths',
-        marker_color=[zone_colors.get(zone, '#1f77b4') for zone in zone_data['Health Zone of Residence']]
+        marker_color=[zone_colors.get(zone, '#1f77b4') for zone in zone_data['Health Zone of Residence']],
+        hovertemplate='%{y:,} deaths<br>%{customdata:.1f} per 100k per year<extra>%{x}</extra>'
     ))
     
     fig.update_layout(
         title=f"{selected_drug} Deaths by Health Zone ({year_range[0]}-{year_range[1]})",
         xaxis_title="Health Zone",
         yaxis_title="Total Deaths",
-        template='plotly_white'
+        template=TEMPLATE_NAME
     )
     
     return fig
 
 # Callback for drug distribution table
-@app.callback(
-    Output('drug-distribution-table', 'children'),
-    [Input('year-slider', 'value'),
-     Input('zone-dropdown', 'value')]
-)
 def update_drug_distribution(year_range, selected_zone):
-    if df.empty:
+    data = get_data()
+    if data.df.empty:
         return html.P("No data available")
     
-    # Filter data for drug distribution
-    filtered_df = df[
-        (df['Year'] >= year_range[0]) & 
-        (df['Year'] <= year_range[1]) &
-        (df['Health Zone of Residence'] == selected_zone) &
-        (df['Quarter'] == 'All') &
-        (df['Manner of Death'] == 'All manners') &
-        (df['Sex'] == 'Total')
-    ]
+    # Group individual drug types (aggregated categories are never looked up)
+    drug_data = data.query_engine.aggregate(year_range, selected_zone, 'All', 'Drug Type')
     
-    if filtered_df.empty:
+    if drug_data.empty:
         return html.P("No data available for selected filters")
     
-    # Group by drug type and filter out aggregated categories
-    drug_data = filtered_df.groupby('Drug Type')['Frequency'].sum().reset_index()
-    drug_data['Rate'] = filtered_df.groupby('Drug Type')['Rate'].mean().values
+    drug_data = drug_data.sort_values('Frequency', ascending=False).head(15).copy()
+    
+    # Calculate percentages and the display columns, column-wise
+    total_deaths = drug_data['Frequency'].sum()
+    percentage = (drug_data['Frequency'] / total_deaths * 100).round(1).to_numpy(dtype=float)
+    drug_data['Rank'] = np.arange(1, len(drug_data) + 1)
+    drug_data['Drug Type'] = drug_data['Drug Type'].astype(str)
+    drug_data['Deaths'] = drug_data['Frequency'].astype('int64')
+    drug_data['Rate per 100k'] = np.char.mod('%.1f', drug_data['Rate'].to_numpy(dtype=float))
+    drug_data['Percentage'] = np.char.mod('%.1f%%', percentage)
     
-    # Remove aggregated/total categories
-    excluded_categories = [
-        'Opioid - total',
-        'Total - all substances', 
-        'Nonpharmaceutical drug (any)'
+    return [
+        html.H6(f"Drug Type Distribution - {selected_zone} ({year_range[0]}-{year_range[1]})", 
+               className="text-center mb-3"),
+        virtualized_table('drug-distribution-data-table', drug_data, {
+            'Rank': {'name': 'Rank', 'type': 'numeric'},
+            'Drug Type': {'name': 'Drug Type', 'type': 'text'},
+            'Deaths': {'name': 'Deaths', 'type': 'numeric',
+                       'format': dash_table.Format.Format(group=dash_table.Format.Group.yes)},
+            'Rate per 100k': {'name': 'Rate per 100k', 'type': 'text'},
+            'Percentage': {'name': 'Percentage', 'type': 'text'}
+        })
     ]
-    drug_data = drug_data[~drug_data['Drug Type'].isin(excluded_categories)]
+
+# Callback for fastest-rising series ranking
+def update_trend_ranking(year_range):
+    data = get_data()
+    if data.df.empty:
+        return html.P("No data available")
     
-    drug_data = drug_data.sort_values('Frequency', ascending=False).head(15)
+    # Precomputed fits, already ordered for this window
+    ranking = data.trends.ranking(year_range, count=TREND_RANKING_SIZE)
     
-    # Calculate percentages
-    total_deaths = drug_data['Frequency'].sum()
-    drug_data['Percentage'] = (drug_data['Frequency'] / total_deaths * 100).round(1)
-    
-    # Create table
-    table_header = [
-        html.Thead([
-            html.Tr([
-                html.Th("Rank", style={'text-align': 'center', 'width': '10%'}),
-                html.Th("Drug Type", style={'text-align': 'left', 'width': '50%'}),
-                html.Th("Deaths", style={'text-align': 'center', 'width': '15%'}),
-                html.Th("Rate per 100k", style={'text-align': 'center', 'width': '15%'}),
-                html.Th("Percentage", style={'text-align': 'center', 'width': '10%'})
-            ])
-        ], style={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'})
-    ]
+    if ranking.empty:
+        return html.P("Not enough data in the selected years to fit trends")
     
-    table_body = [
-        html.Tbody([
-            html.Tr([
-                html.Td(str(i+1), style={'text-align': 'center', 'fontWeight': 'bold'}),
-                html.Td(row['Drug Type'], style={'text-align': 'left'}),
-                html.Td(f"{int(row['Frequency']):,}", style={'text-align': 'center'}),
-                html.Td(f"{row['Rate']:.1f}", style={'text-align': 'center'}),
-                html.Td(f"{row['Percentage']:.1f}%", style={'text-align': 'center'})
-            ], style={'borderBottom': '1px solid #dee2e6'}) 
-            for i, (_, row) in enumerate(drug_data.iterrows())
-        ])
+    first_year, last_year = ranking['First Year'].iloc[0], ranking['Last Year'].iloc[0]
+    ranking['Rank'] = np.arange(1, len(ranking) + 1)
+    ranking['Zone'] = ranking['Health Zone of Residence']
+    ranking['Deaths'] = ranking['Deaths'].astype('int64')
+    ranking['Annual Change'] = np.char.mod('%+.1f%%', ranking['Annual Change'].to_numpy(dtype=float) * 100)
+    ranking['95% CI'] = [f"{lower * 100:+.1f}% to {upper * 100:+.1f}%"
+                         for lower, upper in zip(ranking['Lower'], ranking['Upper'])]
+    ranking['Change Point'] = [
+        f"{year}: {before * 100:+.0f}% → {after * 100:+.0f}%/yr" if year > 0 else "None"
+        for year, before, after in zip(ranking['Change Year'], ranking['Change Before'], ranking['Change After'])
     ]
     
     return [
-        html.H6(f"Drug Type Distribution - {selected_zone} ({year_range[0]}-{year_range[1]})", 
-               className="text-center mb-3"),
-        dbc.Table(
-            table_header + table_body,
-            bordered=True,
-            hover=True,
-            responsive=True,
-            striped=True,
-            style={'fontSize': '0.9rem'}
-        )
+        html.H6(f"Fastest-Rising Series ({first_year}-{last_year})", className="text-center mb-3"),
+        virtualized_table('trend-ranking-data-table', ranking, {
+            'Rank': {'name': 'Rank', 'type': 'numeric'},
+            'Zone': {'name': 'Zone', 'type': 'text'},
+            'Drug Type': {'name': 'Drug Type', 'type': 'text'},
+            'Sex': {'name': 'Sex', 'type': 'text'},
+            'Deaths': {'name': 'Deaths', 'type': 'numeric'},
+            'Annual Change': {'name': 'Annual Change', 'type': 'text'},
+            '95% CI': {'name': '95% CI', 'type': 'text'},
+            'Change Point': {'name': 'Change Point', 'type': 'text'}
+        })
     ]
 
 # Callback for sex of death chart
-@app.callback(
-    Output('sex-death-chart', 'figure'),
-    [Input('year-slider', 'value'),
-     Input('drug-dropdown', 'value')]
-)
+@figure_cache.cached('sex_death')
 def update_sex_death(year_range, selected_drug):
-    if df.empty:
-        return go.Figure()
+    data = get_data()
+    if data.df.empty:
+        return empty_figure()
     
     # Filter data for sex analysis - handle "All" drug type
     # Always use Nova Scotia data regardless of selected zone for province-wide sex analysis
     sexes = ['Male', 'Female']
     
-    if selected_drug == 'All':
-        # For "All", exclude aggregated categories to avoid double counting
-        excluded_drug_categories = [
-            'Opioid - total',
-            'Total - all substances', 
-            'Nonpharmaceutical drug (any)'
-        ]
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'] == 'Nova Scotia') &
-            (~df['Drug Type'].isin(excluded_drug_categories)) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'].isin(sexes))
-        ]
-    else:
-        # For specific drug types
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'] == 'Nova Scotia') &
-            (df['Drug Type'] == selected_drug) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'].isin(sexes))
-        ]
+    sex_data = data.query_engine.aggregate(year_range, 'Nova Scotia', selected_drug, ['Year', 'Sex'], sexes=sexes)
     
-    if filtered_df.empty:
-        return go.Figure()
+    if sex_data.empty:
+        return empty_figure()
+    
+    sex_colors = {'Male': '#1f77b4', 'Female': '#ff7f0e'}
     
-    sex_data = filtered_df.groupby(['Year', 'Sex'])['Frequency'].sum().reset_index()
+    fig = go.Figure()
+    
+    # One line per sex
+    for sex in sex_data['Sex'].unique():
+        sex_rows = sex_data[sex_data['Sex'] == sex]
+        fig.add_trace(go.Scatter(
+            x=sex_rows['Year'],
+            y=sex_rows['Frequency'],
+            mode='lines+markers',
+            name=sex,
+            line=dict(color=sex_colors.get(sex))
+        ))
     
-    fig = px.line(
-        sex_data,
-        x='Year',
-        y='Frequency',
-        color='Sex',
+    fig.update_layout(
         title=f"Deaths by Sex Over Time - {selected_drug} in Nova Scotia",
-        markers=True,
-        color_discrete_map={'Male': '#1f77b4', 'Female': '#ff7f0e'}
+        legend_title_text='Sex',
+        xaxis_title="Year",
+        yaxis_title="Number of Deaths",
+        template=TEMPLATE_NAME
     )
     
+    return fig
+
+# Callback for circumstances of death chart
+@figure_cache.cached('circumstances')
+def update_circumstances(year_range, selected_zone, dimension, manner, *filter_values):
+    data = get_data()
+    if data.df.empty:
+        return empty_figure()
+    
+    # Every filter is a bitset lookup; an empty filter matches any value. Each row
+    # holds a single circumstance, so only the charted dimension's filter applies
+    selected = dict(zip(CIRCUMSTANCE_FILTERS, filter_values))
+    filters = {'Manner of Death': [manner], dimension: selected.get(dimension) or []}
+    
+    zone = selected_zone
+    circumstance_data = data.query_engine.circumstances(year_range, zone, dimension, filters)
+    if circumstance_data.empty and zone != 'Nova Scotia':
+        # Circumstances are only published province-wide
+        zone = 'Nova Scotia'
+        circumstance_data = data.query_engine.circumstances(year_range, zone, dimension, filters)
+    
+    if circumstance_data.empty:
+        return empty_figure()
+    
+    fig = go.Figure()
+    
+    # One stacked bar segment per value of the chosen dimension
+    for value in circumstance_data[dimension].unique():
+        value_rows = circumstance_data[circumstance_data[dimension] == value]
+        fig.add_trace(go.Bar(
+            x=value_rows['Year'],
+            y=value_rows['Percent'],
+            name=str(value),
+            hovertemplate='%{y:.1f}%<extra>' + str(value) + '</extra>'
+        ))
+    
     fig.update_layout(
+        title=f"{dimension} - {manner}, {zone} ({year_range[0]}-{year_range[1]})",
+        barmode='stack',
         xaxis_title="Year",
-        yaxis_title="Number of Deaths",
-        template='plotly_white'
+        yaxis_title="Percent of Deaths",
+        legend=dict(orientation='h', y=-0.2),
+        template=TEMPLATE_NAME
     )
     
     return fig
 
+# Callback for the circumstance filters: only the charted dimension's filter is enabled
+def update_circumstance_filters(dimension):
+    return [filter_dimension != dimension for filter_dimension in CIRCUMSTANCE_FILTERS]
+
+# Callback for new data releases: refresh the control options, and the views
+# through the (clamped) year slider value
+def refresh_controls(n_intervals, known_version, year_range):
+    data = get_data()
+    if data.version == known_version or data.df.empty:
+        return [dash.no_update] * (8 + len(CIRCUMSTANCE_FILTERS))
+    
+    first_year, last_year = min(data.years), max(data.years)
+    year_range = [max(year_range[0], first_year), min(year_range[1], last_year)]
+    return (
+        first_year,
+        last_year,
+        year_marks(data.years),
+        year_range,
+        [{'label': zone, 'value': zone} for zone in data.health_zones],
+        [{'label': drug, 'value': drug} for drug in data.drug_types],
+        *[[{'label': value, 'value': value} for value in data.circumstance_values[dimension]]
+          for dimension in CIRCUMSTANCE_FILTERS],
+        data.clientside_payload(zone_colors) if CLIENTSIDE_CALLBACKS else dash.no_update,
+        data.version
+    )
+
 # Callback for map header
-@app.callback(
-    Output('map-header', 'children'),
-    [Input('drug-dropdown', 'value')]
-)
 def update_map_header(selected_drug):
     return f"{selected_drug} Fatalities - Geographic Distribution by Health Zone"
 
 # Callback for map
-@app.callback(
-    Output('map', 'figure'),
-    [Input('year-slider', 'value'),
-     Input('drug-dropdown', 'value')]
-)
+@figure_cache.cached('map')
 def update_map(year_range, selected_drug):
-    if df.empty:
-        return go.Figure()
+    data = get_data()
+    if data.df.empty:
+        return empty_figure()
     
     # Filter data for map - handle "All" drug type
     zones = ['Central', 'Eastern', 'Northern', 'Western']
     
-    if selected_drug == 'All':
-        # For "All", exclude aggregated categories to avoid double counting
-        excluded_drug_categories = [
-            'Opioid - total',
-            'Total - all substances', 
-            'Nonpharmaceutical drug (any)'
-        ]
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'].isin(zones)) &
-            (~df['Drug Type'].isin(excluded_drug_categories)) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
-    else:
-        # For specific drug types
-        filtered_df = df[
-            (df['Year'] >= year_range[0]) & 
-            (df['Year'] <= year_range[1]) &
-            (df['Health Zone of Residence'].isin(zones)) &
-            (df['Drug Type'] == selected_drug) &
-            (df['Quarter'] == 'All') &
-            (df['Manner of Death'] == 'All manners') &
-            (df['Sex'] == 'Total')
-        ]
+    # Aggregate data by zone (shared with the zone comparison chart)
+    zone_data = data.query_engine.aggregate(year_range, zones, selected_drug, 'Health Zone of Residence')
     
-    if filtered_df.empty:
-        return go.Figure()
+    if MAP_PATCH_UPDATES and data.geojson_data is not None:
+        # The geometry is already in the browser; only send the values that changed
+        locations, z_values, hover_text = zone_map_values(zone_data)
+        patched_figure = Patch()
+        patched_figure['data'][0]['locations'] = locations
+        patched_figure['data'][0]['z'] = z_values
+        patched_figure['data'][0]['hovertext'] = hover_text
+        patched_figure['layout']['title']['text'] = map_title(selected_drug, year_range)
+        return patched_figure
     
-    # Aggregate data by zone
-    zone_data = filtered_df.groupby('Health Zone of Residence').agg({
-        'Frequency': 'sum',
-        'Rate': 'mean'
-    }).reset_index()
+    if zone_data.empty:
+        return empty_figure()
     
     # Create Plotly choropleth map using the GeoJSON data
-    if geojson_data is not None:
-        # Create a mapping from zone names to match GeoJSON properties
-        zone_name_mapping = {
-            'Central': 'Central',
-            'Eastern': 'Eastern', 
-            'Northern': 'Northern',
-            'Western': 'Western'
-        }
-        
-        # Prepare data for choropleth
-        locations = []
-        z_values = []
-        hover_text = []
-        
-        for _, row in zone_data.iterrows():
-            zone_name = row['Health Zone of Residence']
-            if zone_name in zone_name_mapping:
-                locations.append(zone_name_mapping[zone_name])
-                z_values.append(row['Rate'])
-                hover_text.append(f"<b>{zone_name}</b><br>Total Deaths: {row['Frequency']}<br>Rate per 100k: {row['Rate']:.1f}")
-        
-        # Create choropleth figure
-        fig = go.Figure(go.Choroplethmapbox(
-            geojson=geojson_data,
-            locations=locations,
-            z=z_values,
-            colorscale='YlOrRd',
-            hovertemplate='%{hovertext}<extra></extra>',
-            hovertext=hover_text,
-            marker_opacity=0.7,
-            marker_line_width=1,
-            featureidkey="properties.name"
-        ))
-        
-        fig.update_layout(
-            mapbox_style="open-street-map",
-            mapbox=dict(
-                center=go.layout.mapbox.Center(lat=45.0, lon=-63.0),
-                zoom=6
-            ),
-            margin={"r":0,"t":0,"l":0,"b":0},
-            title=f'{selected_drug} Rate per 100k Population ({year_range[0]}-{year_range[1]})',
-            title_x=0.5
+    if data.geojson_data is not None:
+        return build_map_figure(
+            data.geojson_data, *zone_map_values(zone_data), map_title(selected_drug, year_range)
         )
-        
-        return fig
     else:
-        # Fallback to bar chart if no geojson
+        # Fallback to bar chart if no geojson (plotly.express is only needed here)
+        import plotly.express as px
         fig = px.bar(
             zone_data,
             x='Health Zone of Residence',
             y='Rate',
             title=f"{selected_drug} Rate by Health Zone ({year_range[0]}-{year_range[1]})",
             color='Rate',
-            color_continuous_scale='YlOrRd'
+            color_continuous_scale='YlOrRd',
+            template=TEMPLATE_NAME
         )
         fig.update_layout(
             xaxis_title="Health Zone",
@@ -715,7 +842,254 @@ def update_map(year_range, selected_drug):
         )
         return fig
 
+def prewarm_figure_cache():
+    # Render the most common selections (full year range, every zone and drug) up front
+    data = get_data()
+    if data.df.empty:
+        return
+    
+    full_range = [min(data.years), max(data.years)]
+    for drug in data.drug_types:
+        update_zone_comparison(full_range, drug)
+        update_sex_death(full_range, drug)
+        update_map(full_range, drug)
+        for zone in data.health_zones:
+            update_time_series(full_range, zone, drug)
+    
+    print(f"Figure cache prewarmed: {figure_cache.info()['size']} figures")
+
+# Callback wiring: each view lists the function, its outputs and the inputs it depends on
+dashboard_views = [
+    (update_key_stats,
+     [Output('total-deaths', 'children'),
+      Output('avg-rate', 'children'),
+      Output('peak-year', 'children'),
+      Output('trend-direction', 'children'),
+      Output('key-stats-title', 'children')],
+     ['year-slider', 'zone-dropdown', 'drug-dropdown']),
+    (update_time_series,
+     Output('time-series-chart', 'figure'),
+     ['year-slider', 'zone-dropdown', 'drug-dropdown', 'granularity-radio', 'rolling-window-radio']),
+    (update_zone_comparison,
+     Output('zone-comparison-chart', 'figure'),
+     ['year-slider', 'drug-dropdown']),
+    (update_drug_distribution,
+     Output('drug-distribution-table', 'children'),
+     ['year-slider', 'zone-dropdown']),
+    (update_sex_death,
+     Output('sex-death-chart', 'figure'),
+     ['year-slider', 'drug-dropdown']),
+    (update_trend_ranking,
+     Output('trend-ranking-table', 'children'),
+     ['year-slider']),
+    (update_circumstances,
+     Output('circumstances-chart', 'figure'),
+     ['year-slider', 'zone-dropdown', 'circumstance-dimension-dropdown', 'circumstance-manner-radio'] +
+     list(CIRCUMSTANCE_FILTERS.values())),
+    (update_map_header,
+     Output('map-header', 'children'),
+     ['drug-dropdown']),
+    (update_map,
+     Output('map', 'figure'),
+     ['year-slider', 'drug-dropdown']),
+]
+
+dashboard_inputs = ['year-slider', 'zone-dropdown', 'drug-dropdown', 'granularity-radio', 'rolling-window-radio',
+                    'circumstance-dimension-dropdown', 'circumstance-manner-radio'] + list(CIRCUMSTANCE_FILTERS.values())
+
+# Values of the circumstance controls before the user changes them
+circumstance_defaults = dict(
+    {'circumstance-dimension-dropdown': 'Place of event', 'circumstance-manner-radio': 'All manners'},
+    **{filter_id: [] for filter_id in CIRCUMSTANCE_FILTERS.values()}
+)
+
+# Views with a browser implementation in assets/clientside.js
+clientside_views = {
+    update_key_stats: 'updateKeyStats',
+    update_time_series: 'updateTimeSeries'
+}
+
+# Views run as background callbacks when enabled; the inputs whose changes cancel a running job
+background_views = [update_map, update_circumstances]
+background_cancel_inputs = ['year-slider']
+
+def background_callback_manager(directory=None):
+    """Diskcache-backed manager for the background views (no external broker), or
+    ``None`` when ``dash[diskcache]`` is not installed."""
+    try:
+        import diskcache
+        return dash.DiskcacheManager(diskcache.Cache(directory or BACKGROUND_CACHE_DIR))
+    except ImportError:
+        print("dash[diskcache] is not installed; running the background views as regular callbacks")
+        return None
+
+def update_dashboard(year_range, selected_zone, selected_drug, changed_inputs=None, views=None,
+                     granularity='year', window=0, circumstances=None):
+    """Compute every view in one pass, skipping views whose inputs did not change.
+
+    ``changed_inputs`` is the set of control ids that triggered the update;
+    ``None`` (the initial page load) recomputes everything. ``views`` defaults
+    to all of ``dashboard_views``. ``circumstances`` maps circumstance control
+    ids to their values (``circumstance_defaults`` for any not given).
+    """
+    values = dict(circumstance_defaults, **(circumstances or {}))
+    values.update({
+        'year-slider': year_range,
+        'zone-dropdown': selected_zone,
+        'drug-dropdown': selected_drug,
+        'granularity-radio': granularity,
+        'rolling-window-radio': window
+    })
+    
+    results = []
+    for func, outputs, inputs in views if views is not None else dashboard_views:
+        if changed_inputs is not None and not changed_inputs.intersection(inputs):
+            # Leave outputs untouched in the browser (e.g. zone comparison ignores the zone)
+            if isinstance(outputs, list):
+                results.extend([dash.no_update] * len(outputs))
+            else:
+                results.append(dash.no_update)
+            continue
+        
+        result = func(*[values[name] for name in inputs])
+        if isinstance(outputs, list):
+            results.extend(result)
+        else:
+            results.append(result)
+    
+    return results
+
+def register_callbacks(app, mode='separate', clientside=False, background=False):
+    """Wire the views to ``app``.
+
+    ``'separate'`` registers one callback per view (one request each);
+    ``'combined'`` registers a single multi-output callback so a control change
+    costs one request and only the affected outputs are sent back. With
+    ``clientside`` the views in ``clientside_views`` run in the browser instead.
+    With ``background`` the ``background_views`` get their own background
+    callbacks in either mode. Open pages also poll for new data releases (see
+    ``refresh_controls``).
+    """
+    server_views = dashboard_views
+    if clientside:
+        server_views = [view for view in dashboard_views if view[0] not in clientside_views]
+        for func, outputs, inputs in dashboard_views:
+            if func in clientside_views:
+                app.clientside_callback(
+                    ClientsideFunction(namespace='dashboard', function_name=clientside_views[func]),
+                    outputs,
+                    [Input(name, 'value') for name in inputs] + [Input('clientside-data', 'data')]
+                )
+    
+    manager = background_callback_manager() if background else None
+    if manager is not None:
+        for func, outputs, inputs in server_views:
+            if func in background_views:
+                # Runs in a forked process, so its metrics stay there; the figure
+                # cache is only shared back with FIGURE_CACHE_DIR set
+                app.callback(
+                    outputs,
+                    [Input(name, 'value') for name in inputs],
+                    background=True,
+                    manager=manager,
+                    cancel=[Input(name, 'value') for name in background_cancel_inputs]
+                )(func)
+        server_views = [view for view in server_views if view[0] not in background_views]
+    
+    if METRICS_ENABLED:
+        server_views = [(callback_metrics.instrument(func), outputs, inputs)
+                        for func, outputs, inputs in server_views]
+    
+    if mode == 'combined':
+        all_outputs = []
+        for _, outputs, _ in server_views:
+            all_outputs.extend(outputs if isinstance(outputs, list) else [outputs])
+        
+        @app.callback(all_outputs, [Input(name, 'value') for name in dashboard_inputs])
+        def update_dashboard_callback(year_range, selected_zone, selected_drug, granularity, window, *circumstances):
+            triggered = dash.callback_context.triggered_prop_ids
+            changed_inputs = {prop_id.split('.')[0] for prop_id in triggered} if triggered else None
+            return update_dashboard(year_range, selected_zone, selected_drug, changed_inputs, server_views,
+                                    granularity, window, dict(zip(dashboard_inputs[5:], circumstances)))
+    elif mode == 'separate':
+        for func, outputs, inputs in server_views:
+            app.callback(outputs, [Input(name, 'value') for name in inputs])(func)
+    else:
+        raise ValueError(f"Unknown callback mode: {mode!r}")
+    
+    app.callback(
+        [Output(filter_id, 'disabled') for filter_id in CIRCUMSTANCE_FILTERS.values()],
+        [Input('circumstance-dimension-dropdown', 'value')]
+    )(update_circumstance_filters)
+    
+    app.callback(
+        [Output('year-slider', 'min'),
+         Output('year-slider', 'max'),
+         Output('year-slider', 'marks'),
+         Output('year-slider', 'value'),
+         Output('zone-dropdown', 'options'),
+         Output('drug-dropdown', 'options')] +
+        [Output(filter_id, 'options') for filter_id in CIRCUMSTANCE_FILTERS.values()] +
+        [Output('clientside-data', 'data'),
+         Output('data-version', 'data')],
+        [Input('data-refresh-interval', 'n_intervals')],
+        [State('data-version', 'data'), State('year-slider', 'value')],
+        prevent_initial_call=True
+    )(refresh_controls)
+
+def create_app(callback_mode=None, clientside=None, background=None):
+    """App factory: build the Dash app with its layout and callbacks.
+
+    ``callback_mode``, ``clientside`` and ``background`` default to the
+    ``DASHBOARD_CALLBACK_MODE``, ``DASHBOARD_CLIENTSIDE`` and ``DASHBOARD_BACKGROUND``
+    environment settings.
+    """
+    # Initialize the Dash app with Bootstrap theme
+    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+    app.title = "Nova Scotia Substance-Related Fatalities Dashboard"
+    app.layout = build_layout
+    
+    if METRICS_ENABLED:
+        callback_metrics.register(app.server)
+    
+    # Read-only JSON/CSV API (/api/v1) over the same queries as the views
+    if API_ENABLED:
+        app.server.register_blueprint(api)
+    
+    # Basemap tiles from the local cache (/tiles)
+    if MAP_BASEMAP == 'local':
+        app.server.register_blueprint(tiles)
+    
+    # Registered after the metrics hooks so it runs before them (Flask runs
+    # after_request hooks in reverse) and the metrics see both sizes
+    if COMPRESSION_ENABLED:
+        ResponseCompression().register(app.server)
+    
+    register_callbacks(
+        app,
+        mode=callback_mode or os.environ.get('DASHBOARD_CALLBACK_MODE', 'separate'),
+        clientside=CLIENTSIDE_CALLBACKS if clientside is None else clientside,
+        background=BACKGROUND_CALLBACKS if background is None else background
+    )
+    
+    return app
+
+app = create_app()
+
+# WSGI entry point, e.g. `gunicorn dashboard:server` (see gunicorn.conf.py)
+server = app.server
+
 if __name__ == '__main__':
+    # Flask development server; debug mode (reloader and debugger) is opt-in
+    debug = os.environ.get('DASHBOARD_DEBUG', '0') == '1'
+    host = os.environ.get('DASHBOARD_HOST', '0.0.0.0')
+    port = int(os.environ.get('DASHBOARD_PORT', 8059))
+    
+    if os.environ.get('FIGURE_CACHE_PREWARM', '0') == '1':
+        prewarm_figure_cache()
+    
+    data_refresh.start_watcher(DATA_WATCH_INTERVAL)
+    
     print("Starting Nova Scotia Substance-Related Fatalities Dashboard...")
-    print("Open your web browser and go to: http://127.0.0.1:8059")
-    app.run(debug=True, host='0.0.0.0', port=8059)
+    print(f"Open your web browser and go to: http://127.0.0.1:{port}")
+    app.run(debug=debug, host=host, port=port, threaded=True)
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+
+from query_engine import EXCLUDED_DRUG_CATEGORIES
+
+# Row-level columns with a bitmap index, for filters the cube does not cover
+INDEXED_COLUMNS = [
+    'Year',
+    'Health Zone of Residence',
+    'Manner of Death',
+    'Living Situation',
+    'Place of event',
+    'Others present/aware',
+    'Opioids Stimulants Other'
+]
+
+CSV_PATH = 'Numbers_and_rates_of_substance-related_fatalities_in_Nova_Scotia.csv'
+GEOJSON_PATH = 'Nova Scotia Health Authority Management Zones.geojson'
+
+# Stream the CSV in chunks of this many rows, folding each into the cube
+# (for files too large to read at once; 0 reads the whole file)
+INGEST_CHUNKSIZE = int(os.environ.get('DASHBOARD_INGEST_CHUNKSIZE', 0))
+
+# CSV of point-level deaths (Year, Longitude, Latitude, Drug Type and optionally
+# Manner of Death), assigned to health zones and added to the table; empty disables
+POINT_EVENTS_PATH = os.environ.get('DASHBOARD_POINT_EVENTS', '')
+
+
+class DashboardData:
+    """Everything the callbacks read: the cleaned table, zone geometry and the
+    lookups derived from them (filter options, data cube and query engine).
+
+    ``version`` identifies the source CSV release (and point events file). A refresh passes in the
+    incrementally updated ``cube`` and the still-valid ``query_cache`` entries.
+    """
+
+    def __init__(self, df, geojson_data, version=None, cube=None, query_cache=None):
+        from bitmap_index import BitmapIndex
+        from data_cube import DataCube
+        from data_loader import FILTER_DIMENSIONS
+        from population import PopulationIndex
+        from query_engine import QueryEngine
+        from time_series import TimeSeriesIndex
+        from trends import TrendIndex
+
+        self.df = df
+        self.geojson_data = geojson_data
+        self.version = version
+        self.health_zones = []
+        self.individual_drug_types = []
+        self.drug_types = ['All']
+        self.years = []
+        # Circumstance dimension -> its values, for the filter dropdowns
+        self.circumstance_values = {dimension: [] for dimension in FILTER_DIMENSIONS}
+
+        # Data preprocessing
+        if not df.empty:
+            # Get unique values for filters
+            self.health_zones = sorted([zone for zone in df['Health Zone of Residence'].unique()
+                                        if zone in ['Central', 'Eastern', 'Northern', 'Western', 'Nova Scotia']])
+
+            # Get drug types and exclude aggregated categories
+            all_drug_types = df['Drug Type'].unique()
+            self.individual_drug_types = sorted([drug for drug in all_drug_types
+                                                 if drug not in EXCLUDED_DRUG_CATEGORIES])
+
+            # Add "All" option at the beginning
+            self.drug_types = ['All'] + self.individual_drug_types
+            self.years = sorted(int(year) for year in df['Year'].unique())
+
+            print(f"Health Zones: {self.health_zones}")
+            print(f"Years range: {min(self.years)} - {max(self.years)}")
+            print(f"Drug Types: {len(self.drug_types)}")
+
+        # Pre-aggregate once so callbacks look up cells instead of masking the full frame
+        self.cube = cube if cube is not None else DataCube(df)
+        print(f"Data cube cells: {len(self.cube)}")
+
+        # One bitset per value of the row-level filter dimensions
+        self.bitmap_index = BitmapIndex(df, INDEXED_COLUMNS)
+        for dimension in FILTER_DIMENSIONS:
+            self.circumstance_values[dimension] = [str(value) for value in self.bitmap_index.values(dimension)]
+
+        # Population per zone and year with prefix sums of deaths and person-years,
+        # so rates over any year range are Σdeaths / Σpopulation
+        self.population = PopulationIndex(df, self.cube, self.health_zones, self.individual_drug_types)
+
+        # Trend fits and change points of every (zone, drug, sex) series, for the
+        # Recent Trend card and the fastest-rising ranking
+        self.trends = TrendIndex(self.population, self.cube, self.health_zones, self.individual_drug_types)
+
+        # Shared, memoized filter/aggregate layer used by every callback
+        self.query_engine = QueryEngine(
+            self.cube,
+            df['Drug Type'].unique() if not df.empty else [],
+            cache_size=int(os.environ.get('QUERY_CACHE_SIZE', 256)),
+            cache_ttl=float(os.environ['QUERY_CACHE_TTL']) if os.environ.get('QUERY_CACHE_TTL') else None,
+            cache=query_cache,
+            index=self.bitmap_index,
+            population=self.population
+        )
+
+        # Quarterly and monthly series with their rolling windows, for the time series chart
+        self.time_series = TimeSeriesIndex(df)
+
+        self._clientside_payload = None
+
+    def clientside_payload(self, zone_colors):
+        # Built on first use; only needed when clientside callbacks are enabled
+        if self._clientside_payload is None and not self.df.empty:
+            from clientside_payload import build_clientside_payload
+            self._clientside_payload = build_clientside_payload(
+                self.cube, self.health_zones, self.individual_drug_types, zone_colors, self.time_series,
+                self.population, self.trends
+            )
+        return self._clientside_payload
+
+
+def source_version(csv_path, events_path=None):
+    """Version of the data release: the CSV hash, plus the point events hash if any."""
+    from data_cache import file_hash
+
+    events_path = POINT_EVENTS_PATH if events_path is None else events_path
+    version = file_hash(csv_path)
+    if events_path:
+        version += '-' + file_hash(events_path)[:8]
+    return version
+
+
+def load_table(csv_path, geojson_path, cache_dir, events_path=None):
+    """The cleaned fatalities table with any point events folded in."""
+    from data_cache import cached_fatalities
+
+    df = cached_fatalities(csv_path, cache_dir, chunksize=INGEST_CHUNKSIZE)
+    events_path = POINT_EVENTS_PATH if events_path is None else events_path
+    if events_path:
+        from point_events import fold_point_events, load_point_events
+        from spatial_index import ZoneIndex
+
+        # Points are assigned against the full resolution zones, not the simplified map geometry
+        started = time.perf_counter()
+        with open(geojson_path, 'r') as f:
+            index = ZoneIndex(json.load(f))
+        df = fold_point_events(df, load_point_events(events_path, index))
+        print(f"Point events folded in {time.perf_counter() - started:.3f}s")
+    return df
+
+
+def load_dashboard_data(csv_path=CSV_PATH, geojson_path=GEOJSON_PATH, cache_dir=None):
+    # pandas and the preprocessing modules are imported here, not at import time
+    import pandas as pd
+    from data_cache import DEFAULT_CACHE_DIR, cached_geojson
+
+    # Binary cache of the cleaned data and simplified geometry, shared by all workers
+    # (set DASHBOARD_CACHE_DIR to an empty string to disable)
+    if cache_dir is None:
+        cache_dir = os.environ.get('DASHBOARD_CACHE_DIR', DEFAULT_CACHE_DIR)
+    load_started = time.perf_counter()
+
+    # Load CSV data (typed, categorical and limited to the columns the dashboard uses)
+    version = None
+    try:
+        version = source_version(csv_path)
+        df = load_table(csv_path, geojson_path, cache_dir)
+        print("CSV loaded successfully")
+        print(f"Columns: {df.columns.tolist()}")
+        print(f"Shape: {df.shape}")
+        print(f"Memory usage: {df.memory_usage(deep=True).sum():,} bytes")
+    except Exception as e:
+        print(f"Error loading CSV: {e}")
+        df = pd.DataFrame()
+
+    # Load GeoJSON data, simplified and quantized once; the map never needs full resolution
+    try:
+        geojson_data = cached_geojson(
+            geojson_path,
+            tolerance=float(os.environ.get('MAP_SIMPLIFY_TOLERANCE', 0.001)),
+            precision=int(os.environ.get('MAP_COORDINATE_PRECISION', 4)),
+            cache_dir=cache_dir
+        )
+        print("GeoJSON loaded successfully")
+        print(f"GeoJSON features: {len(geojson_data['features'])}")
+        print(f"Simplified GeoJSON size: {len(json.dumps(geojson_data)):,} bytes")
+    except Exception as e:
+        print(f"Error loading GeoJSON: {e}")
+        geojson_data = None
+
+    print(f"Data loaded in {time.perf_counter() - load_started:.3f}s")
+
+    return DashboardData(df, geojson_data, version=version)
+
+
+_data = None
+_data_lock = threading.Lock()
+
+
+def get_data():
+    """Return the dashboard data, loading it on first use."""
+    global _data
+    if _data is None:
+        with _data_lock:
+            if _data is None:
+                _data = load_dashboard_data()
+    return _data
+
+
+def peek_data():
+    """Return the dashboard data if it is loaded, without triggering a load."""
+    return _data
+
+
+def warmup():
+    """Load the data now rather than on the first request, e.g. in a preloading
+    server master before workers are forked."""
+    return get_data()
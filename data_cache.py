@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_loader import ingest_fatalities, load_fatalities
+from geometry import simplify_geojson
+
+# Bump when the cached layout or the preprocessing changes
+CACHE_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+
+def file_hash(path, *extra):
+    # Content hash of the source file plus any preprocessing parameters
+    digest = hashlib.sha256(f"{CACHE_VERSION}|{extra}".encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _publish(tmp_path, final_path):
+    # Atomic rename so concurrent workers never see a half-written artifact
+    try:
+        os.replace(tmp_path, final_path)
+    except OSError:
+        # Another worker published the same artifact first
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_frame(df, path):
+    """Store a frame as one .npy file per column plus a small JSON manifest."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=os.path.dirname(path))
+    manifest = {'columns': []}
+
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        entry = {'name': column, 'file': f'{i}.npy'}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'category'
+            entry['categories'] = series.cat.categories.tolist()
+            values = series.cat.codes.to_numpy()
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            # Nullable integers: values and missing mask as two arrays
+            entry['kind'] = 'masked'
+            entry['dtype'] = str(series.dtype)
+            entry['mask_file'] = f'{i}.mask.npy'
+            np.save(os.path.join(tmp_path, entry['mask_file']), series.isna().to_numpy())
+            values = series.fillna(0).to_numpy(dtype=series.dtype.numpy_dtype)
+        else:
+            entry['kind'] = 'plain'
+            values = series.to_numpy()
+        np.save(os.path.join(tmp_path, entry['file']), values)
+        manifest['columns'].append(entry)
+
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    _publish(tmp_path, path)
+
+
+def read_frame(path):
+    """Load a frame written by ``write_frame``, memory-mapping every column."""
+    with open(os.path.join(path, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+
+    columns = {}
+    for entry in manifest['columns']:
+        values = np.load(os.path.join(path, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'category':
+            columns[entry['name']] = pd.Categorical.from_codes(values, entry['categories'])
+        elif entry['kind'] == 'masked':
+            mask = np.load(os.path.join(path, entry['mask_file']), mmap_mode='r')
+            array_type = pd.api.types.pandas_dtype(entry['dtype']).construct_array_type()
+            columns[entry['name']] = array_type(np.asarray(values), np.asarray(mask))
+        else:
+            columns[entry['name']] = np.asarray(values)
+
+    # One block per column, so the frame keeps the mapped arrays instead of consolidating copies
+    return pd.DataFrame(columns, copy=False)
+
+
+def cached_fatalities(csv_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=None):
+    """``load_fatalities`` backed by an on-disk columnar cache keyed by the CSV hash.
+
+    With a ``chunksize`` the CSV is streamed through ``ingest_fatalities`` instead.
+    """
+    def load():
+        return ingest_fatalities(csv_path, chunksize) if chunksize else load_fatalities(csv_path)
+
+    if not cache_dir:
+        return load()
+
+    # Streamed frames hold one row per cell, so they are cached separately
+    key = file_hash(csv_path, 'ingest') if chunksize else file_hash(csv_path)
+    path = os.path.join(cache_dir, f'fatalities-{key}')
+    if os.path.isdir(path):
+        try:
+            return read_frame(path)
+        except Exception as e:
+            print(f"Ignoring unreadable data cache {path}: {e}")
+
+    df = load()
+    write_frame(df, path)
+    return df
+
+
+def cached_geojson(geojson_path, tolerance, precision, cache_dir=DEFAULT_CACHE_DIR):
+    """Simplified GeoJSON, cached on disk keyed by the source hash and parameters."""
+    if not cache_dir:
+        with open(geojson_path, 'r') as f:
+            return simplify_geojson(json.load(f), tolerance=tolerance, precision=precision)
+
+    path = os.path.join(cache_dir, f'geojson-{file_hash(geojson_path, tolerance, precision)}.json')
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    with open(geojson_path, 'r') as f:
+        geojson_data = simplify_geojson(json.load(f), tolerance=tolerance, precision=precision)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(geojson_data, f, separators=(',', ':'))
+    _publish(tmp_path, path)
+    return geojson_data
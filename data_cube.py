@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import FILTER_DIMENSIONS
+
+# Dimensions every dashboard view filters on (Year is sliced separately as a range)
+CUBE_DIMENSIONS = [
+    'Health Zone of Residence',
+    'Drug Type',
+    'Sex',
+    'Manner of Death',
+    'Quarter'
+]
+
+# Every dimension of a loaded row; the cube indexes a subset of them
+ROW_DIMENSIONS = [
+    'Year',
+    'Health Zone of Residence',
+    'Quarter',
+    'Month',
+    'Drug Type',
+    'Manner of Death',
+    'Sex'
+] + FILTER_DIMENSIONS
+
+TOTAL_COLUMNS = ['FrequencySum', 'FrequencyCount', 'RateSum', 'RateCount', 'PercentSum', 'PercentCount']
+
+
+class DataCube:
+    """Pre-aggregated view of the fatalities table.
+
+    Frequency is summed and Rate averaged for every
+    (Year, Health Zone, Drug Type, Sex, Manner, Quarter) cell once at load time.
+    Each non-year key maps to a small frame indexed by Year, so a query is a
+    dictionary lookup per requested key plus a range slice over years.
+    """
+
+    def __init__(self, df):
+        self.cells = {}
+
+        if df.empty:
+            return
+
+        self.cells.update(self._build_cells(df))
+
+    @staticmethod
+    def _build_cells(df):
+        grouped = df.groupby(CUBE_DIMENSIONS + ['Year'], observed=True).agg(
+            Frequency=('Frequency', 'sum'),
+            Rate=('Rate', 'mean')
+        ).reset_index()
+
+        for key, cell in grouped.groupby(CUBE_DIMENSIONS, observed=True, sort=False):
+            yield key, cell.set_index('Year', drop=False).sort_index()
+
+    def updated(self, df, partitions):
+        """A new cube for ``df`` that only re-aggregates the changed partitions.
+
+        ``partitions`` is a set of (Year, Quarter) pairs whose rows changed; all
+        other cells are shared with this cube, which is left untouched so that
+        requests still reading it stay consistent.
+        """
+        cube = DataCube(df.iloc[0:0])
+        cube.cells = dict(self.cells)
+        if not partitions:
+            return cube
+
+        # Drop the stale years from every cell of an affected quarter
+        stale_years = {}
+        for year, quarter in partitions:
+            stale_years.setdefault(quarter, set()).add(year)
+        for key, cell in self.cells.items():
+            years = stale_years.get(key[4])
+            if years:
+                kept = cell[~cell['Year'].isin(years)]
+                if kept.empty:
+                    del cube.cells[key]
+                else:
+                    cube.cells[key] = kept
+
+        # Re-aggregate only the rows of the changed partitions and merge them in
+        selected = pd.MultiIndex.from_arrays(
+            [df['Year'].astype(int), df['Quarter'].astype(object)]
+        ).isin(list(partitions))
+        for key, cell in self._build_cells(df[selected]):
+            existing = cube.cells.get(key)
+            cube.cells[key] = cell if existing is None else pd.concat([existing, cell]).sort_index()
+
+        return cube
+
+    def __len__(self):
+        return sum(len(cell) for cell in self.cells.values())
+
+    def query(self, year_range, zones, drugs, sexes=('Total',),
+              manner='All manners', quarter='All'):
+        # Look up each requested cell and keep only the selected years
+        frames = []
+        for zone in zones:
+            for drug in drugs:
+                for sex in sexes:
+                    cell = self.cells.get((zone, drug, sex, manner, quarter))
+                    if cell is not None:
+                        frames.append(cell.loc[year_range[0]:year_range[1]])
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=CUBE_DIMENSIONS + ['Year', 'Frequency', 'Rate'])
+
+        return pd.concat(frames, ignore_index=True)
+
+
+class CubeBuilder:
+    """Folds chunks of the fatalities table into per-cell running totals.
+
+    For every distinct combination of ``ROW_DIMENSIONS`` it keeps the
+    Frequency sum and count and the Rate and Percent sums and counts, so chunks
+    can arrive in any order without changing a cell's mean, and memory grows
+    with the number of cells rather than rows. Duplicate rows of a cell are
+    averaged into one mean that does not carry its row count, so a query over
+    several cells weights each cell once. Text dimensions are held as integer
+    codes shared by all chunks. ``frame`` returns one row per cell with the
+    columns of ``load_fatalities``; ``cube`` the DataCube built from it.
+    """
+
+    def __init__(self):
+        # Text dimension -> {value: code}, in first-seen order
+        self.codes = {column: {} for column in ROW_DIMENSIONS[1:]}
+        self.totals = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def __len__(self):
+        return len(self._compact())
+
+    def _encode(self, column, values):
+        # Map a chunk's values to the shared codes (-1 for missing)
+        categorical = pd.Categorical(values)
+        lookup = self.codes[column]
+        for value in categorical.categories:
+            lookup.setdefault(value, len(lookup))
+        mapping = np.array([lookup[value] for value in categorical.categories] + [-1], dtype=np.int32)
+        return mapping[categorical.codes]
+
+    def add(self, chunk):
+        rates = chunk['Rate'].to_numpy(dtype='float64')
+        percents = chunk['Percent'].to_numpy(dtype='float64')
+        frequencies = chunk['Frequency'].to_numpy(dtype='float64', na_value=np.nan)
+        part = pd.DataFrame({'Year': chunk['Year'].to_numpy(dtype='int16')})
+        for column in ROW_DIMENSIONS[1:]:
+            part[column] = self._encode(column, chunk[column])
+        part['FrequencySum'] = np.nan_to_num(frequencies)
+        part['FrequencyCount'] = (~np.isnan(frequencies)).astype(np.int32)
+        part['RateSum'] = np.nan_to_num(rates)
+        part['RateCount'] = (~np.isnan(rates)).astype(np.int32)
+        part['PercentSum'] = np.nan_to_num(percents)
+        part['PercentCount'] = (~np.isnan(percents)).astype(np.int32)
+        self._pending.append(part.groupby(ROW_DIMENSIONS, sort=False, as_index=False).sum())
+        self._pending_rows += len(self._pending[-1])
+
+        # Merge into the totals once the pending rows outgrow them, so folding
+        # stays linear overall instead of regrouping all totals for every chunk
+        if self.totals is None or self._pending_rows >= len(self.totals):
+            self._compact()
+
+    def _compact(self):
+        if self._pending:
+            parts = self._pending if self.totals is None else [self.totals] + self._pending
+            self.totals = pd.concat(parts, ignore_index=True).groupby(
+                ROW_DIMENSIONS, sort=False, as_index=False
+            ).sum()
+            self._pending, self._pending_rows = [], 0
+        if self.totals is None:
+            return pd.DataFrame(columns=ROW_DIMENSIONS + TOTAL_COLUMNS)
+        return self.totals
+
+    def frame(self):
+        totals = self._compact()
+        df = pd.DataFrame({'Year': totals['Year'].to_numpy(dtype='int16')})
+        for column in ROW_DIMENSIONS[1:]:
+            categories = list(self.codes[column])
+            categorical = pd.Categorical.from_codes(totals[column].to_numpy(dtype=np.int32), categories)
+            # Sorted categories, as read_csv produces them
+            df[column] = categorical.reorder_categories(sorted(categories))
+
+        # Cells in dimension order, so the result does not depend on chunk order
+        order = df.sort_values(ROW_DIMENSIONS, na_position='last', kind='stable').index.to_numpy()
+        df = df.iloc[order].reset_index(drop=True)
+        totals = totals.iloc[order].reset_index(drop=True)
+
+        frequencies = totals['FrequencySum'].to_numpy(dtype='int64')
+        df['Frequency'] = pd.arrays.IntegerArray(
+            frequencies.astype('int32'), totals['FrequencyCount'].to_numpy() == 0
+        )
+        for column in ['Rate', 'Percent']:
+            counts = totals[f'{column}Count'].to_numpy()
+            df[column] = np.where(
+                counts > 0, totals[f'{column}Sum'].to_numpy(dtype='float64') / np.maximum(counts, 1), np.nan
+            )
+        return df
+
+    def cube(self):
+        return DataCube(self.frame())
@@ -0,0 +1,139 @@
+import pandas as pd
+
+CSV_PATH = 'Numbers_and_rates_of_substance-related_fatalities_in_Nova_Scotia.csv'
+RATE_COLUMN = 'Rate per 100,000 population (annualized for quarterly data)'
+
+# Circumstances of death, published as percentages of the year's deaths; releases
+# without them still load (the columns are then empty)
+FILTER_DIMENSIONS = [
+    'Living Situation',
+    'Place of event',
+    'Others present/aware',
+    'Opioids Stimulants Other'
+]
+
+# Low-cardinality text columns, stored as pandas categoricals (integer codes)
+CATEGORICAL_COLUMNS = [
+    'Health Zone of Residence',
+    'Quarter',
+    'Month',
+    'Drug Type',
+    'Manner of Death',
+    'Sex'
+] + FILTER_DIMENSIONS
+
+# Columns every release must have
+REQUIRED_COLUMNS = ['Year'] + CATEGORICAL_COLUMNS[:6] + ['Frequency', RATE_COLUMN]
+
+# Columns the dashboard uses; everything else in the CSV is never read into memory
+USED_COLUMNS = REQUIRED_COLUMNS + FILTER_DIMENSIONS + ['Percent']
+
+# Values the time dimensions may take (besides missing)
+VALID_VALUES = {
+    'Quarter': {'All', 'Q1', 'Q2', 'Q3', 'Q4'},
+    'Month': {'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'}
+}
+
+# Rows per chunk when streaming a CSV
+DEFAULT_CHUNKSIZE = 100000
+
+
+class SchemaError(ValueError):
+    """The CSV does not have the columns the dashboard needs."""
+
+
+def validate_columns(path):
+    # Header check before any rows are parsed
+    columns = {column.strip() for column in pd.read_csv(path, encoding='utf-8-sig', nrows=0).columns}
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise SchemaError(f"{path} is missing required columns: {missing}")
+
+
+def clean_fatalities(df):
+    """Coerce a raw frame to the dashboard's types and drop unusable rows.
+
+    Rows without a Year or Health Zone, with a negative Frequency or with an
+    unknown Quarter or Month are dropped. Returns the cleaned frame and the
+    number of rows dropped.
+    """
+    df.columns = df.columns.str.strip()
+
+    df = df.rename(columns={RATE_COLUMN: 'Rate'})
+    for column in FILTER_DIMENSIONS + ['Percent']:
+        if column not in df.columns:
+            df[column] = pd.Series(pd.NA, index=df.index, dtype='category' if column != 'Percent' else 'float64')
+    df['Rate'] = pd.to_numeric(df['Rate'], errors='coerce').astype('float64')
+    df['Percent'] = pd.to_numeric(df['Percent'], errors='coerce').astype('float64')
+    df['Year'] = pd.to_numeric(df['Year'], errors='coerce')
+    df['Frequency'] = pd.to_numeric(df['Frequency'], errors='coerce').astype('Int32')
+
+    # Filter out rows with missing essential data or invalid values
+    valid = df['Year'].notna() & df['Health Zone of Residence'].notna()
+    valid &= ~(df['Frequency'] < 0).fillna(False)
+    for column, values in VALID_VALUES.items():
+        valid &= df[column].isna() | df[column].isin(values)
+    dropped = int((~valid).sum())
+    df = df[valid].copy()
+    df['Year'] = df['Year'].astype('int16')
+
+    # Drop categories that only appeared on the removed rows
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].cat.remove_unused_categories()
+
+    return df.reset_index(drop=True), dropped
+
+
+def _read_csv(path, **kwargs):
+    return pd.read_csv(
+        path,
+        encoding='utf-8-sig',
+        usecols=lambda column: column.strip() in USED_COLUMNS,
+        dtype={column: 'category' for column in CATEGORICAL_COLUMNS},
+        **kwargs
+    )
+
+
+def load_fatalities(path=CSV_PATH):
+    """Load the fatalities CSV into a compact, typed frame.
+
+    Text dimensions become categoricals, Year is int16, Frequency a nullable
+    Int32 and the long rate column is read as a float64 ``Rate`` column (and
+    Percent as float64, so averages match the published figures). Rows without
+    a Year or Health Zone are dropped.
+    """
+    validate_columns(path)
+    df, dropped = clean_fatalities(_read_csv(path))
+    if dropped:
+        print(f"Dropped {dropped:,} invalid rows")
+    return df
+
+
+def iter_fatalities(path=CSV_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (cleaned chunk, rows dropped) pairs, validating the header first."""
+    validate_columns(path)
+    with _read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield clean_fatalities(chunk)
+
+
+def ingest_fatalities(path=CSV_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream the CSV in chunks, folding each into per-cell totals.
+
+    Peak memory is bounded by the chunk size and the number of distinct
+    (Year, zone, quarter, month, drug, manner, sex) cells, not by the file
+    size. Returns a frame with the columns and types of ``load_fatalities``
+    holding one row per cell.
+    """
+    from data_cube import CubeBuilder
+
+    builder = CubeBuilder()
+    rows = dropped = 0
+    for chunk, chunk_dropped in iter_fatalities(path, chunksize):
+        builder.add(chunk)
+        rows += len(chunk)
+        dropped += chunk_dropped
+
+    print(f"Ingested {rows:,} rows into {len(builder):,} cells"
+          + (f", dropped {dropped:,} invalid rows" if dropped else ""))
+    return builder.frame()
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+
+import dashboard_data
+
+# Time partitions of a CSV release; a changed partition is re-aggregated as a unit
+PARTITION_COLUMNS = ['Year', 'Quarter', 'Month']
+
+# Called with each DataRefresh after the new data is live (e.g. to carry figure caches over)
+refresh_listeners = []
+
+_refresh_lock = threading.Lock()
+
+
+class DataRefresh:
+    """What changed between two loaded datasets."""
+
+    def __init__(self, old_version, new_version, partitions, options_changed):
+        self.old_version = old_version
+        self.new_version = new_version
+        # (Year, Quarter, Month) tuples, with None for a missing Quarter or Month
+        self.partitions = partitions
+        # Zones or drug types were added or removed, so every cached "All" result is stale
+        self.options_changed = options_changed
+        # Sub-year changes also move the rolling windows of the following year
+        self.years = {year for year, _, _ in partitions}
+        self.years |= {year + 1 for year, quarter, month in partitions
+                       if month is not None or quarter not in (None, 'All')}
+
+    def is_stale(self, year_range):
+        """Whether a result covering ``year_range`` may have changed."""
+        if self.options_changed:
+            return True
+        return any(year_range[0] <= year <= year_range[1] for year in self.years)
+
+
+def partition_hashes(df):
+    """Order-independent content hash of every (Year, Quarter, Month) partition."""
+    import pandas as pd
+
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    keys = df[PARTITION_COLUMNS].astype(object).where(df[PARTITION_COLUMNS].notna(), None)
+    # uint64 sums wrap around, which keeps them order independent
+    sums = pd.Series(row_hashes).groupby([keys[column] for column in PARTITION_COLUMNS], dropna=False).sum()
+    return {
+        tuple(None if pd.isna(value) else value for value in key): total
+        for key, total in sums.items()
+    }
+
+
+def changed_partitions(old_df, new_df):
+    # Partitions added, removed or with different rows
+    old_hashes, new_hashes = partition_hashes(old_df), partition_hashes(new_df)
+    return {
+        key for key in old_hashes.keys() | new_hashes.keys()
+        if old_hashes.get(key) != new_hashes.get(key)
+    }
+
+
+def refresh_data(csv_path=None, cache_dir=None):
+    """Reload the CSV and swap in the new data if it changed.
+
+    Only the changed (Year, Quarter, Month) partitions are re-aggregated into
+    the cube; query results for unaffected year ranges are carried over and
+    ``refresh_listeners`` are told what changed. The other indexes (bitmap,
+    population, trends and time series) are rebuilt from the full table, so a
+    refresh costs about as much as building them at startup. Returns the
+    DataRefresh, or None when the file is unchanged.
+    """
+    csv_path = csv_path or dashboard_data.CSV_PATH
+    if cache_dir is None:
+        from data_cache import DEFAULT_CACHE_DIR
+        cache_dir = os.environ.get('DASHBOARD_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+    with _refresh_lock:
+        return _refresh_data(csv_path, cache_dir)
+
+
+def _refresh_data(csv_path, cache_dir):
+    current = dashboard_data.get_data()
+    version = dashboard_data.source_version(csv_path)
+    if version == current.version:
+        return None
+
+    started = time.perf_counter()
+    if current.df.empty:
+        # Nothing to diff against (the previous load failed)
+        data = dashboard_data.load_dashboard_data(csv_path, cache_dir=cache_dir)
+        with dashboard_data._data_lock:
+            dashboard_data._data = data
+        refresh = DataRefresh(current.version, data.version, set(), True)
+        for listener in refresh_listeners:
+            listener(refresh)
+        return refresh
+
+    df = dashboard_data.load_table(csv_path, dashboard_data.GEOJSON_PATH, cache_dir)
+    partitions = changed_partitions(current.df, df)
+    options_changed = (
+        set(df['Health Zone of Residence'].unique()) != set(current.df['Health Zone of Residence'].unique()) or
+        set(df['Drug Type'].unique()) != set(current.df['Drug Type'].unique())
+    )
+    refresh = DataRefresh(current.version, version, partitions, options_changed)
+
+    # Only the yearly and quarterly rows feed the cube; monthly rows have no Sex
+    cube = current.cube.updated(
+        df, {(year, quarter) for year, quarter, month in partitions if month is None and quarter is not None}
+    )
+    query_cache = current.query_engine.cache.filtered(
+        lambda key: not refresh.is_stale(current.query_engine.key_years(key))
+    )
+    data = dashboard_data.DashboardData(df, current.geojson_data, version=version,
+                                        cube=cube, query_cache=query_cache)
+
+    with dashboard_data._data_lock:
+        dashboard_data._data = data
+
+    for listener in refresh_listeners:
+        listener(refresh)
+
+    print(f"Data refreshed in {time.perf_counter() - started:.3f}s: "
+          f"{len(partitions)} changed partitions, years {sorted(refresh.years)}")
+    return refresh
+
+
+class DataWatcher:
+    """Background thread that polls the CSV and refreshes the data when it changes."""
+
+    def __init__(self, csv_path=None, interval=30.0):
+        self.csv_path = csv_path or dashboard_data.CSV_PATH
+        self.interval = interval
+        self.pid = os.getpid()
+        # Unknown until the first poll, which compares content hashes instead
+        self._stat = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='data-watcher', daemon=True)
+
+    def _file_stat(self):
+        # The point events file (if any) is part of the release too
+        paths = [self.csv_path] + ([dashboard_data.POINT_EVENTS_PATH] if dashboard_data.POINT_EVENTS_PATH else [])
+        try:
+            return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+        except OSError:
+            return None
+
+    def check(self):
+        # A cheap stat first; the file is only hashed and parsed when it changed
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return None
+        self._stat = stat
+        return refresh_data(self.csv_path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error refreshing data: {e}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_watcher = None
+
+
+def start_watcher(interval=None):
+    """Start this process's CSV watcher (``DATA_WATCH_INTERVAL`` seconds, 0 disables).
+
+    Safe to call more than once, and again in forked workers, which do not
+    inherit the parent's thread.
+    """
+    global _watcher
+    if interval is None:
+        interval = float(os.environ.get('DATA_WATCH_INTERVAL', 0))
+    if interval <= 0:
+        return None
+    if _watcher is None or _watcher.pid != os.getpid():
+        dashboard_data.get_data()
+        _watcher = DataWatcher(interval=interval).start()
+    return _watcher
@@ -0,0 +1,316 @@
+"""Static snapshot of the dashboard for hosting without a Python server.
+
+Every view is rendered for every combination of its inputs (year ranges, zones,
+drug types and the chart options) and written as gzipped JSON shards next to a
+small JavaScript loader (``static_site/``), e.g.::
+
+    python export_static.py site/
+    python export_static.py site/ --years 2019-2025 --zones "Nova Scotia" --workers 4
+
+Identical results are stored once: index shards map each input combination to
+a content hash, figures live in hash-prefixed shards, and parts every figure
+repeats (the layout template, the map geometry) are moved to ``shared.json.gz``.
+"""
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.graph_objects as go
+
+from figure_payload import trim_floats
+
+STATIC_SITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static_site')
+
+# Figures per figure shard (on average); a lookup downloads one index and one figure shard
+FIGURES_PER_SHARD = 64
+
+# Figure parts identical across many figures, stored once in shared.json.gz
+SHARED_PARTS = [('layout', 'template'), ('data', 'geojson')]
+
+# Inputs of each exported view, in the order the view function takes them
+VIEW_INPUTS = {
+    'key_stats': ['year_range', 'zone', 'drug'],
+    'time_series': ['year_range', 'zone', 'drug', 'granularity', 'window'],
+    'zone_comparison': ['year_range', 'drug'],
+    'drug_distribution': ['year_range', 'zone'],
+    'sex_death': ['year_range', 'drug'],
+    'trend_ranking': ['year_range'],
+    'circumstances': ['year_range', 'zone', 'dimension', 'manner'],
+    'map_header': ['drug'],
+    'map': ['year_range', 'drug'],
+}
+
+# Chart options enumerated besides the data-driven years, zones and drugs
+TIME_SERIES_OPTIONS = [('year', 0)] + [(granularity, window)
+                                       for granularity in ['quarter', 'month'] for window in [0, 3, 6, 12]]
+MANNERS = ['All manners', 'Accident', 'Suicide']
+
+
+def key_part(value):
+    # Must match keyPart in static_site/loader.js
+    if isinstance(value, (list, tuple)):
+        return f"{value[0]}-{value[1]}"
+    return str(value)
+
+
+def export_key(args):
+    return '|'.join(key_part(arg) for arg in args)
+
+
+def view_function(name):
+    import dashboard
+
+    func = getattr(dashboard, f'update_{name}')
+    # Render directly; the export must not fill (or read stale entries from) the figure cache
+    return getattr(func, '__wrapped__', func)
+
+
+def view_grid(name, space):
+    """Argument tuples of view ``name`` over the filter ``space``."""
+    values = {
+        'year_range': space['year_ranges'],
+        'zone': space['zones'],
+        'drug': space['drugs'],
+        'dimension': space['dimensions'],
+        'manner': MANNERS
+    }
+    if name == 'time_series':
+        return [(year_range, zone, drug, granularity, window)
+                for year_range in space['year_ranges'] for zone in space['zones'] for drug in space['drugs']
+                for granularity, window in TIME_SERIES_OPTIONS]
+    return list(itertools.product(*[values[column] for column in VIEW_INPUTS[name]]))
+
+
+def to_json_value(result):
+    # Figures, Dash components and plain values as JSON-compatible data
+    import plotly
+
+    return json.loads(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def extract_shared(value, shared):
+    """Replace the ``SHARED_PARTS`` of a figure with ``{"$shared": hash}`` references."""
+    if not isinstance(value, dict) or 'layout' not in value and 'data' not in value:
+        return value
+
+    def reference(part):
+        serialized = json.dumps(part, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha1(serialized.encode()).hexdigest()[:16]
+        shared[digest] = part
+        return {'$shared': digest}
+
+    for container, field in SHARED_PARTS:
+        parts = value.get(container)
+        for part in parts if isinstance(parts, list) else [parts]:
+            if isinstance(part, dict) and field in part:
+                part[field] = reference(part[field])
+    return value
+
+
+def render_batch(name, grid):
+    """Render one view over part of its grid: (key, serialized result) pairs and shared parts."""
+    func = view_function(name)
+    shared = {}
+    rendered = []
+    for args in grid:
+        if name == 'circumstances':
+            result = func(*args, *[[] for _ in range(4)])
+        else:
+            result = func(*args)
+        if isinstance(result, go.Figure):
+            # As the figure cache stores them for the live dashboard
+            result = trim_floats(result)
+        value = extract_shared(to_json_value(result), shared)
+        rendered.append((export_key(args), json.dumps(value, sort_keys=True, separators=(',', ':'))))
+    return name, rendered, shared
+
+
+def write_gzip_json(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=9) as f:
+        json.dump(value, f, separators=(',', ':'))
+
+
+def check_output_dir(output_dir):
+    # Only an earlier export (or an empty directory) may be replaced
+    if os.path.exists(output_dir) and not os.path.isdir(output_dir):
+        raise ValueError(f"{output_dir} exists and is not a directory")
+    if os.path.isdir(output_dir) and os.listdir(output_dir) and \
+            not os.path.exists(os.path.join(output_dir, 'manifest.json')):
+        raise ValueError(f"{output_dir} is not empty and holds no earlier export (manifest.json); "
+                         f"refusing to replace it")
+
+
+def replace_dir(source, target):
+    # Move the old directory aside first: a rename cannot replace a non-empty directory
+    if os.path.isdir(target):
+        check_output_dir(target)
+        previous = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(target)), prefix='.previous-')
+        os.replace(target, previous)
+        os.replace(source, target)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        os.replace(source, target)
+
+
+def export_static(output_dir, year_span=None, zones=None, drugs=None, views=None, workers=None):
+    """Render every view over the filter space and write the static site to ``output_dir``.
+
+    ``year_span`` (first, last), ``zones`` and ``drugs`` narrow the space; by
+    default every year range, zone and drug type of the loaded data is
+    exported. The site is written next to ``output_dir`` and swapped into
+    place, which only replaces an empty directory or an earlier export.
+    Returns the manifest.
+    """
+    import dashboard
+    from dashboard_data import get_data
+
+    check_output_dir(output_dir)
+    started = time.perf_counter()
+    data = get_data()
+    if data.df.empty:
+        raise RuntimeError("No data to export")
+
+    # Full figures (not patches) for the map, as a static page has no previous figure
+    map_patch_updates, dashboard.MAP_PATCH_UPDATES = dashboard.MAP_PATCH_UPDATES, False
+
+    years = [year for year in data.years
+             if year_span is None or year_span[0] <= year <= year_span[1]]
+    space = {
+        'year_ranges': [[first, last] for first in years for last in years if first <= last],
+        'zones': zones or data.health_zones,
+        'drugs': drugs or data.drug_types,
+        'dimensions': list(dashboard.CIRCUMSTANCE_FILTERS)
+    }
+    views = views or list(VIEW_INPUTS)
+
+    # One batch per view and first year, so workers get even, independent chunks
+    batches = []
+    for name in views:
+        grid = view_grid(name, space)
+        if 'year_range' not in VIEW_INPUTS[name]:
+            batches.append((name, grid))
+            continue
+        for first in years:
+            batch = [args for args in grid if args[0][0] == first]
+            if batch:
+                batches.append((name, batch))
+
+    indexes = {name: {} for name in views}
+    figures = {}
+    shared = {}
+    results = 0
+
+    def collect(batch_result):
+        nonlocal results
+        name, rendered, batch_shared = batch_result
+        shared.update(batch_shared)
+        for key, serialized in rendered:
+            digest = hashlib.sha1(serialized.encode()).hexdigest()[:16]
+            figures.setdefault(digest, serialized)
+            # Indexed by first year (or a single shard), so a lookup fetches one small file
+            shard = key.split('|')[0].split('-')[0] if 'year_range' in VIEW_INPUTS[name] else 'all'
+            indexes[name].setdefault(shard, {})[key] = digest
+            results += 1
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers > 1:
+            # Forked workers share the already loaded data
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for batch_result in pool.map(render_batch, *zip(*batches)):
+                    collect(batch_result)
+        else:
+            for name, grid in batches:
+                collect(render_batch(name, grid))
+    finally:
+        dashboard.MAP_PATCH_UPDATES = map_patch_updates
+
+    # Built in a sibling directory and swapped in, so a failed export leaves the old site intact
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    site_dir = tempfile.mkdtemp(dir=parent, prefix=f'.{os.path.basename(os.path.abspath(output_dir))}-')
+    try:
+        # Figure shards by hash prefix, sized so each holds about FIGURES_PER_SHARD figures
+        prefix_length = max(1, math.ceil(math.log(max(len(figures), 1) / FIGURES_PER_SHARD, 16)))
+        figure_shards = {}
+        for digest, serialized in figures.items():
+            figure_shards.setdefault(digest[:prefix_length], {})[digest] = json.loads(serialized)
+        for prefix, shard in figure_shards.items():
+            write_gzip_json(os.path.join(site_dir, 'figures', f'{prefix}.json.gz'), shard)
+
+        manifest_views = {}
+        for name, shards in indexes.items():
+            for shard, index in shards.items():
+                write_gzip_json(os.path.join(site_dir, 'index', name, f'{shard}.json.gz'), index)
+            manifest_views[name] = {'inputs': VIEW_INPUTS[name], 'shards': sorted(shards)}
+        write_gzip_json(os.path.join(site_dir, 'shared.json.gz'), shared)
+
+        manifest = {
+            'version': data.version,
+            'generated': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'years': years,
+            'zones': space['zones'],
+            'drugs': space['drugs'],
+            'dimensions': space['dimensions'],
+            'manners': MANNERS,
+            'time_series_options': TIME_SERIES_OPTIONS,
+            'figure_prefix_length': prefix_length,
+            'views': manifest_views,
+            'results': results,
+            'unique_results': len(figures)
+        }
+        with open(os.path.join(site_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=1)
+
+        # Loader, page and the plotly.js bundle of the installed plotly, so the site works offline
+        import plotly
+        for filename in os.listdir(STATIC_SITE_DIR):
+            shutil.copy(os.path.join(STATIC_SITE_DIR, filename), site_dir)
+        shutil.copy(os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js'), site_dir)
+
+        # Seeded basemap tiles (the map requests them relative to the page)
+        if dashboard.MAP_BASEMAP == 'local':
+            from tile_cache import TILE_CACHE_DIR
+            if os.path.isdir(TILE_CACHE_DIR):
+                shutil.copytree(TILE_CACHE_DIR, os.path.join(site_dir, 'tiles'))
+    except BaseException:
+        shutil.rmtree(site_dir, ignore_errors=True)
+        raise
+    os.chmod(site_dir, 0o755)
+    replace_dir(site_dir, output_dir)
+
+    print(f"Exported {results:,} results ({len(figures):,} unique, {len(figure_shards)} figure shards) "
+          f"to {output_dir} in {time.perf_counter() - started:.1f}s")
+    return manifest
+
+
+def parse_year_span(value):
+    first, _, last = value.partition('-')
+    return int(first), int(last or first)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the dashboard as a static site.")
+    parser.add_argument('output_dir', help="directory to write the site to (an earlier export there is replaced)")
+    parser.add_argument('--years', type=parse_year_span, help="only ranges within FIRST-LAST, e.g. 2019-2025")
+    parser.add_argument('--zones', nargs='+', help="health zones to export (default: all)")
+    parser.add_argument('--drugs', nargs='+', help="drug types to export (default: all, including 'All')")
+    parser.add_argument('--views', nargs='+', choices=list(VIEW_INPUTS), help="views to export (default: all)")
+    parser.add_argument('--workers', type=int, help="render processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    export_static(args.output_dir, year_span=args.years, zones=args.zones, drugs=args.drugs,
+                  views=args.views, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
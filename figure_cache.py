@@ -0,0 +1,108 @@
+import ast
+import functools
+import json
+import os
+
+import plotly.graph_objects as go
+
+from metrics import phase
+from query_engine import LRUCache
+
+
+class FigureCache:
+    """Cache of serialized Plotly figures keyed by view name and filter values.
+
+    Figures are stored as JSON strings in a bounded in-process LRU and, when a
+    ``directory`` is given and ``diskcache`` is installed, in an on-disk cache
+    shared by every worker process (bounded to ``disk_size_limit`` bytes,
+    least-recently-used eviction). Only complete figures are cached; other
+    return values (e.g. ``dash.Patch``) pass straight through.
+
+    Keys start with the data version returned by ``version`` (a callable), so
+    figures of an older dataset are never served after a refresh; ``carry_over``
+    moves the entries a refresh did not affect to the new version.
+    """
+
+    def __init__(self, maxsize=512, directory=None, disk_size_limit=256 * 1024 * 1024):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.version = lambda: None
+        # Applied to each new figure before it is serialized (e.g. float trimming)
+        self.transform = lambda fig: fig
+        self.disk = None
+        if directory:
+            try:
+                import diskcache
+                self.disk = diskcache.Cache(
+                    directory,
+                    size_limit=disk_size_limit,
+                    eviction_policy='least-recently-used'
+                )
+            except ImportError:
+                print("diskcache is not installed; using the in-process figure cache only")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            maxsize=int(os.environ.get('FIGURE_CACHE_SIZE', 512)),
+            directory=os.environ.get('FIGURE_CACHE_DIR') or None,
+            disk_size_limit=int(os.environ.get('FIGURE_CACHE_DISK_LIMIT', 256 * 1024 * 1024))
+        )
+
+    def get(self, key):
+        serialized = self.memory.get(key)
+        if serialized is None and self.disk is not None:
+            serialized = self.disk.get(repr(key))
+            if serialized is not None:
+                self.memory.put(key, serialized)
+        return serialized
+
+    def put(self, key, serialized):
+        self.memory.put(key, serialized)
+        if self.disk is not None:
+            self.disk.set(repr(key), serialized)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def info(self):
+        return self.memory.info()
+
+    def carry_over(self, old_version, new_version, stale):
+        """Re-key the entries of ``old_version`` to ``new_version``, dropping
+        those whose (version-less) key satisfies ``stale``."""
+        def keep(key):
+            return key[0] == old_version and not stale(key[1:])
+
+        def rekey(key):
+            return (new_version,) + key[1:]
+
+        self.memory = self.memory.filtered(keep, rekey)
+        if self.disk is not None:
+            # Other workers may still be on the old version, so its entries stay
+            for disk_key in list(self.disk.iterkeys()):
+                key = ast.literal_eval(disk_key)
+                if keep(key):
+                    serialized = self.disk.get(disk_key)
+                    if serialized is not None:
+                        self.disk.add(repr(rekey(key)), serialized)
+
+    def cached(self, name):
+        """Decorator caching a callback's figure by data version and its (hashable) arguments."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = (self.version(), name) + tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+                serialized = self.get(key)
+                if serialized is None:
+                    result = func(*args)
+                    if not isinstance(result, go.Figure):
+                        return result
+                    with phase('serialize'):
+                        serialized = self.transform(result).to_json()
+                        self.put(key, serialized)
+                with phase('serialize'):
+                    return json.loads(serialized)
+            return wrapper
+        return decorator
@@ -0,0 +1,98 @@
+import contextlib
+import gzip
+import json
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Template every dashboard figure names; registered once in plotly.io (and shipped
+# once in the clientside payload) instead of expanding plotly_white into each figure
+TEMPLATE_NAME = 'dashboard'
+
+# The parts of plotly_white the dashboard's charts actually show
+TEMPLATE_LAYOUT_KEYS = [
+    'autotypenumbers',
+    'colorway',
+    'font',
+    'hovermode',
+    'hoverlabel',
+    'paper_bgcolor',
+    'plot_bgcolor',
+    'xaxis',
+    'yaxis',
+    'coloraxis',
+    'title'
+]
+TEMPLATE_TRACE_TYPES = ['bar', 'scatter', 'choroplethmapbox']
+
+# Decimal places kept on float data arrays; averaged rates otherwise serialize with
+# up to 17 significant digits (None keeps full precision)
+FLOAT_DECIMALS = int(os.environ['FIGURE_FLOAT_DECIMALS']) if os.environ.get('FIGURE_FLOAT_DECIMALS') else 3
+
+TRIMMED_ATTRIBUTES = ['x', 'y', 'z', 'customdata']
+
+
+def slim_template():
+    """plotly_white reduced to ``TEMPLATE_LAYOUT_KEYS`` and ``TEMPLATE_TRACE_TYPES``."""
+    full = pio.templates['plotly_white'].to_plotly_json()
+    return go.layout.Template(
+        layout={key: full['layout'][key] for key in TEMPLATE_LAYOUT_KEYS if key in full['layout']},
+        data={trace_type: full['data'][trace_type] for trace_type in TEMPLATE_TRACE_TYPES
+              if trace_type in full['data']}
+    )
+
+
+def register_template():
+    """Register the slim template under ``TEMPLATE_NAME``; figures name it explicitly,
+    so plotly's process-wide default template is left alone."""
+    if TEMPLATE_NAME not in pio.templates:
+        pio.templates[TEMPLATE_NAME] = slim_template()
+    return pio.templates[TEMPLATE_NAME]
+
+
+def trim_floats(fig, decimals=None):
+    """Round the float data arrays of every trace to ``decimals`` places, in place."""
+    decimals = FLOAT_DECIMALS if decimals is None else decimals
+    if decimals is None:
+        return fig
+    for trace in fig.data:
+        for attribute in TRIMMED_ATTRIBUTES:
+            values = trace[attribute] if attribute in trace else None
+            if values is None:
+                continue
+            array = np.asarray(values)
+            if array.dtype.kind == 'f':
+                trace[attribute] = np.round(array.astype('float64'), decimals)
+    return fig
+
+
+@contextlib.contextmanager
+def unminimized():
+    """Render figures as before minimization: the full plotly_white template
+    under ``TEMPLATE_NAME`` and untrimmed floats (for size comparisons)."""
+    global FLOAT_DECIMALS
+    register_template()
+    template, decimals = pio.templates[TEMPLATE_NAME], FLOAT_DECIMALS
+    pio.templates[TEMPLATE_NAME], FLOAT_DECIMALS = pio.templates['plotly_white'], None
+    try:
+        yield
+    finally:
+        pio.templates[TEMPLATE_NAME], FLOAT_DECIMALS = template, decimals
+
+
+def payload_sizes(result):
+    """Bytes of a callback result as JSON, gzipped and (if installed) brotli compressed."""
+    import plotly
+
+    serialized = json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder).encode()
+    sizes = {'json': len(serialized), 'gzip': len(gzip.compress(serialized, compresslevel=6))}
+    if brotli is not None:
+        sizes['br'] = len(brotli.compress(serialized, quality=5))
+    return sizes
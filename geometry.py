@@ -0,0 +1,50 @@
+import copy
+
+try:
+    import shapely
+    from shapely.geometry import mapping, shape
+except ImportError:  # shapely ships with geopandas; without it geometry is only quantized
+    shapely = None
+
+
+def _round_coordinates(coordinates, precision):
+    # Coordinates nest arbitrarily deep (Polygon vs MultiPolygon); points are lists of floats
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, precision) for value in coordinates]
+
+    rounded = [_round_coordinates(part, precision) for part in coordinates]
+    if rounded and isinstance(rounded[0], list) and rounded[0] and isinstance(rounded[0][0], float):
+        # Drop consecutive duplicate points created by the rounding
+        rounded = [point for i, point in enumerate(rounded) if i == 0 or point != rounded[i - 1]]
+    return rounded
+
+
+def simplify_geojson(geojson_data, tolerance=0.001, precision=4):
+    """Return a lighter copy of a polygon FeatureCollection for the choropleth map.
+
+    Geometries are simplified with ``tolerance`` (in degrees) and coordinates
+    are quantized to ``precision`` decimal places. With shapely 2.1+ the zones
+    are simplified as a coverage, so shared borders stay shared and no gaps or
+    overlaps appear between neighbouring zones; older shapely versions simplify
+    each zone on its own while preserving its topology.
+    """
+    simplified = copy.deepcopy(geojson_data)
+    features = simplified['features']
+
+    if shapely is not None and tolerance:
+        geometries = [shape(feature['geometry']) for feature in features]
+        if hasattr(shapely, 'coverage_simplify'):
+            geometries = shapely.coverage_simplify(geometries, tolerance)
+        else:
+            geometries = [geometry.simplify(tolerance, preserve_topology=True) for geometry in geometries]
+        if precision is not None:
+            geometries = shapely.set_precision(geometries, 10 ** -precision)
+        for feature, geometry in zip(features, geometries):
+            feature['geometry'] = mapping(geometry)
+
+    if precision is not None:
+        for feature in features:
+            geometry = feature['geometry']
+            geometry['coordinates'] = _round_coordinates(list(geometry['coordinates']), precision)
+
+    return simplified
@@ -0,0 +1,37 @@
+import gc
+import multiprocessing
+import os
+
+# Production serving: `gunicorn -c gunicorn.conf.py`
+wsgi_app = 'dashboard:server'
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8059')
+
+# Multiple processes, each with a small thread pool
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('DASHBOARD_THREADS', 4))
+timeout = 60
+
+# Import dashboard.py (and load its data) once in the master; forked workers
+# share those pages copy-on-write instead of each loading their own copy
+preload_app = True
+
+
+def when_ready(server):
+    # Data loading is lazy, so load it here in the master before forking
+    from dashboard_data import warmup
+    warmup()
+
+    if os.environ.get('FIGURE_CACHE_PREWARM', '0') == '1':
+        from dashboard import prewarm_figure_cache
+        prewarm_figure_cache()
+
+    # Keep the garbage collector from touching (and so copying) the preloaded
+    # objects in every worker
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Threads do not survive the fork, so each worker runs its own CSV watcher
+    from data_refresh import start_watcher
+    start_watcher()
@@ -0,0 +1,244 @@
+import contextlib
+import cProfile
+import functools
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from collections import defaultdict
+
+import flask
+
+# Latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Wall time of a callback is split into these phases; figure_build is whatever
+# is not spent in the others
+PHASES = ('filter', 'aggregate', 'figure_build', 'serialize')
+
+_local = threading.local()
+
+
+class _CallRecord:
+    def __init__(self, name):
+        self.name = name
+        self.phases = defaultdict(float)
+        # Time spent in nested phases, one entry per open phase
+        self.stack = []
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Attribute the enclosed time to ``name`` in the running callback, if any.
+
+    Nested phases are exclusive: time spent in an inner phase (e.g. a filter
+    inside an aggregate) is only counted once, under the inner phase.
+    """
+    record = getattr(_local, 'record', None)
+    if record is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    record.stack.append(0.0)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record.phases[name] += elapsed - record.stack.pop()
+        if record.stack:
+            record.stack[-1] += elapsed
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+class CallbackMetrics:
+    """Per-callback latency, phase, payload and cache metrics for the dashboard.
+
+    Callbacks wrapped with ``instrument`` record their wall time split into
+    ``PHASES``; ``register`` adds request hooks that measure the response size
+    (before and after compression) and the time Dash spends encoding it, and a
+    Prometheus ``/metrics`` route.
+    ``profile_percent`` of callback calls also run under cProfile, with the
+    accumulated statistics served at ``/metrics/profile``.
+    """
+
+    def __init__(self, profile_percent=0.0):
+        self.profile_percent = profile_percent
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.phase_seconds = defaultdict(float)
+        self.response_count = defaultdict(int)
+        self.response_bytes = defaultdict(int)
+        self.response_wire_bytes = defaultdict(int)
+        self.profiled_calls = defaultdict(int)
+        self.profiles = {}
+        # Caches reported on /metrics: name -> callable returning an info() dict
+        self.caches = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(profile_percent=float(os.environ.get('METRICS_PROFILE_PERCENT', 0)))
+
+    def observe(self, name, elapsed, phases):
+        with self._lock:
+            self.calls[name] += 1
+            self.seconds[name] += elapsed
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self.buckets[name][i] += 1
+            for phase_name, seconds in phases.items():
+                self.phase_seconds[name, phase_name] += seconds
+
+    def instrument(self, func):
+        """Wrap a callback so each call is timed and, when sampled, profiled."""
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            record = _CallRecord(name)
+            outer, _local.record = getattr(_local, 'record', None), record
+            profiler = cProfile.Profile() if random.uniform(0, 100) < self.profile_percent else None
+            started = time.perf_counter()
+            try:
+                if profiler is not None:
+                    return profiler.runcall(func, *args)
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                _local.record = outer
+                record.phases['figure_build'] = max(elapsed - sum(record.phases.values()), 0.0)
+                self.observe(name, elapsed, record.phases)
+                if profiler is not None:
+                    self.add_profile(name, profiler)
+                if flask.has_request_context():
+                    flask.g.setdefault('dashboard_callbacks', []).append((name, elapsed))
+
+        return wrapper
+
+    def add_profile(self, name, profiler):
+        with self._lock:
+            self.profiled_calls[name] += 1
+            if name in self.profiles:
+                self.profiles[name].add(profiler)
+            else:
+                self.profiles[name] = pstats.Stats(profiler)
+
+    def register(self, server):
+        """Add the request hooks and the ``/metrics`` routes to a Flask server."""
+        @server.before_request
+        def start_request_timer():
+            flask.g.dashboard_request_started = time.perf_counter()
+
+        @server.after_request
+        def record_response(response):
+            callbacks = flask.g.get('dashboard_callbacks')
+            if not callbacks:
+                return response
+
+            # One label per request: the callback, or "combined" when a single
+            # request ran several views
+            name = callbacks[0][0] if len(callbacks) == 1 else 'combined'
+            wire_size = response.calculate_content_length()
+            if wire_size is None:
+                wire_size = len(response.get_data())
+            # Before compression (see compression.ResponseCompression), if any
+            size = flask.g.get('response_uncompressed_bytes', wire_size)
+            # Whatever the request took beyond the callbacks themselves is Dash
+            # decoding the inputs and encoding the response
+            overhead = time.perf_counter() - flask.g.dashboard_request_started - sum(
+                elapsed for _, elapsed in callbacks
+            )
+            with self._lock:
+                self.response_count[name] += 1
+                self.response_bytes[name] += size
+                self.response_wire_bytes[name] += wire_size
+                self.phase_seconds[name, 'serialize'] += max(overhead, 0.0)
+            return response
+
+        @server.route('/metrics')
+        def prometheus_metrics():
+            return flask.Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+        @server.route('/metrics/profile')
+        def profile_report():
+            return flask.Response(self.render_profiles(), mimetype='text/plain')
+
+    def render(self):
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP dashboard_callback_seconds Callback wall time.',
+                '# TYPE dashboard_callback_seconds histogram'
+            ]
+            for name in sorted(self.calls):
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets[name]):
+                    lines.append(f'dashboard_callback_seconds_bucket{_labels(callback=name, le=bound)} {count}')
+                lines.append(f'dashboard_callback_seconds_bucket{_labels(callback=name, le="+Inf")} {self.calls[name]}')
+                lines.append(f'dashboard_callback_seconds_sum{_labels(callback=name)} {self.seconds[name]:.6f}')
+                lines.append(f'dashboard_callback_seconds_count{_labels(callback=name)} {self.calls[name]}')
+
+            lines += [
+                '# HELP dashboard_callback_phase_seconds_total Callback time by phase.',
+                '# TYPE dashboard_callback_phase_seconds_total counter'
+            ]
+            for (name, phase_name), seconds in sorted(self.phase_seconds.items()):
+                lines.append(
+                    f'dashboard_callback_phase_seconds_total{_labels(callback=name, phase=phase_name)} {seconds:.6f}'
+                )
+
+            lines += [
+                '# HELP dashboard_response_bytes Size of callback responses.',
+                '# TYPE dashboard_response_bytes summary'
+            ]
+            for name in sorted(self.response_count):
+                lines.append(f'dashboard_response_bytes_sum{_labels(callback=name)} {self.response_bytes[name]}')
+                lines.append(f'dashboard_response_bytes_count{_labels(callback=name)} {self.response_count[name]}')
+
+            lines += [
+                '# HELP dashboard_response_wire_bytes Size of callback responses as sent (after compression).',
+                '# TYPE dashboard_response_wire_bytes summary'
+            ]
+            for name in sorted(self.response_count):
+                lines.append(f'dashboard_response_wire_bytes_sum{_labels(callback=name)} {self.response_wire_bytes[name]}')
+                lines.append(f'dashboard_response_wire_bytes_count{_labels(callback=name)} {self.response_count[name]}')
+
+            lines += [
+                '# HELP dashboard_profiled_calls_total Callback calls run under cProfile.',
+                '# TYPE dashboard_profiled_calls_total counter'
+            ]
+            for name in sorted(self.profiled_calls):
+                lines.append(f'dashboard_profiled_calls_total{_labels(callback=name)} {self.profiled_calls[name]}')
+
+        cache_infos = {cache: info() for cache, info in self.caches.items()}
+        for metric, key, kind, help_text in [
+            ('dashboard_cache_hits_total', 'hits', 'counter', 'Cache hits.'),
+            ('dashboard_cache_misses_total', 'misses', 'counter', 'Cache misses.'),
+            ('dashboard_cache_evictions_total', 'evictions', 'counter', 'Cache evictions.'),
+            ('dashboard_cache_entries', 'size', 'gauge', 'Entries currently cached.')
+        ]:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            for cache, info in sorted(cache_infos.items()):
+                if info is not None:
+                    lines.append(f'{metric}{_labels(cache=cache)} {info[key]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def render_profiles(self, limit=30):
+        # Top functions by cumulative time, per profiled callback
+        stream = io.StringIO()
+        with self._lock:
+            if not self.profiles:
+                stream.write("No profiles collected; set METRICS_PROFILE_PERCENT to sample callbacks\n")
+            for name, stats in sorted(self.profiles.items()):
+                stream.write(f"==== {name} ({self.profiled_calls[name]} calls) ====\n")
+                stats.stream = stream
+                stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from data_loader import DEFAULT_CHUNKSIZE
+
+# Columns every point events file must have; Manner of Death is optional
+POINT_EVENT_COLUMNS = ['Year', 'Longitude', 'Latitude', 'Drug Type']
+
+# Zone of the province-wide rows the events are also added to
+PROVINCE = 'Nova Scotia'
+
+
+def assign_zones(frame, index, lon='Longitude', lat='Latitude'):
+    """Health zone of every row's coordinates, as a categorical (missing outside every zone)."""
+    codes = index.assign(frame[lon].to_numpy(dtype=float, na_value=np.nan),
+                         frame[lat].to_numpy(dtype=float, na_value=np.nan))
+    return pd.Categorical.from_codes(codes, categories=index.names)
+
+
+def load_point_events(path, index, chunksize=DEFAULT_CHUNKSIZE):
+    """Deaths per (Year, zone, Drug Type, Manner of Death) from a CSV of point events.
+
+    Each row is one death at (Longitude, Latitude), e.g. a postal code centroid.
+    The file is streamed in chunks and every chunk is assigned to zones at once
+    with ``index`` (a ``ZoneIndex``); points outside every zone are counted and
+    dropped.
+    """
+    header = {column.strip() for column in pd.read_csv(path, encoding='utf-8-sig', nrows=0).columns}
+    missing = [column for column in POINT_EVENT_COLUMNS if column not in header]
+    if missing:
+        from data_loader import SchemaError
+        raise SchemaError(f"{path} is missing required columns: {missing}")
+    columns = POINT_EVENT_COLUMNS + (['Manner of Death'] if 'Manner of Death' in header else [])
+
+    counts = []
+    rows = unassigned = 0
+    with pd.read_csv(path, encoding='utf-8-sig', usecols=lambda column: column.strip() in columns,
+                     chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip()
+            if 'Manner of Death' not in chunk.columns:
+                chunk['Manner of Death'] = pd.NA
+            chunk['Year'] = pd.to_numeric(chunk['Year'], errors='coerce')
+            chunk['Health Zone of Residence'] = assign_zones(chunk, index)
+            valid = chunk['Year'].notna() & chunk['Drug Type'].notna()
+            rows += len(chunk)
+            unassigned += int((valid & chunk['Health Zone of Residence'].isna()).sum())
+            chunk = chunk[valid & chunk['Health Zone of Residence'].notna()]
+            counts.append(chunk.groupby(
+                ['Year', 'Health Zone of Residence', 'Drug Type', 'Manner of Death'], observed=True, dropna=False
+            ).size().rename('Frequency').reset_index())
+
+    counts = (pd.concat(counts, ignore_index=True) if counts else
+              pd.DataFrame(columns=['Year', 'Health Zone of Residence', 'Drug Type', 'Manner of Death', 'Frequency']))
+    counts['Health Zone of Residence'] = counts['Health Zone of Residence'].astype(str)
+    counts = counts.groupby(['Year', 'Health Zone of Residence', 'Drug Type', 'Manner of Death'],
+                            dropna=False).agg(Frequency=('Frequency', 'sum')).reset_index()
+    counts['Year'] = counts['Year'].astype('int16')
+    print(f"Point events: {rows:,} rows, {int(counts['Frequency'].sum()):,} assigned to zones"
+          + (f", {unassigned:,} outside every zone" if unassigned else ""))
+    return counts
+
+
+def fold_point_events(df, counts):
+    """The fatalities table with ``counts`` (from ``load_point_events``) added.
+
+    Events become yearly rows (Quarter "All", Sex "Total") of their zone and of
+    the province, under "All manners" and under their Manner of Death when
+    known. The rows have no Rate, so the cube's sums include them while the
+    published rates (and the populations implied by them) are unchanged.
+    """
+    if counts.empty:
+        return df
+
+    # Every event counts once province-wide and under "All manners"
+    province = counts.assign(**{'Health Zone of Residence': PROVINCE})
+    events = pd.concat([counts, province], ignore_index=True)
+    all_manners = events.assign(**{'Manner of Death': 'All manners'})
+    events = pd.concat([all_manners, events[events['Manner of Death'].notna()]], ignore_index=True)
+    events = events.groupby(['Year', 'Health Zone of Residence', 'Drug Type', 'Manner of Death']).agg(
+        Frequency=('Frequency', 'sum')
+    ).reset_index()
+    events['Quarter'] = 'All'
+    events['Sex'] = 'Total'
+
+    # Same columns and types as the table; categoricals gain any new values
+    categorical = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+    rows = pd.DataFrame(index=events.index)
+    for column in df.columns:
+        if column in events.columns:
+            rows[column] = events[column]
+        else:
+            rows[column] = pd.Series(None, index=events.index,
+                                     dtype=object if column in categorical else df[column].dtype)
+    combined = pd.concat([df.astype({column: 'object' for column in categorical}), rows], ignore_index=True)
+    for column in df.columns:
+        dtype = df[column].dtype
+        if column in categorical:
+            new_values = [value for value in pd.unique(rows[column].dropna()) if value not in dtype.categories]
+            combined[column] = pd.Categorical(combined[column], categories=list(dtype.categories) + new_values)
+        elif column == 'Frequency':
+            # Summed counts of many events may not fit a narrower table's integers
+            total = combined[column].max()
+            combined[column] = combined[column].astype(dtype if total <= np.iinfo(dtype.numpy_dtype).max else 'Int64')
+        else:
+            combined[column] = combined[column].astype(dtype)
+    return combined
@@ -0,0 +1,94 @@
+import numpy as np
+
+from time_series import yearly_population
+
+
+class PopulationIndex:
+    """Yearly population denominators with prefix sums of deaths and person-years.
+
+    Each zone's population is implied by its published yearly counts and rates
+    (``yearly_population``); years without a published rate interpolate
+    linearly between the known years, or take the first or last known year's
+    population outside them. The year axis ends at the last year with yearly
+    rows, so a release's partial final year adds neither deaths nor
+    person-years. Yearly deaths per (zone, drug) come from the cube's "Total"
+    sex, all-manners cells, with an "All" row summing ``drugs``. Both are
+    stored as cumulative sums over a contiguous year axis, so the rate of any
+    year range is Σdeaths / Σpopulation from two subtractions per zone.
+    """
+
+    def __init__(self, df, cube, zones, drugs):
+        self.zone_codes = {zone: code for code, zone in enumerate(zones)}
+        self.drug_codes = {drug: code for code, drug in enumerate(['All'] + list(drugs))}
+        # Years with yearly rows only: a partial year (monthly rows so far) has no
+        # yearly deaths, so its population must not count as person-years
+        yearly = df.loc[df['Quarter'] == 'All', 'Year'] if not df.empty else df['Year']
+        years = sorted(int(year) for year in yearly.unique())
+        self.first_year = years[0] if years else 0
+        self.last_year = years[-1] if years else -1
+        axis = np.arange(self.first_year, self.last_year + 1)
+
+        self.population = np.full((len(zones), len(axis)), np.nan)
+        deaths = np.zeros((len(zones), len(self.drug_codes), len(axis)))
+        for zone, z in self.zone_codes.items():
+            population_years, population = yearly_population(df, zone)
+            if len(population):
+                # Whole people, so the prefix sums below are exact and any range's
+                # person-years equal the plain sum of its years
+                self.population[z] = np.round(np.interp(axis, population_years, population))
+            for drug, d in self.drug_codes.items():
+                cell = cube.cells.get((zone, drug, 'Total', 'All manners', 'All'))
+                if drug == 'All' or cell is None:
+                    continue
+                deaths[z, d, cell['Year'].to_numpy(dtype=np.int64) - self.first_year] = (
+                    cell['Frequency'].to_numpy(dtype=float, na_value=0.0)
+                )
+            deaths[z, 0] = deaths[z, 1:].sum(axis=0)
+
+        # Leading zero column: the sum over years [i, j] is cumulative[..., j + 1] - cumulative[..., i]
+        self.cumulative_deaths = np.concatenate(
+            [np.zeros(deaths.shape[:2] + (1,)), np.cumsum(deaths, axis=2)], axis=2
+        )
+        self.cumulative_population = np.concatenate(
+            [np.zeros((len(zones), 1)), np.cumsum(self.population, axis=1)], axis=1
+        )
+
+    def _span(self, year_range):
+        # Column bounds of the year range on the cumulative axis (clipped to the data)
+        count = self.last_year - self.first_year + 1
+        start = min(max(int(year_range[0]) - self.first_year, 0), count)
+        stop = min(max(int(year_range[1]) - self.first_year + 1, start), count)
+        return start, stop
+
+    def _zones(self, zones):
+        if isinstance(zones, str):
+            zones = [zones]
+        return [self.zone_codes[zone] for zone in zones if zone in self.zone_codes]
+
+    def person_years(self, year_range, zones):
+        """Σpopulation over the years of ``year_range`` for each of ``zones``."""
+        start, stop = self._span(year_range)
+        codes = self._zones(zones)
+        return self.cumulative_population[codes, stop] - self.cumulative_population[codes, start]
+
+    def deaths(self, year_range, zones, drug):
+        """Σdeaths over the years of ``year_range`` for each of ``zones``."""
+        start, stop = self._span(year_range)
+        codes = self._zones(zones)
+        d = self.drug_codes.get(drug)
+        if d is None:
+            return np.zeros(len(codes))
+        return self.cumulative_deaths[codes, d, stop] - self.cumulative_deaths[codes, d, start]
+
+    def yearly_population(self, year_range, zones):
+        """Population of the selected zones combined, for each year of ``year_range``."""
+        start, stop = self._span(year_range)
+        return (np.arange(start, stop) + self.first_year,
+                self.population[self._zones(zones), start:stop].sum(axis=0))
+
+    def rate(self, year_range, zones, drug):
+        """Deaths per 100,000 person-years over the year range and zones combined."""
+        person_years = self.person_years(year_range, zones).sum()
+        if not person_years > 0:
+            return np.nan
+        return self.deaths(year_range, zones, drug).sum() / person_years * 100000
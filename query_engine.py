@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import phase
+
+# Aggregated categories that would double count individual drug types
+EXCLUDED_DRUG_CATEGORIES = [
+    'Opioid - total',
+    'Total - all substances',
+    'Nonpharmaceutical drug (any)'
+]
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache with hit/miss counters.
+
+    ``maxsize`` bounds the number of entries; when full, the least recently
+    used entry is evicted. An optional ``ttl`` (seconds) also expires entries
+    that are older than the given age.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def filtered(self, keep, rekey=None):
+        """A new cache with the same limits and counters holding only the
+        entries whose key satisfies ``keep``, optionally stored under
+        ``rekey(key)``."""
+        cache = LRUCache(maxsize=self.maxsize, ttl=self.ttl)
+        with self._lock:
+            cache.hits, cache.misses, cache.evictions = self.hits, self.misses, self.evictions
+            cache._entries.update(
+                (rekey(key) if rekey else key, entry) for key, entry in self._entries.items() if keep(key)
+            )
+        return cache
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'maxsize': self.maxsize
+        }
+
+
+class QueryEngine:
+    """Shared filter-and-aggregate layer used by every dashboard callback.
+
+    Filters are normalized to a hashable tuple so that callbacks asking for the
+    same (year range, zones, drug, sexes) selection share one cached result.
+    Row-level dimensions outside the cube (circumstances of death) are answered
+    from an optional ``index`` (a BitmapIndex). With a ``population`` index
+    (a PopulationIndex), rates are deaths per 100k person-years rather than
+    means of the published rates. Returned frames are shared between callers
+    and must not be modified.
+    """
+
+    def __init__(self, cube, drug_types, cache_size=256, cache_ttl=None, cache=None, index=None,
+                 population=None):
+        self.cube = cube
+        self.index = index
+        self.population = population
+        self.individual_drug_types = [drug for drug in drug_types
+                                      if drug not in EXCLUDED_DRUG_CATEGORIES]
+        # An existing cache (e.g. the still-valid entries after a data refresh) may be passed in
+        self.cache = cache if cache is not None else LRUCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def resolve_drugs(self, drug):
+        # "All" means every individual drug type, never the aggregated categories
+        if drug == 'All':
+            return tuple(self.individual_drug_types)
+        return (drug,)
+
+    def _normalize(self, year_range, zones, drug, sexes):
+        if isinstance(zones, str):
+            zones = [zones]
+        return (int(year_range[0]), int(year_range[1]), tuple(zones), drug, tuple(sexes))
+
+    def filter(self, year_range, zones, drug, sexes=('Total',)):
+        key = ('filter',) + self._normalize(year_range, zones, drug, sexes)
+        with phase('filter'):
+            result = self.cache.get(key)
+            if result is None:
+                result = self.cube.query(key[1:3], key[3], self.resolve_drugs(drug), sexes=key[5])
+                self.cache.put(key, result)
+        return result
+
+    def aggregate(self, year_range, zones, drug, by, sexes=('Total',)):
+        # Frequency sum and Rate mean grouped by one or more columns; grouped by
+        # year, zone or drug type alone, Rate is Σdeaths / Σpopulation instead
+        if isinstance(by, str):
+            by = [by]
+        key = ('aggregate', tuple(by)) + self._normalize(year_range, zones, drug, sexes)
+        with phase('aggregate'):
+            result = self.cache.get(key)
+            if result is None:
+                filtered_df = self.filter(year_range, zones, drug, sexes)
+                result = filtered_df.groupby(list(by), observed=True).agg({
+                    'Frequency': 'sum',
+                    'Rate': 'mean'
+                }).reset_index()
+                if self.population is not None and key[6] == ('Total',) and len(result):
+                    self._population_rates(result, by, key)
+                self.cache.put(key, result)
+        return result
+
+    def _population_rates(self, result, by, key):
+        # Person-years behind each group of an aggregate, from the population prefix sums
+        import numpy as np
+        import pandas as pd
+
+        year_range, zones = key[2:4], key[4]
+        if by == ['Year']:
+            years, population = self.population.yearly_population(year_range, zones)
+            person_years = pd.Series(population, index=years).reindex(result['Year'].astype(int)).to_numpy()
+        elif by == ['Health Zone of Residence']:
+            person_years = pd.Series(self.population.person_years(year_range, zones), index=list(zones)).reindex(
+                result['Health Zone of Residence'].astype(str)).to_numpy()
+        elif by == ['Drug Type']:
+            person_years = self.population.person_years(year_range, zones).sum()
+        else:
+            return
+        result['Rate'] = result['Frequency'].to_numpy(dtype=float, na_value=np.nan) / person_years * 100000
+
+    def rate(self, year_range, zones, drug):
+        """Deaths per 100,000 person-years for the selection (None without a population index)."""
+        if self.population is None:
+            return None
+        if drug not in self.population.drug_codes:
+            return float('nan')
+        return float(self.population.rate(year_range, zones, drug))
+
+    def circumstances(self, year_range, zones, dimension, filters=None):
+        """Mean Percent by Year and ``dimension`` value over the rows matching
+        every filter (column -> allowed values; empty means any value)."""
+        if isinstance(zones, str):
+            zones = [zones]
+        filters = tuple(sorted(
+            (column, tuple(values)) for column, values in (filters or {}).items() if values
+        ))
+        key = ('circumstances', dimension, int(year_range[0]), int(year_range[1]), tuple(zones), filters)
+        with phase('filter'):
+            result = self.cache.get(key)
+            if result is None:
+                columns = ['Year', dimension, 'Percent']
+                if self.index is None or dimension not in self.index.bitsets:
+                    import pandas as pd
+                    result = pd.DataFrame(columns=columns)
+                else:
+                    selections = dict(filters)
+                    selections['Year'] = range(key[2], key[3] + 1)
+                    selections['Health Zone of Residence'] = key[4]
+                    bits = self.index.select(selections, require=[dimension])
+                    rows = self.index.take(bits, columns)
+                    result = rows.groupby(['Year', dimension], observed=True)['Percent'].mean().reset_index()
+                self.cache.put(key, result)
+        return result
+
+    @staticmethod
+    def key_years(key):
+        # (first, last) year of a cache key built by filter, aggregate or circumstances
+        offset = 1 if key[0] == 'filter' else 2
+        return key[offset], key[offset + 1]
+
+    def cache_info(self):
+        return self.cache.info()
@@ -0,0 +1,155 @@
+import numpy as np
+
+# Grid cell size (degrees) of the zone index
+DEFAULT_CELL_SIZE = 0.02
+
+# Largest (points x edges) crossing matrix built at once
+MAX_BLOCK = 4_000_000
+
+# cell_zone value of cells that polygon edges pass through
+BOUNDARY = -2
+
+
+def _rings(geometry):
+    # Every ring (exteriors and holes) of a Polygon or MultiPolygon, as (n, 2) arrays
+    polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+    for polygon in polygons:
+        for ring in polygon:
+            yield np.asarray(ring, dtype=float)[:, :2]
+
+
+class ZoneIndex:
+    """Grid index over zone polygons for assigning many points to zones at once.
+
+    The zones' bounding box is cut into ``cell_size`` degree cells and every
+    polygon edge is listed under the cells its bounding box overlaps. Cells
+    without edges lie entirely inside one zone (or none), so they are labelled
+    once and their points need no geometry test. A point in a boundary cell is
+    tested with the crossing-number rule against only the edges between it and
+    the next labelled cell to its right, whose label gives the parity to start
+    from; points are tested a block at a time with NumPy broadcasting.
+
+    ``assign`` returns zone codes into ``names`` (``properties[key]`` of each
+    feature), or -1 for points outside every zone.
+    """
+
+    def __init__(self, geojson_data, key='name', cell_size=DEFAULT_CELL_SIZE):
+        self.names = []
+        starts, ends, zones = [], [], []
+        for feature in geojson_data['features']:
+            for ring in _rings(feature['geometry']):
+                starts.append(ring[:-1])
+                ends.append(ring[1:])
+                zones.append(np.full(len(ring) - 1, len(self.names)))
+            self.names.append(feature['properties'][key])
+        start, end = np.concatenate(starts), np.concatenate(ends)
+
+        # Horizontal edges never cross the horizontal test ray
+        sloped = start[:, 1] != end[:, 1]
+        self.x1, self.y1 = start[sloped].T
+        self.x2, self.y2 = end[sloped].T
+        self.edge_zone = np.concatenate(zones)[sloped]
+
+        self.cell_size = cell_size
+        self.x0 = min(self.x1.min(), self.x2.min()) - cell_size
+        self.y0 = min(self.y1.min(), self.y2.min()) - cell_size
+        self.cols = int((max(self.x1.max(), self.x2.max()) - self.x0) // cell_size) + 2
+        self.rows = int((max(self.y1.max(), self.y2.max()) - self.y0) // cell_size) + 2
+
+        # Every (cell, edge) pair, grouped by cell into CSR offsets
+        col0 = self._col(np.minimum(self.x1, self.x2))
+        col1 = self._col(np.maximum(self.x1, self.x2))
+        row0 = self._row(np.minimum(self.y1, self.y2))
+        row1 = self._row(np.maximum(self.y1, self.y2))
+        widths = col1 - col0 + 1
+        counts = widths * (row1 - row0 + 1)
+        edges = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(len(edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (row0[edges] + offsets // widths[edges]) * self.cols + col0[edges] + offsets % widths[edges]
+        order = np.argsort(cells, kind='stable')
+        self.cell_edges = edges[order]
+        self.cell_start = np.searchsorted(cells[order], np.arange(self.rows * self.cols + 1))
+
+        boundary = (np.diff(self.cell_start) > 0).reshape(self.rows, self.cols)
+        self.cell_zone = self._label_cells(boundary).ravel()
+
+        # First cell at or right of each cell (in its row) without edges; cols if none
+        positions = np.where(boundary, self.cols, np.arange(self.cols))
+        self.run_end = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    def _col(self, x):
+        return np.floor((x - self.x0) / self.cell_size).astype(np.int64)
+
+    def _row(self, y):
+        return np.floor((y - self.y0) / self.cell_size).astype(np.int64)
+
+    def _label_cells(self, boundary):
+        # Zone of each edge-free cell from its centre: one scanline per grid row
+        labels = np.full(boundary.shape, BOUNDARY, dtype=np.int64)
+        centres_x = self.x0 + (np.arange(self.cols) + 0.5) * self.cell_size
+        for row in range(self.rows):
+            y = self.y0 + (row + 0.5) * self.cell_size
+            free = ~boundary[row]
+            labels[row, free] = self._classify(centres_x[free], np.full(free.sum(), y),
+                                               np.flatnonzero((self.y1 > y) != (self.y2 > y)), -1)
+        return labels
+
+    def _classify(self, px, py, edges, outside):
+        """Zones of points whose rays to the right cross ``edges`` before reaching
+        a point of zone ``outside`` (-1: no zone)."""
+        zone_count = len(self.names)
+        result = np.empty(len(px), dtype=np.int64)
+        block = max(MAX_BLOCK // max(len(edges), 1), 1)
+        x1, y1, x2, y2 = self.x1[edges], self.y1[edges], self.x2[edges], self.y2[edges]
+        one_hot = np.zeros((len(edges), zone_count), dtype=np.int32)
+        one_hot[np.arange(len(edges)), self.edge_zone[edges]] = 1
+        reference = np.arange(zone_count) == outside
+
+        for first in range(0, len(px), block):
+            bx, by = px[first:first + block, None], py[first:first + block, None]
+            spans = (y1 > by) != (y2 > by)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crossing = x1 + (by - y1) * (x2 - x1) / (y2 - y1)
+            crossings = (spans & (crossing > bx)).astype(np.int32) @ one_hot
+            inside = (crossings % 2 == 1) != reference
+            result[first:first + block] = np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+        return result
+
+    def assign(self, lon, lat):
+        """Zone code (into ``names``) of every point, or -1 outside all zones."""
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        result = np.full(len(lon), -1, dtype=np.int64)
+
+        # Missing coordinates are off the grid
+        finite = np.isfinite(lon) & np.isfinite(lat)
+        col = self._col(np.where(finite, lon, self.x0 - self.cell_size))
+        row = self._row(np.where(finite, lat, self.y0 - self.cell_size))
+        on_grid = np.flatnonzero((col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows))
+        cells = row[on_grid] * self.cols + col[on_grid]
+        labels = self.cell_zone[cells]
+        result[on_grid] = labels
+
+        # Boundary points, one group per cell
+        tested = labels == BOUNDARY
+        points, cells = on_grid[tested], cells[tested]
+        order = np.argsort(cells, kind='stable')
+        points, cells = points[order], cells[order]
+        if not len(cells):
+            return result
+        group_starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+        for first, last in zip(group_starts, np.r_[group_starts[1:], len(cells)]):
+            cell = cells[first]
+            row_start = cell - cell % self.cols
+            end = row_start + self.run_end[cell]
+            # Edges spanning several cells are listed under each, but must count once
+            edges = np.unique(self.cell_edges[self.cell_start[cell]:self.cell_start[end]])
+            outside = self.cell_zone[end] if self.run_end[cell] < self.cols else -1
+            group = points[first:last]
+            result[group] = self._classify(lon[group], lat[group], edges, outside)
+        return result
+
+    def zone_names(self, lon, lat):
+        """Zone name of every point (None outside all zones)."""
+        names = np.array(self.names + [None], dtype=object)
+        return names[self.assign(lon, lat)]
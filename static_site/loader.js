@@ -0,0 +1,100 @@
+// Loader for the static dashboard snapshot written by export_static.py.
+//
+//   const snapshot = await DashboardSnapshot.load('.');
+//   const figure = await snapshot.get('time_series', [[2015, 2025], 'Nova Scotia', 'All', 'year', 0]);
+//
+// A lookup fetches the view's index shard for the first year and the figure
+// shard holding the result; both are cached, so moving the controls around
+// only downloads what has not been seen yet.
+(function (global) {
+    'use strict';
+
+    // Must match key_part in export_static.py
+    function keyPart(value) {
+        return Array.isArray(value) ? value[0] + '-' + value[1] : String(value);
+    }
+
+    async function fetchJson(url) {
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error('Failed to fetch ' + url + ': ' + response.status);
+        }
+        const bytes = new Uint8Array(await response.arrayBuffer());
+        // Hosts that send .gz files with Content-Encoding: gzip have already inflated them
+        if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+            return new Response(stream).json();
+        }
+        return JSON.parse(new TextDecoder().decode(bytes));
+    }
+
+    function resolveShared(value, shared) {
+        // Put back the parts export_static.py stored once in shared.json.gz
+        if (Array.isArray(value)) {
+            return value.map(function (item) { return resolveShared(item, shared); });
+        }
+        if (value && typeof value === 'object') {
+            if (Object.keys(value).length === 1 && '$shared' in value) {
+                return shared[value.$shared];
+            }
+            const resolved = {};
+            Object.keys(value).forEach(function (key) {
+                resolved[key] = resolveShared(value[key], shared);
+            });
+            return resolved;
+        }
+        return value;
+    }
+
+    function DashboardSnapshot(baseUrl, manifest, shared) {
+        this.baseUrl = baseUrl.replace(/\/$/, '');
+        this.manifest = manifest;
+        this.shared = shared;
+        this._files = {};
+    }
+
+    DashboardSnapshot.load = async function (baseUrl) {
+        baseUrl = baseUrl || '.';
+        const manifest = await fetchJson(baseUrl.replace(/\/$/, '') + '/manifest.json?t=' + Date.now());
+        const snapshot = new DashboardSnapshot(baseUrl, manifest, null);
+        snapshot.shared = await snapshot._file('shared.json.gz');
+        return snapshot;
+    };
+
+    DashboardSnapshot.prototype._file = function (path) {
+        // Shards are versioned by the data release, so browsers may cache them freely
+        if (!(path in this._files)) {
+            const url = this.baseUrl + '/' + path + '?v=' + encodeURIComponent(this.manifest.version || '');
+            this._files[path] = fetchJson(url).catch((error) => {
+                delete this._files[path];
+                throw error;
+            });
+        }
+        return this._files[path];
+    };
+
+    DashboardSnapshot.prototype.get = async function (view, args) {
+        const info = this.manifest.views[view];
+        if (!info) {
+            // Not part of this export (see --views)
+            return null;
+        }
+        const key = args.map(keyPart).join('|');
+        const shard = info.inputs[0] === 'year_range' ? String(args[0][0]) : 'all';
+        if (info.shards.indexOf(shard) < 0) {
+            return null;
+        }
+        const index = await this._file('index/' + view + '/' + shard + '.json.gz');
+        const digest = index[key];
+        if (digest === undefined) {
+            return null;
+        }
+        const figures = await this._file('figures/' + digest.slice(0, this.manifest.figure_prefix_length) + '.json.gz');
+        return resolveShared(figures[digest], this.shared);
+    };
+
+    global.DashboardSnapshot = DashboardSnapshot;
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = DashboardSnapshot;
+    }
+})(typeof window !== 'undefined' ? window : globalThis);
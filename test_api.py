@@ -0,0 +1,68 @@
+import io
+
+import pandas as pd
+import pytest
+
+import dashboard
+
+
+def client():
+    return dashboard.create_app(callback_mode='separate', clientside=False).server.test_client()
+
+
+def test_series_matches_the_time_series_chart():
+    response = client().get('/api/v1/series?zone=Central&drug=Cocaine&years=2012-2018')
+    assert response.status_code == 200
+    body = response.get_json()
+
+    figure = dashboard.update_time_series([2012, 2018], 'Central', 'Cocaine')
+    assert body['columns'] == ['Year', 'Frequency', 'Rate']
+    assert [row[0] for row in body['data']] == list(figure['data'][0]['x'])
+    assert [row[1] for row in body['data']] == list(figure['data'][0]['y'])
+    assert response.headers['X-Data-Version'] == body['version']
+
+
+def test_repeats_are_not_modified_until_the_data_version_changes():
+    api_client = client()
+    first = api_client.get('/api/v1/zones?drug=All')
+    assert 'max-age' in first.headers['Cache-Control']
+
+    again = api_client.get('/api/v1/zones?drug=All', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert api_client.get('/api/v1/zones?drug=Cocaine',
+                          headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+
+def test_compressed_revalidation_skips_the_query(monkeypatch):
+    api_client = client()
+    first = api_client.get('/api/v1/trends?years=2009-2025', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+
+    calls = []
+    trends = dashboard.get_data().trends
+    monkeypatch.setattr(trends, 'ranking', lambda *args: calls.append(args))
+    again = api_client.get('/api/v1/trends?years=2009-2025',
+                           headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert calls == []
+
+
+def test_csv_output_and_invalid_parameters():
+    api_client = client()
+    response = api_client.get('/api/v1/drugs?zone=Central&years=2015-2020', headers={'Accept': 'text/csv'})
+    assert response.mimetype == 'text/csv'
+    frame = pd.read_csv(io.StringIO(response.get_data(as_text=True)))
+    assert list(frame.columns) == ['Drug Type', 'Frequency', 'Rate', 'Percent']
+    assert frame['Percent'].sum() == pytest.approx(100, abs=0.01)
+
+    assert api_client.get('/api/v1/series?zone=Nowhere').status_code == 400
+    assert api_client.get('/api/v1/zones?years=2020-2010').status_code == 400
+
+
+def test_trends_match_the_ranking_view():
+    body = client().get('/api/v1/trends?years=2009-2025').get_json()
+    drug = body['columns'].index('Drug Type')
+    table = dashboard.update_trend_ranking([2009, 2025])[1]
+    assert [row[drug] for row in body['data'][:len(table.data)]] == [record['Drug Type'] for record in table.data]
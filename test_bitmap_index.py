@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex
+from data_cube import DataCube
+from query_engine import QueryEngine
+
+
+def make_df():
+    # 70 rows so the bitsets span more than one 64-bit word
+    rows = 70
+    return pd.DataFrame({
+        'Year': np.arange(rows) % 5 + 2019,
+        'Health Zone of Residence': ['Nova Scotia'] * rows,
+        'Manner of Death': pd.Categorical(np.where(np.arange(rows) % 2, 'Accident', 'All manners')),
+        'Place of event': pd.Categorical([['Personal residence', 'Other/unknown', None][i % 3] for i in range(rows)]),
+        'Percent': np.arange(rows, dtype='float32')
+    })
+
+
+def test_selection_is_the_and_of_value_bitsets():
+    df = make_df()
+    index = BitmapIndex(df, ['Year', 'Manner of Death', 'Place of event'])
+
+    bits = index.select({'Year': range(2020, 2022), 'Manner of Death': ['Accident'], 'Place of event': []},
+                        require=['Place of event'])
+    expected = (df['Year'].between(2020, 2021) & (df['Manner of Death'] == 'Accident') &
+                df['Place of event'].notna())
+
+    assert index.positions(bits).tolist() == np.flatnonzero(expected).tolist()
+    assert index.count(index.select({'Place of event': ['Personal residence', 'Other/unknown']})) == \
+        df['Place of event'].notna().sum()
+
+
+def test_circumstances_are_memoized_per_filter_combination():
+    df = make_df()
+    index = BitmapIndex(df, ['Year', 'Health Zone of Residence', 'Manner of Death', 'Place of event'])
+    engine = QueryEngine(DataCube(df.iloc[0:0]), [], index=index)
+
+    result = engine.circumstances([2019, 2023], 'Nova Scotia', 'Place of event', {'Manner of Death': ['All manners']})
+    rows = df[(df['Manner of Death'] == 'All manners') & df['Place of event'].notna()]
+    expected = rows.groupby(['Year', 'Place of event'], observed=True)['Percent'].mean()
+
+    np.testing.assert_allclose(result['Percent'], expected.to_numpy())
+    engine.circumstances([2019, 2023], ['Nova Scotia'], 'Place of event', {'Manner of Death': ('All manners',)})
+    assert engine.cache_info()['hits'] == 1
@@ -0,0 +1,53 @@
+import base64
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from clientside_payload import build_clientside_payload
+from data_cube import DataCube
+
+
+def decode(column):
+    return np.frombuffer(base64.b64decode(column['data']), dtype=np.dtype(column['dtype']).newbyteorder('<'))
+
+
+def test_payload_dictionary_encodes_yearly_totals():
+    df = pd.DataFrame({
+        'Year': [2020, 2021, 2020],
+        'Health Zone of Residence': ['Central', 'Central', 'Eastern'],
+        'Drug Type': ['Cocaine', 'Cocaine', 'Ethanol'],
+        'Sex': ['Total'] * 3,
+        'Manner of Death': ['All manners'] * 3,
+        'Quarter': ['All'] * 3,
+        'Frequency': [3, 4, 1],
+        'Rate': [1.5, 2.0, 0.25]
+    })
+
+    payload = build_clientside_payload(DataCube(df), ['Central', 'Eastern'], ['Cocaine', 'Ethanol'], {})
+    columns = {name: decode(column) for name, column in payload['columns'].items()}
+
+    assert columns['year'].tolist() == [2020, 2021, 2020]
+    assert columns['frequency'].tolist() == [3, 4, 1]
+    assert columns['rate'].tolist() == [1.5, 2.0, 0.25]
+    assert [payload['zones'][code] for code in columns['zone']] == ['Central', 'Central', 'Eastern']
+    assert [payload['drugs'][code] for code in columns['drug']] == ['Cocaine', 'Cocaine', 'Ethanol']
+
+
+def test_clientside_format_fixed_matches_python():
+    node = shutil.which('node')
+    if node is None:
+        pytest.skip('node is not installed')
+    values = [0.05, 0.25, 0.35, 1.15, 2.45, 13.25, 13.35, -0.25, -1.15, 7.0, 0.0, 12.349999]
+    script = (
+        "global.window = {}; require(%s); "
+        "console.log(JSON.stringify(%s.map(v => window.dash_clientside.dashboard.formatFixed(v, 1))));"
+        % (json.dumps(str(Path(__file__).parent / 'assets' / 'clientside.js')), json.dumps(values))
+    )
+    output = subprocess.run([node, '-e', script], capture_output=True, text=True, check=True).stdout
+
+    assert json.loads(output) == ['%.1f' % value for value in values]
@@ -0,0 +1,69 @@
+import gzip
+
+import flask
+
+from compression import ResponseCompression, choose_encoding
+
+
+def make_server(body, **headers):
+    server = flask.Flask(__name__)
+
+    @server.route('/page')
+    def page():
+        response = flask.Response(body, mimetype='application/json')
+        response.headers.update(headers)
+        return response
+
+    ResponseCompression(min_size=100).register(server)
+    return server.test_client()
+
+
+def test_choose_encoding_follows_preference_and_q_values():
+    assert choose_encoding('gzip, deflate, br', ['br', 'gzip']) == 'br'
+    assert choose_encoding('gzip;q=0.5, br;q=0', ['br', 'gzip']) == 'gzip'
+    assert choose_encoding('identity', ['br', 'gzip']) is None
+    assert choose_encoding('*', ['gzip']) == 'gzip'
+
+
+def test_large_responses_are_gzipped_and_small_ones_are_not():
+    body = '{"values": [' + ', '.join(['1.5'] * 200) + ']}'
+    client = make_server(body)
+
+    response = client.get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()).decode() == body
+
+    assert 'Content-Encoding' not in client.get('/page').headers
+    assert 'Content-Encoding' not in make_server('{}').get('/page', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_each_encoding_has_its_own_etag():
+    body = '{"values": [' + ', '.join(['1.5'] * 200) + ']}'
+    client = make_server(body, ETag='"abc"')
+
+    plain = client.get('/page')
+    gzipped = client.get('/page', headers={'Accept-Encoding': 'gzip'})
+    assert plain.headers['ETag'] == '"abc"'
+    assert gzipped.headers['ETag'] == '"abc-gzip"'
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+
+    again = client.get('/page', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"abc-gzip"'})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == '"abc-gzip"'
+    # The gzip tag does not validate the identity body
+    assert client.get('/page', headers={'If-None-Match': '"abc-gzip"'}).status_code == 200
+
+
+def test_dash_bundles_keep_their_etag_for_304s():
+    import dashboard
+
+    client = dashboard.create_app(callback_mode='separate', clientside=False).server.test_client()
+    url = '/_dash-component-suites/dash/dcc/dash_core_components-shared.js'
+    first = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+
+    again = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
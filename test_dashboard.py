@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+
+import dash
+import pytest
+
+import dashboard
+
+
+def test_combined_update_skips_views_that_ignore_changed_input():
+    results = dashboard.update_dashboard([2015, 2020], 'Central', 'All', changed_inputs={'zone-dropdown'})
+
+    outputs = []
+    for func, view_outputs, _ in dashboard.dashboard_views:
+        count = len(view_outputs) if isinstance(view_outputs, list) else 1
+        outputs.extend([func.__name__] * count)
+
+    skipped = {name for name, value in zip(outputs, results) if value is dash.no_update}
+    assert skipped == {'update_zone_comparison', 'update_sex_death', 'update_trend_ranking', 'update_map_header',
+                       'update_map'}
+
+
+def test_combined_update_matches_separate_callbacks_on_initial_load():
+    results = dashboard.update_dashboard([2015, 2020], 'Central', 'Cocaine')
+
+    assert tuple(results[:5]) == dashboard.update_key_stats([2015, 2020], 'Central', 'Cocaine')
+    assert not any(value is dash.no_update for value in results)
+
+
+def test_circumstance_filter_applies_to_the_charted_dimension():
+    def traces(dimension, living_situation=(), place_of_event=()):
+        view = getattr(dashboard.update_circumstances, '__wrapped__', dashboard.update_circumstances)
+        figure = view([2019, 2024], 'Nova Scotia', dimension, 'All manners',
+                      list(living_situation), list(place_of_event), [], [])
+        return [trace.name for trace in figure.data]
+
+    assert traces('Place of event', place_of_event=['Personal residence']) == ['Personal residence']
+    # Rows hold one circumstance each, so another dimension's filter is ignored rather than emptying the chart
+    assert traces('Place of event', living_situation=['Private dwelling']) == traces('Place of event')
+    assert dashboard.update_circumstance_filters('Place of event') == [True, False, True, True]
+
+
+def test_import_is_lazy_and_within_budget():
+    # Importing the app must not load data or pull in pandas/plotly.express
+    budget = float(os.environ.get('DASHBOARD_IMPORT_BUDGET', 5.0))
+    code = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        "import dashboard, dashboard_data\n"
+        "elapsed = time.perf_counter() - started\n"
+        "print(elapsed, dashboard_data._data is None, 'pandas' in sys.modules, 'plotly.express' in sys.modules)\n"
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    elapsed, not_loaded, pandas_imported, express_imported = output.split()
+
+    assert not_loaded == 'True'
+    assert pandas_imported == 'False'
+    assert express_imported == 'False'
+    assert float(elapsed) < budget
+
+
+def test_background_map_runs_in_a_job_cancelled_by_the_year_slider(tmp_path, monkeypatch):
+    pytest.importorskip('multiprocess')
+    pytest.importorskip('diskcache')
+    import time
+
+    monkeypatch.setattr(dashboard, 'BACKGROUND_CACHE_DIR', str(tmp_path))
+    app = dashboard.create_app(callback_mode='combined', clientside=False, background=True)
+    client = app.server.test_client()
+    client.get('/')
+
+    callback_id = next(key for key in app.callback_map if key.startswith('map.figure'))
+    spec = app.callback_map[callback_id]['long']
+    assert [cancel['id'] for cancel in spec['cancel']] == ['year-slider']
+    # The combined callback no longer includes the map
+    assert not any('map.figure' in key for key in app.callback_map if key != callback_id)
+
+    body = {
+        'output': callback_id,
+        'outputs': {'id': 'map', 'property': 'figure'},
+        'inputs': [{'id': 'year-slider', 'property': 'value', 'value': [2012, 2018]},
+                   {'id': 'drug-dropdown', 'property': 'value', 'value': 'Cocaine'}],
+        'changedPropIds': ['year-slider.value'],
+        'state': []
+    }
+    job = client.post('/_dash-update-component', json=body).get_json()
+    deadline = time.time() + 30
+    while True:
+        # Polled like the browser does until the job has written its result
+        result = client.post(f"/_dash-update-component?cacheKey={job['cacheKey']}&job={job['job']}",
+                             json=body).get_json()
+        if 'response' in result or time.time() > deadline:
+            break
+        time.sleep(0.1)
+
+    figure = result['response']['map']['figure']
+    assert figure['layout']['title']['text'] == dashboard.update_map([2012, 2018], 'Cocaine')['layout']['title']['text']
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from data_cache import cached_fatalities, read_frame, write_frame
+from data_loader import CSV_PATH, load_fatalities
+
+
+def test_frame_round_trip_keeps_dtypes(tmp_path):
+    df = load_fatalities(CSV_PATH)
+    write_frame(df, str(tmp_path / 'frame'))
+
+    pd.testing.assert_frame_equal(read_frame(str(tmp_path / 'frame')), df)
+
+
+def memory_map(array):
+    # The np.memmap an array is a view of, if any
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array
+
+
+def test_read_frame_keeps_columns_memory_mapped(tmp_path):
+    path = tmp_path / 'frame'
+    write_frame(load_fatalities(CSV_PATH), str(path))
+    df = read_frame(str(path))
+
+    # Plain, categorical and nullable columns are views of their column files
+    for column, values in [('Rate', df['Rate'].to_numpy()),
+                           ('Drug Type', df['Drug Type'].cat.codes.to_numpy()),
+                           ('Frequency', df['Frequency'].array._data)]:
+        mapped = memory_map(values)
+        assert mapped is not None and np.shares_memory(values, mapped)
+        assert mapped.filename == str(path / f'{df.columns.get_loc(column)}.npy')
+
+
+def test_cached_fatalities_reuses_artifact(tmp_path):
+    first = cached_fatalities(CSV_PATH, str(tmp_path))
+    artifacts = list(tmp_path.iterdir())
+    second = cached_fatalities(CSV_PATH, str(tmp_path))
+
+    assert len(artifacts) == 1
+    assert list(tmp_path.iterdir()) == artifacts
+    pd.testing.assert_frame_equal(first, second)
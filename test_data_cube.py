@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from data_cube import DataCube
+
+CSV_PATH = 'Numbers_and_rates_of_substance-related_fatalities_in_Nova_Scotia.csv'
+
+
+@pytest.fixture(scope='module')
+def df():
+    df = pd.read_csv(CSV_PATH, encoding='utf-8-sig')
+    df.columns = df.columns.str.strip()
+    df['Rate'] = pd.to_numeric(df['Rate per 100,000 population (annualized for quarterly data)'], errors='coerce')
+    return df.dropna(subset=['Year', 'Health Zone of Residence'])
+
+
+def test_query_matches_row_mask(df):
+    cube = DataCube(df)
+    result = cube.query([2015, 2020], ['Central', 'Eastern'], ['Cocaine', 'Ethanol'])
+
+    expected = df[
+        (df['Year'] >= 2015) &
+        (df['Year'] <= 2020) &
+        (df['Health Zone of Residence'].isin(['Central', 'Eastern'])) &
+        (df['Drug Type'].isin(['Cocaine', 'Ethanol'])) &
+        (df['Quarter'] == 'All') &
+        (df['Manner of Death'] == 'All manners') &
+        (df['Sex'] == 'Total')
+    ]
+
+    assert len(result) == len(expected)
+    assert result['Frequency'].sum() == expected['Frequency'].sum()
+    assert result['Rate'].mean() == pytest.approx(expected['Rate'].mean())
+
+
+def test_query_missing_cells_is_empty(df):
+    cube = DataCube(df)
+    result = cube.query([2015, 2020], ['Atlantis'], ['Cocaine'])
+
+    assert result.empty
+    assert 'Frequency' in result.columns
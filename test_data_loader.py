@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import CATEGORICAL_COLUMNS, CSV_PATH, SchemaError, ingest_fatalities, load_fatalities
+
+
+def test_load_fatalities_uses_compact_dtypes():
+    df = load_fatalities(CSV_PATH)
+
+    assert set(df.columns) == {'Year', 'Frequency', 'Rate', 'Percent'} | set(CATEGORICAL_COLUMNS)
+    assert all(df[column].dtype == 'category' for column in CATEGORICAL_COLUMNS)
+    assert df['Year'].dtype == 'int16'
+    assert df['Frequency'].dtype == 'Int32'
+    assert df['Rate'].dtype == 'float64'
+    assert df['Percent'].dtype == 'float64'
+    assert df['Health Zone of Residence'].notna().all()
+
+
+def test_ingest_folds_chunks_into_the_same_cube():
+    from data_cube import DataCube
+
+    loaded = DataCube(load_fatalities(CSV_PATH))
+    streamed = DataCube(ingest_fatalities(CSV_PATH, chunksize=1000))
+
+    assert streamed.cells.keys() == loaded.cells.keys()
+    for key, cell in loaded.cells.items():
+        assert streamed.cells[key]['Frequency'].tolist() == cell['Frequency'].tolist()
+        np.testing.assert_allclose(streamed.cells[key]['Rate'], cell['Rate'])
+
+
+def test_missing_columns_are_rejected(tmp_path):
+    path = tmp_path / 'partial.csv'
+    pd.read_csv(CSV_PATH, encoding='utf-8-sig', nrows=5).drop(columns=['Sex']).to_csv(path, index=False)
+
+    with pytest.raises(SchemaError, match='Sex'):
+        ingest_fatalities(str(path))
+
+
+def test_counts_above_int16_are_kept(tmp_path):
+    path = tmp_path / 'national.csv'
+    df = pd.read_csv(CSV_PATH, encoding='utf-8-sig', nrows=5)
+    df['Frequency'] = 40000
+    df.to_csv(path, index=False)
+
+    assert load_fatalities(str(path))['Frequency'].tolist() == [40000] * 5
+    assert ingest_fatalities(str(path))['Frequency'].sum() == 200000
@@ -0,0 +1,40 @@
+import shutil
+
+import pandas as pd
+
+import dashboard
+import dashboard_data
+import data_refresh
+from data_cube import DataCube
+from data_loader import CSV_PATH
+
+
+def test_refresh_rebuilds_changed_partitions_only(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'fatalities.csv')
+    shutil.copy(CSV_PATH, csv_path)
+    monkeypatch.setattr(dashboard_data, '_data', dashboard_data.load_dashboard_data(csv_path, cache_dir=''))
+    old = dashboard_data.get_data()
+    old.query_engine.aggregate([2009, 2012], 'Central', 'All', 'Year')
+    dashboard.update_zone_comparison([2009, 2012], 'All')
+    dashboard.update_zone_comparison([2020, 2024], 'All')
+
+    raw = pd.read_csv(CSV_PATH, encoding='utf-8-sig')
+    raw.loc[(raw['Year'] == 2023) & (raw['Health Zone of Residence'] == 'Central'), 'Frequency'] += 1
+    raw.to_csv(csv_path, index=False, encoding='utf-8-sig')
+
+    refresh = data_refresh.refresh_data(csv_path, cache_dir='')
+    new = dashboard_data.get_data()
+
+    assert refresh.partitions == {(2023, 'All', None)}
+    assert new is not old and new.version != old.version
+    # Incremental cube equals a full rebuild
+    full = DataCube(new.df)
+    assert full.cells.keys() == new.cube.cells.keys()
+    for key, cell in full.cells.items():
+        pd.testing.assert_frame_equal(cell, new.cube.cells[key], check_dtype=False)
+    # Unaffected results survive, affected ones are recomputed
+    kept = [new.query_engine.key_years(key) for key in new.query_engine.cache._entries]
+    assert kept and all(year_range == (2009, 2012) for year_range in kept)
+    assert dashboard.figure_cache.get((new.version, 'zone_comparison', (2009, 2012), 'All')) is not None
+    assert dashboard.figure_cache.get((new.version, 'zone_comparison', (2020, 2024), 'All')) is None
+    assert data_refresh.refresh_data(csv_path, cache_dir='') is None
@@ -0,0 +1,61 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from export_static import export_static
+
+
+def read(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_export_deduplicates_and_resolves_every_key(tmp_path):
+    output_dir = str(tmp_path / 'site')
+    manifest = export_static(output_dir, year_span=(2024, 2025), zones=['Nova Scotia', 'Central'],
+                             drugs=['All'], views=['key_stats', 'time_series', 'map_header'], workers=1)
+
+    shared = read(os.path.join(output_dir, 'shared.json.gz'))
+    indexes = {}
+    for view, info in manifest['views'].items():
+        for shard in info['shards']:
+            indexes.update({(view, key): digest for key, digest in
+                            read(os.path.join(output_dir, 'index', view, f'{shard}.json.gz')).items()})
+
+    # 3 year ranges x 2 zones x 9 granularity/window options, plus stats and the header
+    assert len(indexes) == manifest['results'] == 3 * 2 * 9 + 3 * 2 + 1
+    # Sub-year series are only published province-wide, so Central's are stored once with them
+    assert indexes['time_series', '2024-2025|Central|All|month|12'] == \
+        indexes['time_series', '2024-2025|Nova Scotia|All|month|12']
+    assert manifest['unique_results'] < manifest['results']
+
+    prefix_length = manifest['figure_prefix_length']
+    for (view, key), digest in indexes.items():
+        result = read(os.path.join(output_dir, 'figures', f'{digest[:prefix_length]}.json.gz'))[digest]
+        if view == 'time_series':
+            assert result['layout']['template']['$shared'] in shared
+    assert {'index.html', 'loader.js', 'plotly.min.js', 'manifest.json'} <= set(os.listdir(output_dir))
+
+
+def test_export_only_replaces_an_earlier_export(tmp_path):
+    output_dir = tmp_path / 'site'
+    output_dir.mkdir()
+    (output_dir / 'notes.txt').write_text('keep me')
+
+    with pytest.raises(ValueError, match='no earlier export'):
+        export_static(str(output_dir), year_span=(2025, 2025), zones=['Nova Scotia'], drugs=['All'],
+                      views=['map_header'], workers=1)
+    assert os.listdir(output_dir) == ['notes.txt']
+
+    # A directory holding an earlier export is swapped for the new one
+    (output_dir / 'notes.txt').unlink()
+    export_static(str(output_dir), year_span=(2025, 2025), zones=['Nova Scotia'], drugs=['All'],
+                  views=['map_header'], workers=1)
+    (output_dir / 'stale.json').write_text('{}')
+    export_static(str(output_dir), year_span=(2025, 2025), zones=['Nova Scotia'], drugs=['All'],
+                  views=['map_header'], workers=1)
+    assert 'stale.json' not in os.listdir(output_dir)
+    assert 'manifest.json' in os.listdir(output_dir)
+    assert sorted(os.listdir(tmp_path)) == ['site']
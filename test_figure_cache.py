@@ -0,0 +1,41 @@
+import plotly.graph_objects as go
+import pytest
+
+from figure_cache import FigureCache
+
+
+def test_cached_figure_is_built_once():
+    calls = []
+    cache = FigureCache(maxsize=4)
+
+    @cache.cached('bars')
+    def build(year_range, drug):
+        calls.append((tuple(year_range), drug))
+        return go.Figure(go.Bar(x=['a'], y=[year_range[0]]))
+
+    first = build([2010, 2020], 'All')
+    second = build([2010, 2020], 'All')
+
+    assert calls == [((2010, 2020), 'All')]
+    assert first == second
+    assert first['data'][0]['y'] == [2010]
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    pytest.importorskip('diskcache')
+
+    FigureCache(maxsize=4, directory=str(tmp_path)).put(('bars', 2010), '{"data": []}')
+    shared = FigureCache(maxsize=4, directory=str(tmp_path))
+
+    assert shared.get(('bars', 2010)) == '{"data": []}'
+
+
+def test_non_figure_results_are_not_cached():
+    cache = FigureCache(maxsize=4)
+
+    @cache.cached('patch')
+    def build(value):
+        return {'operations': [value]}
+
+    assert build(1) == {'operations': [1]}
+    assert cache.info()['size'] == 0
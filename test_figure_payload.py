@@ -0,0 +1,34 @@
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from figure_payload import TEMPLATE_NAME, payload_sizes, register_template, trim_floats, unminimized
+
+
+def test_trim_floats_rounds_float_arrays_only():
+    fig = go.Figure(go.Scatter(x=['a', 'b'], y=[1, 2], customdata=[1.23456, 2.5]))
+    trim_floats(fig, decimals=2)
+
+    assert list(fig.data[0].customdata) == [1.23, 2.5]
+    assert list(fig.data[0].x) == ['a', 'b']
+    assert list(fig.data[0].y) == [1, 2]
+
+
+def test_named_template_is_smaller_than_plotly_white():
+    register_template()
+
+    def size():
+        return payload_sizes(go.Figure(go.Bar(x=[1], y=[2]), layout={'template': TEMPLATE_NAME}))['json']
+
+    slim = size()
+    with unminimized():
+        full = size()
+    assert slim < full
+    assert pio.templates[TEMPLATE_NAME].layout.colorway == pio.templates['plotly_white'].layout.colorway
+
+
+def test_importing_the_dashboard_leaves_the_default_template_alone():
+    default = pio.templates.default
+    import dashboard
+
+    assert pio.templates.default == default != TEMPLATE_NAME
+    assert dashboard.empty_figure().layout.template == pio.templates[TEMPLATE_NAME]
@@ -0,0 +1,20 @@
+import json
+
+from geometry import simplify_geojson
+
+GEOJSON_PATH = 'Nova Scotia Health Authority Management Zones.geojson'
+
+
+def test_simplify_geojson_shrinks_and_quantizes():
+    with open(GEOJSON_PATH, 'r') as f:
+        geojson_data = json.load(f)
+
+    simplified = simplify_geojson(geojson_data, tolerance=0.001, precision=4)
+
+    assert len(json.dumps(simplified)) < len(json.dumps(geojson_data)) / 10
+    assert [f['properties']['name'] for f in simplified['features']] == \
+        [f['properties']['name'] for f in geojson_data['features']]
+
+    ring = simplified['features'][0]['geometry']['coordinates'][0][0]
+    assert ring[0] == ring[-1]
+    assert all(round(value, 4) == value for point in ring for value in point)
@@ -0,0 +1,60 @@
+import dashboard
+from metrics import CallbackMetrics, phase
+
+
+def dash_update(client, output, inputs):
+    return client.post('/_dash-update-component', json={
+        'output': output,
+        'outputs': {'id': output.split('.')[0], 'property': output.split('.')[1]},
+        'inputs': [{'id': name, 'property': 'value', 'value': value} for name, value in inputs.items()],
+        'changedPropIds': [f'{name}.value' for name in inputs],
+        'state': []
+    })
+
+
+def test_phases_are_exclusive_and_the_rest_is_figure_build():
+    metrics = CallbackMetrics()
+
+    def view():
+        with phase('aggregate'):
+            with phase('filter'):
+                pass
+        return 'done'
+
+    assert metrics.instrument(view)() == 'done'
+    phases = {name: seconds for (callback, name), seconds in metrics.phase_seconds.items() if callback == 'view'}
+    assert set(phases) == {'filter', 'aggregate', 'figure_build'}
+    assert metrics.calls['view'] == 1
+
+
+def test_metrics_route_reports_callback_latency_bytes_and_caches():
+    app = dashboard.create_app(callback_mode='separate', clientside=False)
+    client = app.server.test_client()
+    client.get('/')
+
+    response = dash_update(client, 'map.figure', {'year-slider': [2012, 2018], 'drug-dropdown': 'Cocaine'})
+    assert response.status_code == 200
+    size = len(response.get_data())
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'dashboard_callback_seconds_count{callback="update_map"}' in text
+    assert 'dashboard_callback_phase_seconds_total{callback="update_map",phase="aggregate"}' in text
+    assert 'dashboard_callback_phase_seconds_total{callback="update_map",phase="serialize"}' in text
+    assert 'dashboard_cache_hits_total{cache="query"}' in text
+    reported = {line.split()[0]: float(line.split()[1]) for line in text.splitlines() if not line.startswith('#')}
+    assert reported['dashboard_response_bytes_sum{callback="update_map"}'] >= size
+
+
+def test_metrics_report_compressed_and_uncompressed_response_bytes():
+    app = dashboard.create_app(callback_mode='separate', clientside=False)
+    client = app.server.test_client()
+    client.get('/')
+
+    client.environ_base['HTTP_ACCEPT_ENCODING'] = 'gzip'
+    response = dash_update(client, 'map.figure', {'year-slider': [2010, 2014], 'drug-dropdown': 'All'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    text = client.get('/metrics', headers={'Accept-Encoding': 'identity'}).get_data(as_text=True)
+    reported = {line.split()[0]: float(line.split()[1]) for line in text.splitlines() if not line.startswith('#')}
+    wire = reported['dashboard_response_wire_bytes_sum{callback="update_map"}']
+    assert 0 < wire < reported['dashboard_response_bytes_sum{callback="update_map"}']
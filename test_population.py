@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cube import DataCube
+from population import PopulationIndex
+from query_engine import QueryEngine
+
+
+def make_df():
+    # Central has 100k people in 2020 and 200k in 2021 (no rate in 2022); Eastern 50k
+    return pd.DataFrame({
+        'Year': [2020, 2021, 2020, 2021, 2022, 2020],
+        'Health Zone of Residence': ['Central'] * 5 + ['Eastern'],
+        'Drug Type': ['Cocaine', 'Cocaine', 'Ethanol', 'Ethanol', 'Cocaine', 'Cocaine'],
+        'Sex': ['Total'] * 6,
+        'Manner of Death': ['All manners'] * 6,
+        'Quarter': ['All'] * 6,
+        'Frequency': [10, 20, 1, 2, 0, 5],
+        'Rate': [10.0, 10.0, 1.0, 1.0, 0.0, 10.0]
+    })
+
+
+def test_rates_are_deaths_over_person_years():
+    df = make_df()
+    population = PopulationIndex(df, DataCube(df), ['Central', 'Eastern'], ['Cocaine', 'Ethanol'])
+
+    # 2022 has no published rate, so it keeps the last known year's population
+    assert population.population[0].tolist() == pytest.approx([100000, 200000, 200000])
+    assert population.rate([2020, 2021], 'Central', 'Cocaine') == pytest.approx(30 / 300000 * 100000)
+    assert population.rate([2020, 2022], 'Central', 'All') == pytest.approx(33 / 500000 * 100000)
+    assert population.rate([2020, 2020], ['Central', 'Eastern'], 'Cocaine') == pytest.approx(15 / 150000 * 100000)
+    assert np.isnan(population.rate([2030, 2031], 'Central', 'Cocaine'))
+
+
+def test_zone_aggregates_use_population_rates():
+    df = make_df()
+    cube = DataCube(df)
+    engine = QueryEngine(cube, df['Drug Type'].unique(),
+                         population=PopulationIndex(df, cube, ['Central', 'Eastern'], ['Cocaine', 'Ethanol']))
+
+    # Eastern has no 2021 row: no deaths that year, but its population still counts
+    zones = engine.aggregate([2020, 2021], ['Central', 'Eastern'], 'Cocaine', 'Health Zone of Residence')
+    assert zones['Rate'].tolist() == pytest.approx([30 / 300000 * 100000, 5 / 100000 * 100000])
+    assert engine.rate([2020, 2021], 'Central', 'Cocaine') == pytest.approx(10.0)
+
+
+def test_partial_final_year_adds_no_person_years():
+    # 2023 so far has only a quarterly row, so it has no yearly deaths or population
+    df = pd.concat([make_df(), pd.DataFrame({
+        'Year': [2023], 'Health Zone of Residence': ['Central'], 'Drug Type': ['Cocaine'], 'Sex': ['Total'],
+        'Manner of Death': ['All manners'], 'Quarter': ['Q1'], 'Frequency': [4], 'Rate': [8.0]
+    })], ignore_index=True)
+    population = PopulationIndex(df, DataCube(df), ['Central', 'Eastern'], ['Cocaine', 'Ethanol'])
+
+    assert population.last_year == 2022
+    assert population.rate([2020, 2023], 'Central', 'Cocaine') == population.rate([2020, 2022], 'Central', 'Cocaine')
+    assert np.isnan(population.rate([2023, 2023], 'Central', 'Cocaine'))
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from data_cube import DataCube
+from query_engine import LRUCache, QueryEngine
+
+
+def make_df():
+    return pd.DataFrame({
+        'Year': [2020, 2021, 2020, 2021, 2020],
+        'Health Zone of Residence': ['Central'] * 4 + ['Eastern'],
+        'Drug Type': ['Cocaine', 'Cocaine', 'Opioid - total', 'Ethanol', 'Cocaine'],
+        'Sex': ['Total'] * 5,
+        'Manner of Death': ['All manners'] * 5,
+        'Quarter': ['All'] * 5,
+        'Frequency': [3, 4, 10, 2, 1],
+        'Rate': [1.0, 2.0, 5.0, 0.5, 0.2]
+    })
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.info() == {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+
+def test_all_drugs_excludes_aggregates_and_is_memoized():
+    df = make_df()
+    engine = QueryEngine(DataCube(df), df['Drug Type'].unique())
+
+    yearly = engine.aggregate([2020, 2021], 'Central', 'All', 'Year')
+    assert yearly['Frequency'].tolist() == [3, 6]
+
+    engine.aggregate([2020, 2021], ['Central'], 'All', 'Year')
+    assert engine.cache_info()['hits'] == 1
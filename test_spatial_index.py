@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cube import DataCube
+from point_events import assign_zones, fold_point_events
+from spatial_index import ZoneIndex
+
+GEOJSON_PATH = 'Nova Scotia Health Authority Management Zones.geojson'
+
+
+def square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+def make_geojson():
+    # West: a square with a square hole; East: a triangle beside it and a square inside the hole
+    return {'features': [
+        {'properties': {'name': 'West'},
+         'geometry': {'type': 'Polygon', 'coordinates': [square(0, 0, 1, 1), square(0.4, 0.4, 0.6, 0.6)]}},
+        {'properties': {'name': 'East'},
+         'geometry': {'type': 'MultiPolygon', 'coordinates': [
+             [[[1, 0], [2, 0], [1, 1], [1, 0]]],
+             [square(0.45, 0.45, 0.55, 0.55)]
+         ]}}
+    ]}
+
+
+def test_assign_small_zones():
+    index = ZoneIndex(make_geojson(), cell_size=0.05)
+    lon = [0.1, 0.42, 0.5, 0.9, 1.1, 1.9, 1.6, -1, np.nan]
+    lat = [0.1, 0.5, 0.5, 0.99, 0.5, 0.05, 0.6, 0.5, 0.5]
+    assert index.zone_names(lon, lat).tolist() == \
+        ['West', None, 'East', 'West', 'East', 'East', None, None, None]
+
+
+def test_assign_matches_shapely():
+    shapely = pytest.importorskip('shapely')
+    from shapely.geometry import shape
+
+    with open(GEOJSON_PATH, 'r') as f:
+        geojson_data = json.load(f)
+    index = ZoneIndex(geojson_data)
+
+    # Random points over the province, where many cells are boundary cells
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-66.5, -59.5, 20000)
+    lat = rng.uniform(43.3, 47.1, 20000)
+    expected = np.full(len(lon), -1)
+    for code, feature in enumerate(geojson_data['features']):
+        expected[shapely.contains_xy(shape(feature['geometry']), lon, lat)] = code
+    assert (index.assign(lon, lat) == expected).all()
+
+
+def test_fold_point_events_adds_to_zone_and_province():
+    df = pd.DataFrame({
+        'Year': pd.Series([2020, 2020], dtype='int16'),
+        'Health Zone of Residence': pd.Categorical(['West', 'Nova Scotia']),
+        'Quarter': pd.Categorical(['All', 'All']),
+        'Drug Type': pd.Categorical(['Cocaine', 'Cocaine']),
+        'Manner of Death': pd.Categorical(['All manners', 'All manners']),
+        'Sex': pd.Categorical(['Total', 'Total']),
+        'Frequency': pd.Series([3, 3], dtype='Int16'),
+        'Rate': pd.Series([1.5, 0.5], dtype='float32')
+    })
+    events = pd.DataFrame({'Year': [2020, 2020, 2021], 'Longitude': [0.1, 1.1, 0.2],
+                           'Latitude': [0.1, 0.5, 0.2], 'Drug Type': ['Cocaine'] * 3})
+    events['Health Zone of Residence'] = assign_zones(events, ZoneIndex(make_geojson()))
+    counts = events.groupby(['Year', 'Health Zone of Residence', 'Drug Type'], observed=True).size()
+    counts = counts.rename('Frequency').reset_index().assign(**{'Manner of Death': 'Accident'})
+
+    folded = fold_point_events(df, counts)
+    cube = DataCube(folded)
+    totals = cube.cells[('Nova Scotia', 'Cocaine', 'Total', 'All manners', 'All')]
+    assert totals['Frequency'].tolist() == [5, 1]
+    # Event rows have no rate of their own, so the published rate stands
+    assert totals['Rate'].tolist()[0] == 0.5
+    assert cube.cells[('West', 'Cocaine', 'Total', 'Accident', 'All')]['Frequency'].tolist() == [1, 1]
+    assert cube.cells[('East', 'Cocaine', 'Total', 'All manners', 'All')]['Frequency'].tolist() == [1]
+    assert folded['Frequency'].dtype == 'Int16'
+
+
+def test_fold_point_events_widens_counts_past_int32():
+    df = pd.DataFrame({
+        'Year': pd.Series([2020], dtype='int16'),
+        'Health Zone of Residence': pd.Categorical(['Nova Scotia']),
+        'Quarter': pd.Categorical(['All']),
+        'Drug Type': pd.Categorical(['Cocaine']),
+        'Manner of Death': pd.Categorical(['All manners']),
+        'Sex': pd.Categorical(['Total']),
+        'Frequency': pd.Series([3], dtype='Int32'),
+        'Rate': pd.Series([1.5], dtype='float64')
+    })
+    # Two zones' counts that each fit in int32 but not once summed province-wide
+    counts = pd.DataFrame({'Year': [2020, 2020], 'Health Zone of Residence': ['West', 'East'],
+                           'Drug Type': ['Cocaine'] * 2, 'Frequency': [2 ** 30, 2 ** 30],
+                           'Manner of Death': [None, None]})
+
+    folded = fold_point_events(df, counts)
+    assert folded['Frequency'].dtype == 'Int64'
+    totals = DataCube(folded).cells[('Nova Scotia', 'Cocaine', 'Total', 'All manners', 'All')]
+    assert totals['Frequency'].tolist() == [2 ** 31 + 3]
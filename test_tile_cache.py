@@ -0,0 +1,53 @@
+import flask
+import pytest
+
+import tile_cache
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # A file:// mirror standing in for the upstream tile server
+    mirror = tmp_path / 'mirror'
+    x, y = tile_cache.tile_xy(-63.57, 44.65, 8)
+    (mirror / '8' / str(x)).mkdir(parents=True)
+    (mirror / '8' / str(x) / f'{y}.png').write_bytes(b'png')
+    monkeypatch.setattr(tile_cache, 'TILE_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(tile_cache, 'TILE_UPSTREAM', mirror.as_uri() + '/{z}/{x}/{y}.png')
+    monkeypatch.setattr(tile_cache, 'TILE_ZOOMS', '5-8')
+
+    app = flask.Flask(__name__)
+    app.register_blueprint(tile_cache.tiles)
+    return app.test_client(), (x, y)
+
+
+def test_tile_xy():
+    # Halifax
+    assert tile_cache.tile_xy(-63.57, 44.65, 8) == (82, 92)
+    assert tile_cache.tile_xy(-180, 90, 3) == (0, 0)
+
+
+def test_tiles_are_fetched_once_and_cached(client, tmp_path):
+    client, (x, y) = client
+    response = client.get(f'/tiles/8/{x}/{y}.png')
+    assert response.status_code == 200
+    assert response.data == b'png'
+    assert response.cache_control.max_age == tile_cache.TILE_MAX_AGE
+    assert response.cache_control.public
+    assert (tmp_path / 'cache' / '8' / str(x) / f'{y}.png').exists()
+
+    # Revalidation, a tile the mirror lacks, and tiles outside the zooms or extent
+    assert client.get(f'/tiles/8/{x}/{y}.png', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get(f'/tiles/8/{x}/{y + 1}.png').status_code == 404
+    assert client.get(f'/tiles/9/{2 * x}/{2 * y}.png').status_code == 404
+    assert client.get('/tiles/8/0/0.png').status_code == 404
+
+
+def test_basemap_layout():
+    assert basemap_style('osm') == 'open-street-map'
+    assert basemap_style('blank') == 'white-bg'
+    local = tile_cache.basemap_layout('local')
+    assert local['mapbox_layers'][0]['source'] == [tile_cache.TILE_URL]
+
+
+def basemap_style(basemap):
+    return tile_cache.basemap_layout(basemap)['mapbox_style']
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from time_series import TimeSeriesIndex, rolling_sums
+
+
+def test_rolling_sums_skip_incomplete_and_missing_windows():
+    matrix = np.array([[1.0, 2.0, 3.0, np.nan, 5.0, 6.0]])
+
+    sums = rolling_sums(matrix, 2)
+
+    np.testing.assert_array_equal(sums, [[np.nan, 3.0, 5.0, np.nan, np.nan, 11.0]])
+
+
+def test_monthly_series_rolling_totals_and_annualized_rates():
+    months = ['Nov', 'Dec', 'Jan', 'Feb']
+    df = pd.DataFrame({
+        'Year': [2020, 2020, 2021, 2021] * 2 + [2020, 2021],
+        'Health Zone of Residence': ['Nova Scotia'] * 10,
+        'Quarter': [np.nan] * 8 + ['All', 'All'],
+        'Month': months * 2 + [np.nan, np.nan],
+        'Drug Type': ['Cocaine'] * 4 + ['Ethanol'] * 4 + ['Total - all substances'] * 2,
+        'Manner of Death': ['All manners'] * 10,
+        'Sex': [np.nan] * 8 + ['Total', 'Total'],
+        'Frequency': [1, 2, 3, 4, 10, 20, 30, 40, 100, 200],
+        'Rate': [np.nan] * 8 + [10.0, 20.0]
+    })
+
+    index = TimeSeriesIndex(df)
+    monthly = index.query('month', 'Nova Scotia', 'All', [2020, 2021], window=3)
+
+    # Population: 1,000,000 in both years (100 / 10.0 and 200 / 20.0 per 100k)
+    assert monthly['Period'].tolist() == ['Jan 2021', 'Feb 2021']
+    assert monthly['Frequency'].tolist() == [66.0, 99.0]
+    np.testing.assert_allclose(monthly['Rate'], [66 * 4 / 10.0, 99 * 4 / 10.0])
+
+    cocaine = index.query('month', 'Nova Scotia', 'Cocaine', [2021, 2021])
+    assert cocaine['Frequency'].tolist() == [3.0, 4.0]
+    assert index.zones('month') == ['Nova Scotia']
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cube import DataCube
+from population import PopulationIndex
+from trends import TrendIndex, fit_poisson
+
+YEARS = np.arange(2010, 2022)
+
+
+def make_trends(series):
+    # Central has 100k people every year; ``series`` maps drug types to yearly deaths
+    frames = []
+    for drug, deaths in series.items():
+        frames.append(pd.DataFrame({
+            'Year': YEARS[:len(deaths)],
+            'Health Zone of Residence': 'Central',
+            'Drug Type': drug,
+            'Sex': 'Total',
+            'Manner of Death': 'All manners',
+            'Quarter': 'All',
+            'Frequency': deaths,
+            'Rate': [value / 1000 if value else 0.0 for value in deaths]
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    cube = DataCube(df)
+    drugs = sorted(series)
+    return TrendIndex(PopulationIndex(df, cube, ['Central'], drugs), cube, ['Central'], drugs)
+
+
+def test_fit_poisson_recovers_log_linear_slope():
+    # Many series at once: y = 50 * 1.1^t, with and without a missing year
+    t = np.arange(8, dtype=float)
+    y = np.stack([50 * 1.1 ** t, 50 * 1.1 ** t])
+    weight = np.ones_like(y)
+    weight[1, 3] = 0
+    x = np.stack([np.ones_like(t), t], axis=-1)
+    beta, covariance, deviance, _ = fit_poisson(y, np.zeros_like(y), x, weight)
+    assert np.exp(beta[:, 1]) == pytest.approx([1.1, 1.1])
+    assert deviance == pytest.approx([0, 0], abs=1e-9)
+    assert (covariance[:, 1, 1] > 0).all()
+
+
+def test_recent_trend_card_and_ranking():
+    trends = make_trends({
+        'Cocaine': [100, 100, 100, 100, 100, 100, 110, 121, 133, 146, 161, 177],
+        'Ethanol': [40, 42, 38, 41, 39, 40, 41, 39, 40, 42, 38, 40],
+        'Methadone': [3, 0, 1]
+    })
+
+    # The recent window is the last six years of the range
+    cocaine = trends.recent([2010, 2021], 'Central', 'Cocaine')
+    assert cocaine['years'] == [2016, 2021]
+    assert cocaine['change'] == pytest.approx(0.1, abs=0.005)
+    assert trends.label([2010, 2021], 'Central', 'Cocaine') == "↑ +10.0%/yr"
+    assert trends.label([2010, 2015], 'Central', 'Cocaine') == "→ Stable"
+    assert trends.label([2010, 2021], 'Central', 'Ethanol') == "→ Stable"
+    # Too few years or deaths for a fit, and unknown series
+    assert trends.label([2010, 2012], 'Central', 'Methadone') == "N/A"
+    assert trends.label([2010, 2011], 'Central', 'Cocaine') == "N/A"
+    assert trends.label([2010, 2021], 'Eastern', 'Cocaine') == "N/A"
+
+    ranking = trends.ranking([2010, 2021])
+    assert ranking['Drug Type'].tolist()[:2] == ['Cocaine', 'All']
+    assert 'Methadone' not in ranking['Drug Type'].tolist()
+
+
+def test_change_point_is_found_where_the_slope_changes():
+    trends = make_trends({'Cocaine': [100, 100, 100, 100, 100, 100, 110, 121, 133, 146, 161, 177]})
+    code = trends.series_codes[('Central', 'Cocaine', 'Total')]
+    assert trends.change_year[code] == 2015
+    assert trends.change_before[code] == pytest.approx(0.0, abs=0.01)
+    assert trends.change_after[code] == pytest.approx(0.1, abs=0.01)
+
+    flat = make_trends({'Ethanol': [40, 42, 38, 41, 39, 40, 41, 39, 40, 42, 38, 40]})
+    assert flat.change_year.tolist() == [-1, -1]
@@ -0,0 +1,173 @@
+"""Locally served raster basemap tiles for the map, cached on disk.
+
+With ``DASHBOARD_BASEMAP=local`` the map draws its basemap from
+``tiles/<z>/<x>/<y>.png`` on the dashboard's own server instead of
+openstreetmap.org. Tiles come from ``MAP_TILE_DIR``; a missing tile inside the
+Nova Scotia extent and ``MAP_TILE_ZOOMS`` is fetched once from
+``MAP_TILE_UPSTREAM`` and kept (set it empty in an air-gapped deployment), and
+every tile is sent with a long Cache-Control max-age. Seed the cache ahead of
+time, e.g.::
+
+    python tile_cache.py
+    python tile_cache.py --zooms 5-9 --upstream "file:///media/tiles/{z}/{x}/{y}.png"
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+import urllib.request
+
+import flask
+
+TILE_CACHE_DIR = os.environ.get('MAP_TILE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.cache', 'tiles'
+)
+
+# Zoom levels served (and seeded), as FIRST-LAST
+TILE_ZOOMS = os.environ.get('MAP_TILE_ZOOMS', '5-10')
+
+# Where missing tiles are fetched from ({z}, {x}, {y} placeholders); empty never fetches
+TILE_UPSTREAM = os.environ.get('MAP_TILE_UPSTREAM', 'https://tile.openstreetmap.org/{z}/{x}/{y}.png')
+
+# Seconds browsers may reuse a tile without revalidating (default 30 days)
+TILE_MAX_AGE = int(os.environ.get('MAP_TILE_MAX_AGE', 30 * 24 * 3600))
+
+# West, south, east, north: Nova Scotia with enough margin to fill the map at the lowest zoom
+TILE_BOUNDS = (-71.0, 41.5, -55.0, 49.0)
+
+TILE_ATTRIBUTION = '© OpenStreetMap contributors'
+
+# Tile URL used by the map, relative to the page so it also works under a path prefix
+TILE_URL = 'tiles/{z}/{x}/{y}.png'
+
+USER_AGENT = 'ns-fatalities-dashboard-tile-cache/1.0'
+
+tiles = flask.Blueprint('tiles', __name__)
+
+
+def parse_zooms(value):
+    first, _, last = str(value).partition('-')
+    return range(int(first), int(last or first) + 1)
+
+
+def tile_xy(lon, lat, zoom):
+    """Web Mercator tile column and row containing a point."""
+    count = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * count)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * count)
+    return min(max(x, 0), count - 1), min(max(y, 0), count - 1)
+
+
+def tile_range(zoom, bounds=TILE_BOUNDS):
+    """(first column, last column, first row, last row) of the tiles covering ``bounds``."""
+    west, south, east, north = bounds
+    x0, y0 = tile_xy(west, north, zoom)
+    x1, y1 = tile_xy(east, south, zoom)
+    return x0, x1, y0, y1
+
+
+def in_extent(z, x, y, zooms, bounds=TILE_BOUNDS):
+    if z not in zooms:
+        return False
+    x0, x1, y0, y1 = tile_range(z, bounds)
+    return x0 <= x <= x1 and y0 <= y <= y1
+
+
+def tile_path(cache_dir, z, x, y):
+    return os.path.join(cache_dir, str(z), str(x), f'{y}.png')
+
+
+def fetch_tile(z, x, y, cache_dir=TILE_CACHE_DIR, upstream=TILE_UPSTREAM):
+    """Download one tile into the cache; returns its path, or None if it could not be fetched."""
+    if not upstream:
+        return None
+    path = tile_path(cache_dir, z, x, y)
+    request = urllib.request.Request(upstream.format(z=z, x=x, y=y), headers={'User-Agent': USER_AGENT})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            content = response.read()
+    except (OSError, ValueError) as e:
+        print(f"Error fetching tile {z}/{x}/{y}: {e}")
+        return None
+
+    # Atomic rename so concurrent requests never read a half-written tile
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.png')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+@tiles.route('/tiles/<int:z>/<int:x>/<int:y>.png')
+def tile(z, x, y):
+    # Only the configured extent is served, so the route never proxies arbitrary tiles
+    if not in_extent(z, x, y, parse_zooms(TILE_ZOOMS)):
+        flask.abort(404)
+    path = tile_path(TILE_CACHE_DIR, z, x, y)
+    if not os.path.exists(path) and fetch_tile(z, x, y, TILE_CACHE_DIR, TILE_UPSTREAM) is None:
+        flask.abort(404)
+    response = flask.send_file(path, mimetype='image/png', max_age=TILE_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    return response
+
+
+def basemap_layout(basemap):
+    """Layout settings for the map's basemap: ``osm`` (openstreetmap.org tiles),
+    ``local`` (tiles from this server) or ``blank`` (zone polygons only, no tiles)."""
+    if basemap == 'blank':
+        return {'mapbox_style': 'white-bg'}
+    if basemap == 'local':
+        zooms = parse_zooms(TILE_ZOOMS)
+        # Hidden outside the seeded zooms rather than requesting tiles that are not there
+        return {'mapbox_style': 'white-bg', 'mapbox_layers': [{
+            'below': 'traces',
+            'sourcetype': 'raster',
+            'source': [TILE_URL],
+            'sourceattribution': TILE_ATTRIBUTION,
+            'minzoom': zooms.start,
+            'maxzoom': zooms.stop
+        }]}
+    return {'mapbox_style': 'open-street-map'}
+
+
+def seed_tiles(zooms, cache_dir=TILE_CACHE_DIR, upstream=TILE_UPSTREAM, bounds=TILE_BOUNDS, delay=0.0):
+    """Fetch every missing tile of ``zooms`` over ``bounds``; returns (fetched, cached, failed)."""
+    fetched = cached = failed = 0
+    for z in zooms:
+        x0, x1, y0, y1 = tile_range(z, bounds)
+        print(f"Zoom {z}: {(x1 - x0 + 1) * (y1 - y0 + 1):,} tiles")
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                if os.path.exists(tile_path(cache_dir, z, x, y)):
+                    cached += 1
+                elif fetch_tile(z, x, y, cache_dir, upstream) is None:
+                    failed += 1
+                else:
+                    fetched += 1
+                    if delay:
+                        time.sleep(delay)
+    return fetched, cached, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the local basemap tile cache for the Nova Scotia extent.")
+    parser.add_argument('--zooms', default=TILE_ZOOMS, help="zoom levels as FIRST-LAST (default: %(default)s)")
+    parser.add_argument('--cache-dir', default=TILE_CACHE_DIR, help="tile directory (default: %(default)s)")
+    parser.add_argument('--upstream', default=TILE_UPSTREAM,
+                        help="tile URL template with {z}, {x} and {y}; file:// URLs copy from a local mirror")
+    parser.add_argument('--delay', type=float, default=0.1,
+                        help="seconds between downloads, to go easy on the tile server (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    fetched, cached, failed = seed_tiles(parse_zooms(args.zooms), args.cache_dir, args.upstream, delay=args.delay)
+    print(f"Seeded {args.cache_dir}: {fetched:,} fetched, {cached:,} already cached, {failed:,} failed "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+import numpy as np
+
+from query_engine import EXCLUDED_DRUG_CATEGORIES
+
+# pandas is only imported by ``TimeSeriesIndex.query``, so importing the constants
+# below (e.g. for the dashboard layout) stays cheap
+
+# Sub-year granularities and the number of months in one period
+GRANULARITIES = {'quarter': 3, 'month': 1}
+
+# Rolling windows (months) precomputed for every series
+ROLLING_WINDOWS = (3, 6, 12)
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+
+
+def rolling_sums(matrix, periods):
+    """Moving sums over ``periods`` columns for every row at once.
+
+    Computed from cumulative sums, so each window is one subtraction. Windows
+    that are incomplete or contain a missing (NaN) value are NaN.
+    """
+    valid = ~np.isnan(matrix)
+    totals = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    counts = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=np.int64)
+    np.cumsum(np.where(valid, matrix, 0.0), axis=1, out=totals[:, 1:])
+    np.cumsum(valid, axis=1, out=counts[:, 1:])
+
+    sums = np.full(matrix.shape, np.nan)
+    if periods <= matrix.shape[1]:
+        window_counts = counts[:, periods:] - counts[:, :-periods]
+        window_sums = totals[:, periods:] - totals[:, :-periods]
+        sums[:, periods - 1:] = np.where(window_counts == periods, window_sums, np.nan)
+    return sums
+
+
+def yearly_population(df, zone):
+    """Population by year implied by the published yearly counts and rates.
+
+    Uses each year's highest-count row (the most precise Frequency/Rate ratio).
+    """
+    rows = df[
+        (df['Health Zone of Residence'] == zone) &
+        (df['Quarter'] == 'All') &
+        (df['Sex'] == 'Total') &
+        (df['Manner of Death'] == 'All manners') &
+        (df['Rate'] > 0) &
+        df['Frequency'].gt(0).fillna(False)
+    ]
+    rows = rows.sort_values('Frequency').drop_duplicates('Year', keep='last').sort_values('Year')
+    return (
+        rows['Year'].to_numpy(dtype=np.int64),
+        rows['Frequency'].to_numpy(dtype=float, na_value=np.nan) / rows['Rate'].to_numpy(dtype=float) * 100000
+    )
+
+
+class TimeSeriesIndex:
+    """Quarterly and monthly death series with precomputed rolling aggregates.
+
+    For every granularity and zone that has sub-year rows, deaths are laid out
+    as a (drug x period) matrix over a contiguous period axis, with an extra
+    "All" row summing the individual drug types. Moving sums for
+    ``ROLLING_WINDOWS`` and annualized rates (deaths per 100k per year, using
+    the population implied by the yearly rates) are computed once at load time,
+    so a request only slices precomputed arrays.
+    """
+
+    def __init__(self, df):
+        # (granularity, zone) -> dict of period labels, years, drug rows and matrices
+        self.series = {}
+
+        if df.empty:
+            return
+
+        quarterly = df[df['Quarter'].isin(QUARTERS) & (df['Sex'] == 'Total') &
+                       (df['Manner of Death'] == 'All manners')]
+        quarter_index = quarterly['Quarter'].map({quarter: i for i, quarter in enumerate(QUARTERS)})
+        self._add_granularity(df, 'quarter', quarterly, quarterly['Year'].to_numpy(dtype=np.int64) * 4 +
+                              quarter_index.to_numpy(dtype=np.int64))
+
+        if 'Month' in df.columns:
+            monthly = df[df['Month'].notna() & (df['Manner of Death'] == 'All manners')]
+            month_index = monthly['Month'].map({month: i for i, month in enumerate(MONTHS)})
+            self._add_granularity(df, 'month', monthly, monthly['Year'].to_numpy(dtype=np.int64) * 12 +
+                                  month_index.to_numpy(dtype=np.int64))
+
+    def _add_granularity(self, df, granularity, rows, ordinals):
+        months_per_period = GRANULARITIES[granularity]
+        periods_per_year = 12 // months_per_period
+
+        for zone in rows['Health Zone of Residence'].unique():
+            in_zone = (rows['Health Zone of Residence'] == zone).to_numpy()
+            zone_rows, zone_ordinals = rows[in_zone], ordinals[in_zone]
+            if zone_rows.empty:
+                continue
+
+            # Contiguous period axis, so a window of n columns is always n periods
+            first = zone_ordinals.min()
+            axis = np.arange(first, zone_ordinals.max() + 1)
+            drugs = sorted(str(drug) for drug in zone_rows['Drug Type'].unique())
+            drug_rows = np.searchsorted(drugs, zone_rows['Drug Type'].astype(str).to_numpy())
+
+            deaths = np.full((len(drugs) + 1, len(axis)), np.nan)
+            deaths[drug_rows, zone_ordinals - first] = zone_rows['Frequency'].to_numpy(dtype=float, na_value=np.nan)
+
+            # "All" row: every individual drug type, as for the yearly views; periods
+            # not yet published for every drug are left out rather than undercounted
+            individual = deaths[[i for i, drug in enumerate(drugs) if drug not in EXCLUDED_DRUG_CATEGORIES]]
+            deaths[-1] = individual.sum(axis=0)
+
+            years = axis // periods_per_year
+            population_years, population = yearly_population(df, zone)
+            if len(population):
+                # Years without a published rate interpolate between the known years,
+                # clamped to the first or last known population outside them
+                period_population = np.interp(years, population_years, population)
+            else:
+                period_population = np.full(len(axis), np.nan)
+
+            if granularity == 'month':
+                labels = [f"{MONTHS[ordinal % 12]} {ordinal // 12}" for ordinal in axis]
+            else:
+                labels = [f"{ordinal // 4} {QUARTERS[ordinal % 4]}" for ordinal in axis]
+
+            rolling = {}
+            for window in ROLLING_WINDOWS:
+                if window % months_per_period:
+                    continue
+                sums = rolling_sums(deaths, window // months_per_period)
+                rolling[window] = (sums, sums * (12 / window) / period_population * 100000)
+
+            self.series[granularity, str(zone)] = {
+                'labels': labels,
+                'years': years,
+                'drugs': drugs + ['All'],
+                'population': period_population,
+                'deaths': deaths,
+                'rate': deaths * periods_per_year / period_population * 100000,
+                'rolling': rolling
+            }
+
+    def zones(self, granularity):
+        return sorted(zone for series_granularity, zone in self.series if series_granularity == granularity)
+
+    def query(self, granularity, zone, drug, year_range, window=None):
+        """Deaths and annualized rates per period for the selected years.
+
+        With a ``window`` (months) the values are moving sums over that many
+        months and their annualized rate. Returns an empty frame when the
+        selection has no sub-year data.
+        """
+        import pandas as pd
+
+        columns = ['Period', 'Year', 'Frequency', 'Rate']
+        series = self.series.get((granularity, zone))
+        if series is None or drug not in series['drugs']:
+            return pd.DataFrame(columns=columns)
+
+        row = series['drugs'].index(drug)
+        if window and window in series['rolling']:
+            deaths, rates = series['rolling'][window]
+        else:
+            deaths, rates = series['deaths'], series['rate']
+
+        # Periods are sorted by year, so the selection is a contiguous slice
+        start, stop = np.searchsorted(series['years'], [year_range[0], year_range[1] + 1])
+        values = deaths[row, start:stop]
+        keep = ~np.isnan(values)
+        return pd.DataFrame({
+            'Period': np.asarray(series['labels'][start:stop], dtype=object)[keep],
+            'Year': series['years'][start:stop][keep],
+            'Frequency': values[keep],
+            'Rate': rates[row, start:stop][keep]
+        }, columns=columns)
@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+
+# Years in the "recent" window the trend card and ranking fit (the two
+# three-year periods the card used to compare)
+RECENT_YEARS = 6
+
+# Series are fitted for every zone and drug type with these sexes
+TREND_SEXES = ['Total', 'Male', 'Female']
+
+# A trend needs this many years with data and deaths in its window
+MIN_TREND_YEARS = 3
+MIN_TREND_DEATHS = 5
+
+# Two-sided 95% normal quantile for the slope's confidence interval
+Z_95 = 1.959964
+
+# Each side of a change point needs this many years with data (the change year counts for both)
+MIN_SEGMENT_YEARS = 3
+
+# Likelihood ratio (scaled by the dispersion) a change point must reach: about a
+# 5% level after a Bonferroni correction for the ~10 candidate years of a series
+CHANGE_POINT_THRESHOLD = 9.0
+
+NEWTON_ITERATIONS = 25
+
+
+def fit_poisson(y, offset, x, weight, iterations=NEWTON_ITERATIONS):
+    """Batched Poisson regression ``log E[y] = offset + x @ beta`` by Newton's method.
+
+    ``y``, ``offset`` and ``weight`` (1 for years in the fit, 0 otherwise) have
+    shape (..., T) and ``x`` (..., T, P), broadcasting over the leading axes, so
+    every series and window is fitted at once. Returns the coefficients
+    (..., P; NaN where the fit did not converge), their covariance
+    (..., P, P), the deviance and Pearson's χ².
+    """
+    shape = np.broadcast_shapes(y.shape, offset.shape, weight.shape, x.shape[:-1])
+    parameters = x.shape[-1]
+    # One row per fit; rows drop out of the Newton loop as they converge
+    y, offset, weight = (np.broadcast_to(array, shape).reshape(-1, shape[-1]) for array in (y, offset, weight))
+    x = np.broadcast_to(x, shape + (parameters,)).reshape(-1, shape[-1], parameters)
+    ridge = np.eye(parameters) * 1e-9
+
+    def fitted(rows, beta):
+        return np.exp(np.clip(offset[rows] + (x[rows] @ beta[..., None])[..., 0], -50, 50))
+
+    def information(rows, mu):
+        return np.swapaxes(x[rows] * (weight[rows] * mu)[..., None], -1, -2) @ x[rows] + ridge
+
+    beta = np.zeros((len(y), parameters))
+    # Start from the pooled rate (plus half a death, so empty windows stay finite)
+    exposure = (weight * np.exp(offset)).sum(axis=-1)
+    beta[:, 0] = np.log(((weight * y).sum(axis=-1) + 0.5) / np.maximum(exposure, 1e-300))
+    active = np.arange(len(y))
+    for _ in range(iterations):
+        mu = fitted(active, beta[active])
+        score = ((weight[active] * (y[active] - mu))[:, None, :] @ x[active])[:, 0, :]
+        step = np.linalg.solve(information(active, mu), score[..., None])[..., 0]
+        # Damped, so windows with all their deaths at one end cannot overflow
+        beta[active] += np.clip(step, -2.0, 2.0)
+        active = active[(np.abs(step) >= 1e-8).any(axis=1)]
+        if not len(active):
+            break
+
+    # Fits still moving (e.g. a slope running off to infinity) have no estimate
+    rows = np.arange(len(y))
+    mu = fitted(rows, beta)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_ratio = np.where(y > 0, y * np.log(y / mu), 0.0)
+    deviance = 2 * (weight * (log_ratio - (y - mu))).sum(axis=-1)
+    pearson = (weight * (y - mu) ** 2 / mu).sum(axis=-1)
+    covariance = np.linalg.inv(information(rows, mu))
+    beta[active] = np.nan
+    return (beta.reshape(shape[:-1] + (parameters,)), covariance.reshape(shape[:-1] + (parameters, parameters)),
+            deviance.reshape(shape[:-1]), pearson.reshape(shape[:-1]))
+
+
+def dispersion(pearson, years, parameters):
+    # Quasi-Poisson scale (never below 1), so overdispersed counts get wider intervals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(years > parameters, np.maximum(pearson / (years - parameters), 1.0), 1.0)
+
+
+def trend_label(direction, change):
+    """Recent Trend card text for a fitted window (direction 1, -1, 0 or None)."""
+    if direction is None:
+        return "N/A"
+    if direction == 0:
+        return "→ Stable"
+    return f"{'↑' if direction > 0 else '↓'} {change * 100:+.1f}%/yr"
+
+
+class TrendIndex:
+    """Poisson log-linear trends and change points of every (zone, drug, sex) series.
+
+    Yearly deaths come from the cube's all-manners cells (an "All" drug sums
+    the individual ``drugs``) with the zone populations of ``population`` (a
+    PopulationIndex) as exposure; years without a published row are left out
+    of the fits. At load, every series is fitted over every window of up to
+    ``RECENT_YEARS`` years in one batch: the annual change exp(slope) - 1 with a
+    95% quasi-Poisson confidence interval. Each full series is also tested for
+    one change point, a year after which the slope changes (a hinge in the
+    log-linear trend). The trend card and the ranking only index these arrays.
+    """
+
+    def __init__(self, population, cube, zones, drugs, sexes=TREND_SEXES):
+        self.first_year = population.first_year
+        self.year_count = population.last_year - population.first_year + 1
+        self.recent_years = RECENT_YEARS
+
+        # Series with any data, with yearly deaths and the years published
+        self.series = []
+        deaths, observed, log_population = [], [], []
+        for zone in zones:
+            z = population.zone_codes[zone]
+            for drug in ['All'] + list(drugs):
+                for sex in sexes:
+                    cells = [cube.cells.get((zone, name, sex, 'All manners', 'All'))
+                             for name in (drugs if drug == 'All' else [drug])]
+                    cells = [cell for cell in cells if cell is not None]
+                    if not cells:
+                        continue
+                    series_deaths = np.zeros(self.year_count)
+                    series_observed = np.zeros(self.year_count, dtype=bool)
+                    for cell in cells:
+                        offsets = cell['Year'].to_numpy(dtype=np.int64) - self.first_year
+                        series_deaths[offsets] += cell['Frequency'].to_numpy(dtype=float, na_value=0.0)
+                        series_observed[offsets] = True
+                    self.series.append((zone, drug, sex))
+                    deaths.append(series_deaths)
+                    # Sex-specific populations are not published; the zone's only shifts the intercept
+                    observed.append(series_observed & np.isfinite(population.population[z]))
+                    log_population.append(np.log(np.where(population.population[z] > 0,
+                                                          population.population[z], np.nan)))
+        self.series_codes = {key: code for code, key in enumerate(self.series)}
+        self.deaths = np.array(deaths).reshape(len(self.series), self.year_count)
+        self.observed = np.array(observed, dtype=bool).reshape(len(self.series), self.year_count)
+        log_population = np.nan_to_num(np.array(log_population).reshape(self.deaths.shape))
+
+        # Last year with data at or before each year (-1: none), per series
+        positions = np.where(self.observed, np.arange(self.year_count), -1)
+        self.last_observed = np.maximum.accumulate(positions, axis=1) if self.year_count else positions
+
+        self._fit_windows(log_population)
+        self._fit_change_points(log_population)
+
+    def _fit_windows(self, log_population):
+        # Window (end, length): years end - length + 1 .. end, on axes 1 and 2
+        years = np.arange(self.year_count)
+        ends = years[:, None, None]
+        lengths = np.arange(1, self.recent_years + 1)[None, :, None]
+        in_window = (years > ends - lengths) & (years <= ends)
+        x = np.stack(np.broadcast_arrays(np.ones(in_window.shape), years - ends + (lengths - 1) / 2.0), axis=-1)
+
+        weight = (self.observed[:, None, None, :] & in_window[None]).astype(float)
+        beta, covariance, _, pearson = fit_poisson(
+            self.deaths[:, None, None, :], log_population[:, None, None, :], x[None], weight
+        )
+        self.window_years = weight.sum(axis=-1).astype(np.int64)
+        self.window_deaths = (weight * self.deaths[:, None, None, :]).sum(axis=-1)
+        standard_error = np.sqrt(covariance[..., 1, 1] * dispersion(pearson, self.window_years, 2))
+
+        valid = (self.window_years >= MIN_TREND_YEARS) & (self.window_deaths >= MIN_TREND_DEATHS) & \
+            np.isfinite(beta[..., 1])
+        slope = np.where(valid, beta[..., 1], np.nan)
+        with np.errstate(over='ignore'):
+            self.change = np.expm1(slope)
+            self.lower = np.expm1(slope - Z_95 * standard_error)
+            self.upper = np.expm1(slope + Z_95 * standard_error)
+        self.direction = np.select([self.lower > 0, self.upper < 0, valid], [1, -1, 0], -2).astype(np.int8)
+
+        # Series by the lower end of their interval (rising at least this fast), per window
+        self.ranking_order = np.argsort(-np.nan_to_num(self.lower, nan=-np.inf), axis=0, kind='stable')
+
+    def _fit_change_points(self, log_population):
+        # Hinge at each candidate year k: log rate = a + b t + c max(t - k, 0)
+        years = np.arange(self.year_count, dtype=float)
+        candidates = years[:, None]
+        x = np.stack(np.broadcast_arrays(np.ones((self.year_count, self.year_count)),
+                                         years - years.mean(), np.maximum(years - candidates, 0)), axis=-1)
+        weight = self.observed.astype(float)
+        deaths, offset = self.deaths[:, None, :], log_population[:, None, :]
+
+        _, _, linear_deviance, _ = fit_poisson(self.deaths, log_population, x[0, :, :2], weight)
+        beta, _, hinge_deviance, pearson = fit_poisson(deaths, offset, x[None], weight[:, None, :])
+        before = np.cumsum(self.observed, axis=1)
+        after = self.observed.sum(axis=1, keepdims=True) - before + self.observed
+        valid = (before >= MIN_SEGMENT_YEARS) & (after >= MIN_SEGMENT_YEARS) & \
+            (self.deaths.sum(axis=1, keepdims=True) >= MIN_TREND_DEATHS)
+        statistic = (linear_deviance[:, None] - hinge_deviance) / dispersion(
+            pearson, self.observed.sum(axis=1, keepdims=True), 3
+        )
+        statistic = np.where(valid & np.isfinite(statistic), statistic, -np.inf)
+
+        best = statistic.argmax(axis=1) if self.year_count else np.zeros(len(self.series), dtype=np.int64)
+        rows = np.arange(len(self.series))
+        found = statistic[rows, best] > CHANGE_POINT_THRESHOLD if self.year_count else np.zeros(len(rows), bool)
+        self.change_year = np.where(found, best + self.first_year, -1)
+        self.change_before = np.where(found, np.expm1(beta[rows, best, 1]), np.nan)
+        self.change_after = np.where(found, np.expm1(beta[rows, best, 1] + beta[rows, best, 2]), np.nan)
+
+    def recent_window(self, year_range, code=None):
+        """(end, length) offsets of the recent window in ``year_range``: the last
+        ``RECENT_YEARS`` years up to the last with data (of series ``code``, or
+        of any series), or None when the range has no data."""
+        end = min(int(year_range[1]), self.first_year + self.year_count - 1) - self.first_year
+        if end < 0 or not len(self.series):
+            return None
+        last = self.last_observed[:, end] if code is None else self.last_observed[code:code + 1, end]
+        end = int(last.max())
+        if end < 0:
+            return None
+        start = max(int(year_range[0]) - self.first_year, end - self.recent_years + 1)
+        if end < start:
+            return None
+        return end, end - start
+
+    def recent(self, year_range, zone, drug, sex='Total'):
+        """Fitted recent trend of one series: dict of years, change, interval and
+        direction, or None without data."""
+        code = self.series_codes.get((zone, drug, sex))
+        window = None if code is None else self.recent_window(year_range, code)
+        if window is None:
+            return None
+        end, length = window
+        direction = int(self.direction[code, end, length])
+        return {
+            'years': [end - length + self.first_year, end + self.first_year],
+            'change': float(self.change[code, end, length]),
+            'lower': float(self.lower[code, end, length]),
+            'upper': float(self.upper[code, end, length]),
+            'deaths': int(self.window_deaths[code, end, length]),
+            'direction': None if direction == -2 else direction
+        }
+
+    def label(self, year_range, zone, drug):
+        """Recent Trend card text for the selected zone and drug."""
+        trend = self.recent(year_range, zone, drug)
+        return trend_label(trend['direction'] if trend else None, trend['change'] if trend else np.nan)
+
+    def window_labels(self, zone, drug):
+        """Recent Trend card text of every window (end, length) of a Total series."""
+        labels = np.full((self.year_count, self.recent_years), "N/A", dtype=object)
+        code = self.series_codes.get((zone, drug, 'Total'))
+        if code is None:
+            return labels
+        for end, length in np.ndindex(labels.shape):
+            direction = int(self.direction[code, end, length])
+            labels[end, length] = trend_label(None if direction == -2 else direction, self.change[code, end, length])
+        return labels
+
+    def ranking(self, year_range, count=None):
+        """Series with a fitted recent trend, fastest rising first (by the lower
+        end of the 95% interval), with their change points."""
+        columns = ['Health Zone of Residence', 'Drug Type', 'Sex', 'First Year', 'Last Year', 'Deaths',
+                   'Annual Change', 'Lower', 'Upper', 'Change Year', 'Change Before', 'Change After']
+        window = self.recent_window(year_range)
+        if window is None:
+            return pd.DataFrame(columns=columns)
+        end, length = window
+        order = self.ranking_order[:, end, length]
+        order = order[np.isfinite(self.lower[order, end, length])][:count]
+        keys = [self.series[code] for code in order]
+        return pd.DataFrame({
+            'Health Zone of Residence': [key[0] for key in keys],
+            'Drug Type': [key[1] for key in keys],
+            'Sex': [key[2] for key in keys],
+            'First Year': end - length + self.first_year,
+            'Last Year': end + self.first_year,
+            'Deaths': self.window_deaths[order, end, length].astype(np.int64),
+            'Annual Change': self.change[order, end, length],
+            'Lower': self.lower[order, end, length],
+            'Upper': self.upper[order, end, length],
+            'Change Year': self.change_year[order],
+            'Change Before': self.change_before[order],
+            'Change After': self.change_after[order]
+        }, columns=columns)